@@ -0,0 +1,57 @@
+"""Time `OSMGraph.construct_geometries` over growing synthetic networks.
+
+Each network is a set of parallel streets of `--segments` edges, every edge
+carrying one internal node, so the work per edge is constant and the time per
+edge should stay flat as the edge count grows.
+
+    python benchmarks/construct_geometries.py
+    python benchmarks/construct_geometries.py --sizes 10000 100000 1000000 5000000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from osm_osw_reformatter.serializer.osm.osm_graph import OSMGraph, graph_class  # noqa: E402
+from osm_osw_reformatter.config import FormatterConfig  # noqa: E402
+
+
+def street_network(edges: int, segments: int, config: FormatterConfig) -> OSMGraph:
+    G = graph_class(config)()
+    node = 0
+    for street in range(0, edges, segments):
+        lat = 47.0 + street * 1e-6
+        previous = node
+        G.add_node(node, lon=-122.0, lat=lat)
+        for segment in range(min(segments, edges - street)):
+            internal, node = node + 1, node + 2
+            lon = -122.0 + (segment + 1) * 2e-5
+            G.add_node(internal, lon=lon - 1e-5, lat=lat)
+            G.add_node(node, lon=lon, lat=lat)
+            G.add_edge(previous, node, osm_id=str(street), ndref=[previous, internal, node])
+            previous = node
+        node += 1
+    return OSMGraph(G)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--segments', type=int, default=50)
+    parser.add_argument('--graph-backend', default='networkx')
+    args = parser.parse_args()
+
+    config = FormatterConfig(graph_backend=args.graph_backend)
+    print(f"{'edges':>10} {'seconds':>10} {'us/edge':>10}")
+    for size in args.sizes:
+        og = street_network(size, args.segments, config)
+        start = time.perf_counter()
+        og.construct_geometries(config=config)
+        elapsed = time.perf_counter() - start
+        print(f'{size:>10} {elapsed:>10.2f} {elapsed / size * 1e6:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
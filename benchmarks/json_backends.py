@@ -0,0 +1,75 @@
+"""Compare GeoJSON read and write throughput of the JSON backends.
+
+Every `.geojson` member of the given OSW zips is decoded and then encoded both
+indented and compact with each backend. Backends whose library is not
+installed are skipped.
+
+    python benchmarks/json_backends.py
+    python benchmarks/json_backends.py path/to/osw.zip --repeat 5
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from osm_osw_reformatter.config import JSON_BACKENDS  # noqa: E402
+from osm_osw_reformatter.serializer.json_backend import get_json_backend  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+
+def largest_zips(count: int = 2) -> list:
+    zips = glob.glob(os.path.join(ROOT, 'input', '*.zip'))
+    zips += glob.glob(os.path.join(ROOT, 'tests', 'unit_tests', 'test_files', '*.zip'))
+    return sorted(zips, key=os.path.getsize, reverse=True)[:count]
+
+
+def read_members(paths: list) -> list:
+    members = []
+    for path in paths:
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                if name.endswith('.geojson') and not name.startswith('__MACOSX'):
+                    members.append(archive.read(name))
+    return members
+
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('zips', nargs='*', help='OSW zips to read (default: the two largest in the repo)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    paths = args.zips or largest_zips()
+    members = read_members(paths)
+    megabytes = sum(len(member) for member in members) / 1e6
+    print(f'{len(members)} GeoJSON files, {megabytes:.1f} MB from {", ".join(map(os.path.basename, paths))}')
+    print(f"{'backend':>8} {'load MB/s':>10} {'dump MB/s':>10} {'compact MB/s':>13}")
+
+    for name in JSON_BACKENDS:
+        backend = get_json_backend(name)
+        if backend.name != name:
+            print(f'{name:>8} not installed')
+            continue
+        documents = [backend.loads(member) for member in members]
+        load = best_of(args.repeat, lambda: [backend.loads(member) for member in members])
+        dump = best_of(args.repeat, lambda: [backend.dumps(document, indent=2) for document in documents])
+        compact = best_of(args.repeat, lambda: [backend.dumps(document) for document in documents])
+        print(f'{name:>8} {megabytes / load:>10.1f} {megabytes / dump:>10.1f} {megabytes / compact:>13.1f}')
+
+
+if __name__ == '__main__':
+    main()
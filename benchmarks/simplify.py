@@ -0,0 +1,97 @@
+"""Time `OSMGraph.simplify` on a dense synthetic network for each graph backend.
+
+The network is a grid of streets, each one way crossing every other street,
+with `--segments` degree-2 nodes between crossings. Every crossing also starts
+`--spurs` dead-end ways, so crossings have many neighbours, as busy sidewalk
+junctions do. Edges carry the attributes `OSMWayParser` gives them. The
+graph's traced memory is reported alongside the time.
+
+    python benchmarks/simplify.py
+    python benchmarks/simplify.py --streets 200 --segments 8 --spurs 12
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from osm_osw_reformatter.config import GRAPH_BACKENDS, FormatterConfig  # noqa: E402
+from osm_osw_reformatter.serializer.osm.osm_graph import OSMGraph, graph_class  # noqa: E402
+
+TAGS = {'highway': 'footway', 'footway': 'sidewalk', 'surface': 'concrete'}
+
+
+def add_way(G, osm_id: int, nodes: list) -> None:
+    for segment, (u, v) in enumerate(zip(nodes, nodes[1:])):
+        G.add_edges_from([(u, v, {'osm_id': osm_id, 'segment': segment, 'ndref': [u, v], **TAGS})])
+
+
+def dense_network(streets: int, segments: int, spurs: int, config: FormatterConfig) -> OSMGraph:
+    G = graph_class(config)()
+    step = segments + 1
+    for i in range(streets):
+        for j in range(streets * step):
+            G.add_node(i * streets * step + j, lon=-122.0 + j * 1e-5, lat=47.0 + i * 1e-5 * step)
+    next_node = streets * streets * step
+    osm_id = 0
+
+    def crossing(row: int, column: int) -> int:
+        return row * streets * step + column * step
+
+    for i in range(streets):
+        # Each row street runs through its own nodes; each column street joins
+        # the crossings of every row with nodes of its own in between.
+        add_way(G, osm_id, [i * streets * step + j for j in range(streets * step)])
+        osm_id += 1
+        column = [crossing(0, i)]
+        for row in range(1, streets):
+            for _ in range(segments):
+                G.add_node(next_node, lon=-122.0 + i * 1e-5 * step, lat=47.0)
+                column.append(next_node)
+                next_node += 1
+            column.append(crossing(row, i))
+        add_way(G, osm_id, column)
+        osm_id += 1
+    for i in range(streets):
+        for j in range(streets):
+            for _ in range(spurs):
+                spur = [crossing(i, j)]
+                for _ in range(segments):
+                    G.add_node(next_node, lon=-122.0, lat=47.0)
+                    spur.append(next_node)
+                    next_node += 1
+                add_way(G, osm_id, spur)
+                osm_id += 1
+    return OSMGraph(G)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--streets', type=int, default=100)
+    parser.add_argument('--segments', type=int, default=4)
+    parser.add_argument('--spurs', type=int, default=10)
+    parser.add_argument('--graph-backends', nargs='+', default=list(GRAPH_BACKENDS))
+    args = parser.parse_args()
+
+    print(f"{'backend':>10} {'edges':>10} {'seconds':>10} {'graph MB':>10}")
+    for graph_backend in args.graph_backends:
+        config = FormatterConfig(graph_backend=graph_backend)
+        gc.collect()
+        tracemalloc.start()
+        og = dense_network(args.streets, args.segments, args.spurs, config)
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        edges = og.G.number_of_edges()
+        start = time.perf_counter()
+        og.simplify()
+        elapsed = time.perf_counter() - start
+        print(f'{graph_backend:>10} {edges:>10} {elapsed:>10.2f} {size / 1e6:>10.1f}')
+        del og
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,25 @@
 import os
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
 from pathlib import Path
+from typing import Callable, List, Optional, Union
 from .osm2osw.osm2osw import OSM2OSW
 from .osw2osm.osw2osm import OSW2OSM
 from .config import (
     DEFAULT_ALLOW_ZERO_LENGTH_LINES,
+    DEFAULT_COMPACT_GEOJSON,
     DEFAULT_COORDINATE_PRECISION,
+    DEFAULT_GRAPH_BACKEND,
+    DEFAULT_JSON_BACKEND,
+    DEFAULT_LOCATION_INDEX,
     DEFAULT_MAX_GEOMETRY_VERTICES,
     DEFAULT_VALIDATE_INPUT,
     DEFAULT_VALIDATE_OUTPUT,
+    DEFAULT_VALIDATION_CACHE_DIR,
     FormatterConfig,
 )
+from .helpers.executor import ConversionExecutor, conversion_executor
+from .helpers.metrics import StageMetrics
 from .helpers.response import Response
 from .version import __version__
 
@@ -30,6 +40,13 @@ class Formatter:
         allow_zero_length_lines: bool = None,
         validate_input: bool = None,
         validate_output: bool = None,
+        location_index: str = None,
+        graph_backend: str = None,
+        compact_geojson: bool = None,
+        json_backend: str = None,
+        validation_cache_dir: str = None,
+        executor: Union[ConversionExecutor, Executor] = None,
+        metrics_hook: Optional[Callable[[StageMetrics], None]] = None,
     ):
         is_exists = os.path.exists(workdir)
         if not is_exists:
@@ -63,12 +80,39 @@ class Formatter:
                     if validate_output is None
                     else validate_output
                 ),
+                location_index=(
+                    DEFAULT_LOCATION_INDEX
+                    if location_index is None
+                    else location_index
+                ),
+                graph_backend=(
+                    DEFAULT_GRAPH_BACKEND
+                    if graph_backend is None
+                    else graph_backend
+                ),
+                compact_geojson=(
+                    DEFAULT_COMPACT_GEOJSON
+                    if compact_geojson is None
+                    else compact_geojson
+                ),
+                json_backend=(
+                    DEFAULT_JSON_BACKEND
+                    if json_backend is None
+                    else json_backend
+                ),
+                validation_cache_dir=(
+                    DEFAULT_VALIDATION_CACHE_DIR
+                    if validation_cache_dir is None
+                    else validation_cache_dir
+                ),
             )
         self.workdir = workdir
         self.file_path = file_path
         self.generated_files = []
         self.prefix = prefix
         self.config = config
+        self.executor = conversion_executor(executor)
+        self.metrics_hook = metrics_hook
 
     async def osm2osw(self) -> Response:
         convert = OSM2OSW(
@@ -76,6 +120,8 @@ class Formatter:
             workdir=self.workdir,
             prefix=self.prefix,
             config=self.config,
+            executor=self.executor,
+            metrics_hook=self.metrics_hook,
         )
         result = await convert.convert()
         self.generated_files = result.generated_files
@@ -87,12 +133,91 @@ class Formatter:
             workdir=self.workdir,
             prefix=self.prefix,
             config=self.config,
+            executor=self.executor,
+            metrics_hook=self.metrics_hook,
         )
         result = convert.convert()
         self.generated_files = [result.generated_files]
         return result
 
+    async def osw2osm_async(self) -> Response:
+        """`osw2osm` with each stage run off the event loop; see `OSW2OSM.convert_async`."""
+        convert = OSW2OSM(
+            zip_file_path=self.file_path,
+            workdir=self.workdir,
+            prefix=self.prefix,
+            config=self.config,
+            executor=self.executor,
+            metrics_hook=self.metrics_hook,
+        )
+        result = await convert.convert_async()
+        self.generated_files = [result.generated_files]
+        return result
+
+    @classmethod
+    def convert_many(
+        cls,
+        file_paths: List[Union[str, bytes, bytearray, memoryview]],
+        workdir=DOWNLOAD_FOLDER,
+        prefix='final',
+        config: FormatterConfig = None,
+        max_workers: Optional[int] = None,
+        **options,
+    ) -> List[Response]:
+        """Convert every input in `file_paths` across a pool of processes.
+
+        OSW archives (`.zip` paths or their contents as bytes) are converted
+        OSW → OSM and anything else OSM → OSW, each in its own `workdir/<index>`
+        directory so outputs never collide. At most `max_workers` conversions
+        run at once, one per CPU by default. The remaining keyword arguments
+        are the per-option settings `Formatter` takes, except `executor` and
+        `metrics_hook`, which cannot reach the worker processes. One `Response`
+        is returned per input, in input order.
+        """
+        unsupported = sorted({'executor', 'metrics_hook'} & options.keys())
+        if unsupported:
+            raise TypeError(f"convert_many does not take {', '.join(unsupported)}.")
+        if max_workers is not None and (isinstance(max_workers, bool) or not isinstance(max_workers, int)):
+            raise TypeError("max_workers must be an integer.")
+        if max_workers is not None and max_workers <= 0:
+            raise ValueError("max_workers must be greater than zero.")
+        config = cls(workdir=workdir, prefix=prefix, config=config, **options).config
+        jobs = [
+            # A memoryview cannot be sent to a worker process; its bytes can.
+            (bytes(file_path) if isinstance(file_path, memoryview) else file_path,
+             os.path.join(workdir, str(index)), prefix, config)
+            for index, file_path in enumerate(file_paths)
+        ]
+        if not jobs:
+            return []
+
+        workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_convert_job, *job) for job in jobs]
+            return [_job_response(future) for future in futures]
+
     def cleanup(self) -> None:
         for file in self.generated_files:
             if os.path.exists(file):
                 os.remove(file)
+
+
+def _is_osw_input(file_path) -> bool:
+    return isinstance(file_path, (bytes, bytearray, memoryview)) or str(file_path).lower().endswith('.zip')
+
+
+def _convert_job(file_path, workdir, prefix, config) -> Response:
+    """Run one conversion of `Formatter.convert_many` in a worker process."""
+    formatter = Formatter(workdir=workdir, file_path=file_path, prefix=prefix, config=config)
+    if _is_osw_input(file_path):
+        return formatter.osw2osm()
+    return asyncio.run(formatter.osm2osw())
+
+
+def _job_response(future) -> Response:
+    try:
+        return future.result()
+    except Exception as error:
+        # The pool itself failed, e.g. a worker was killed for running out of
+        # memory, which fails every conversion still outstanding.
+        return Response(status=False, error=str(error) or type(error).__name__)
@@ -1,4 +1,6 @@
+import os
 from dataclasses import dataclass
+from typing import Optional
 
 
 DEFAULT_COORDINATE_PRECISION = 7
@@ -6,6 +8,34 @@ DEFAULT_MAX_GEOMETRY_VERTICES = 2000
 DEFAULT_ALLOW_ZERO_LENGTH_LINES = True
 DEFAULT_VALIDATE_INPUT = True
 DEFAULT_VALIDATE_OUTPUT = True
+DEFAULT_LOCATION_INDEX = "flex_mem"
+DEFAULT_GRAPH_BACKEND = "networkx"
+DEFAULT_COMPACT_GEOJSON = False
+DEFAULT_JSON_BACKEND = "json"
+DEFAULT_VALIDATION_CACHE_DIR = None
+
+# Node-location indexes osmium can build while reading ways and areas. The
+# file-backed ones store the index on disk and are named with the file to use,
+# e.g. "dense_file_array,/tmp/locations.idx".
+LOCATION_INDEX_TYPES = (
+    "flex_mem",
+    "sparse_mem_array",
+    "sparse_mem_map",
+    "sparse_mmap_array",
+    "sparse_file_array",
+    "dense_mem_array",
+    "dense_mmap_array",
+    "dense_file_array",
+)
+FILE_LOCATION_INDEX_TYPES = ("sparse_file_array", "dense_file_array")
+
+# Storage behind the OSM graph: plain networkx dicts, or the slimmer mappings
+# of `serializer.osm.slim_graph`, which trade some speed for memory.
+GRAPH_BACKENDS = ("networkx", "slim")
+
+# Libraries GeoJSON can be read and written with. orjson and msgspec are
+# optional; the stdlib json module stands in for whichever is not installed.
+JSON_BACKENDS = ("json", "orjson", "msgspec")
 
 
 @dataclass(frozen=True)
@@ -17,6 +47,11 @@ class FormatterConfig:
     allow_zero_length_lines: bool = DEFAULT_ALLOW_ZERO_LENGTH_LINES
     validate_input: bool = DEFAULT_VALIDATE_INPUT
     validate_output: bool = DEFAULT_VALIDATE_OUTPUT
+    location_index: str = DEFAULT_LOCATION_INDEX
+    graph_backend: str = DEFAULT_GRAPH_BACKEND
+    compact_geojson: bool = DEFAULT_COMPACT_GEOJSON
+    json_backend: str = DEFAULT_JSON_BACKEND
+    validation_cache_dir: Optional[str] = DEFAULT_VALIDATION_CACHE_DIR
 
     def __post_init__(self) -> None:
         if isinstance(self.coordinate_precision, bool) or not isinstance(
@@ -37,3 +72,35 @@ class FormatterConfig:
             raise TypeError("validate_input must be a boolean.")
         if not isinstance(self.validate_output, bool):
             raise TypeError("validate_output must be a boolean.")
+        if not isinstance(self.location_index, str):
+            raise TypeError("location_index must be a string.")
+        index_type, _, index_file = self.location_index.partition(",")
+        if index_type not in LOCATION_INDEX_TYPES:
+            raise ValueError(
+                "location_index must be one of: "
+                + ", ".join(LOCATION_INDEX_TYPES)
+                + "."
+            )
+        if index_type in FILE_LOCATION_INDEX_TYPES and not index_file:
+            raise ValueError(
+                f"location_index '{index_type}' must name its file, "
+                f"e.g. '{index_type},/tmp/locations.idx'."
+            )
+        if not isinstance(self.graph_backend, str):
+            raise TypeError("graph_backend must be a string.")
+        if self.graph_backend not in GRAPH_BACKENDS:
+            raise ValueError(
+                "graph_backend must be one of: " + ", ".join(GRAPH_BACKENDS) + "."
+            )
+        if not isinstance(self.compact_geojson, bool):
+            raise TypeError("compact_geojson must be a boolean.")
+        if not isinstance(self.json_backend, str):
+            raise TypeError("json_backend must be a string.")
+        if self.json_backend not in JSON_BACKENDS:
+            raise ValueError(
+                "json_backend must be one of: " + ", ".join(JSON_BACKENDS) + "."
+            )
+        if self.validation_cache_dir is not None and not isinstance(
+            self.validation_cache_dir, (str, os.PathLike)
+        ):
+            raise TypeError("validation_cache_dir must be a path or None.")
@@ -0,0 +1,74 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Optional
+
+
+class ConversionExecutor:
+    """Where the blocking work of async conversions runs, and how much at once.
+
+    `executor` is any `concurrent.futures.Executor`; None is the event loop's
+    default thread pool. A thread pool runs a conversion one stage at a time,
+    each stage a job of its own. A `ProcessPoolExecutor` runs each conversion
+    whole as one job, since the graph is too large to send between stages.
+
+    `max_concurrent`, if given, caps how many conversions sharing this object
+    run at once. The rest wait their turn without blocking the event loop.
+    Share one instance between the `Formatter`s of a service for the cap to
+    hold across them, and use it from a single event loop.
+    """
+
+    def __init__(self, executor: Optional[Executor] = None, max_concurrent: Optional[int] = None) -> None:
+        if executor is not None and not isinstance(executor, Executor):
+            raise TypeError("executor must be a concurrent.futures.Executor.")
+        if max_concurrent is not None and (
+            isinstance(max_concurrent, bool) or not isinstance(max_concurrent, int)
+        ):
+            raise TypeError("max_concurrent must be an integer.")
+        if max_concurrent is not None and max_concurrent <= 0:
+            raise ValueError("max_concurrent must be greater than zero.")
+        self.executor = executor
+        self.max_concurrent = max_concurrent
+        self._slots = asyncio.Semaphore(max_concurrent) if max_concurrent else None
+
+    @property
+    def in_processes(self) -> bool:
+        return isinstance(self.executor, ProcessPoolExecutor)
+
+    async def run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the `max_concurrent` places for a conversion's duration."""
+        if self._slots is None:
+            yield
+            return
+        async with self._slots:
+            yield
+
+
+DEFAULT_EXECUTOR = ConversionExecutor()
+
+
+def conversion_executor(executor=None) -> ConversionExecutor:
+    """`executor` as a `ConversionExecutor`, wrapping a bare `Executor`."""
+    if executor is None:
+        return DEFAULT_EXECUTOR
+    if isinstance(executor, ConversionExecutor):
+        return executor
+    return ConversionExecutor(executor)
+
+
+def stage_executor(executor=None) -> ConversionExecutor:
+    """`executor` for running a single stage against a graph held here.
+
+    A stage works on the graph in this process, which a worker process could
+    only ever see a copy of, so process executors are rejected.
+    """
+    executor = conversion_executor(executor)
+    if executor.in_processes:
+        raise TypeError(
+            "Conversion stages run on threads; a process executor can only run a whole conversion."
+        )
+    return executor
@@ -1,15 +1,23 @@
 """Validation of OSW and OSM input datasets before they are converted."""
 
+import hashlib
+import json
+import os
 import re
+import tempfile
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
 from decimal import Decimal, InvalidOperation
+from itertools import repeat
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
-from xml.etree import ElementTree as ET
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from xml.parsers import expat
 
 import osmium
 from python_osw_validation import OSWValidation
 from python_osw_validation.config import ValidationConfig
+from python_osw_validation.version import __version__ as VALIDATOR_VERSION
 
 from ..config import DEFAULT_COORDINATE_PRECISION, FormatterConfig
 
@@ -43,6 +51,8 @@ OSM_CORRUPT_FILE_AT_ERROR_TEMPLATE = (
 # Parser messages differ between the XML reader and osmium, but both spell the
 # position the same way. Everything else in them is jargon, so only this is kept.
 _PARSE_LOCATION_PATTERN = re.compile(r'line (\d+), column (\d+)')
+# A plain-digit coordinate, capturing its decimals; other spellings go to `Decimal`.
+_PLAIN_COORDINATE_PATTERN = re.compile(r'[+-]?\d*\.?(\d*)')
 # osmium reports many kinds of RuntimeError, most of which are complaints about
 # the data rather than the file being unreadable. Only these mean it could not
 # be parsed; anything else must keep its own message.
@@ -69,6 +79,9 @@ OSW_FILE_NO_DATASETS_ERROR = (
 # so a PBF cannot report more decimals than this whatever granularity the file
 # declares -- more precise coordinates are quantized on read, not rejected.
 OSMIUM_LOCATION_PRECISION = DEFAULT_COORDINATE_PRECISION
+# A PBF precision scan spread over processes hands each one runs of file
+# blocks of about this many bytes.
+PBF_SCAN_SPAN_BYTES = 16 * 1024 * 1024
 
 
 class InputValidationError(ValueError):
@@ -183,6 +196,10 @@ class _PbfPrecisionHandler(osmium.SimpleHandler):
     def exceeds_precision(self) -> bool:
         return bool(self.offenders)
 
+    def raise_for_offenders(self) -> None:
+        if self.offenders:
+            raise OSMCoordinatePrecisionError(self.coordinate_precision, self.offenders)
+
     def node(self, n) -> None:
         if not n.location.valid():
             return
@@ -210,48 +227,196 @@ def _decimal_places(value: str) -> int:
     return max(0, -exponent) if isinstance(exponent, int) else 0
 
 
+def _coordinate_decimal_places(value: Optional[str]) -> int:
+    """`_decimal_places` of an attribute, counting plain decimals directly."""
+    match = _PLAIN_COORDINATE_PATTERN.fullmatch(value) if value is not None else None
+    if match:
+        return len(match.group(1))
+    return _decimal_places(value)
+
+
 def osm_xml_precision_offenders(file_path: str, coordinate_precision: int) -> List[Dict[str, Any]]:
-    """Every XML node whose coordinates carry more decimals than allowed."""
+    """Every XML node whose coordinates carry more decimals than allowed.
+
+    The file is streamed through expat, reading only the attributes of each
+    start tag: no element tree is built, and coordinates written as plain
+    digits have their decimals counted without constructing a `Decimal`.
+    """
     offenders: List[Dict[str, Any]] = []
+    # Matches plain coordinates that are within the limit, which most are.
+    within_precision = re.compile(r'[+-]?\d*(?:\.\d{0,%d})?' % max(coordinate_precision, 0)).fullmatch
+
+    def start_element(name, attributes):
+        if name != 'node':
+            return
+        latitude = attributes.get('lat')
+        longitude = attributes.get('lon')
+        if within_precision(latitude or '') and within_precision(longitude or ''):
+            return
+        decimals = max(_coordinate_decimal_places(latitude), _coordinate_decimal_places(longitude))
+        if decimals > coordinate_precision:
+            offenders.append({
+                'id': attributes.get('id'),
+                'lat': latitude,
+                'lon': longitude,
+                'decimals': decimals,
+            })
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start_element
     try:
-        for _event, element in ET.iterparse(file_path, events=('end',)):
-            if element.tag != 'node':
-                element.clear()
-                continue
-            latitude = element.get('lat')
-            longitude = element.get('lon')
-            decimals = max(_decimal_places(latitude), _decimal_places(longitude))
-            if decimals > coordinate_precision:
-                offenders.append({
-                    'id': element.get('id'),
-                    'lat': latitude,
-                    'lon': longitude,
-                    'decimals': decimals,
-                })
-            element.clear()
-    except ET.ParseError as error:
+        with open(file_path, 'rb') as osm_file:
+            parser.ParseFile(osm_file)
+    except expat.ExpatError as error:
         raise OSMFileCorruptError(str(error)) from error
     return offenders
 
 
-def osm_pbf_precision_offenders(file_path: str, coordinate_precision: int) -> List[Dict[str, Any]]:
-    """Every PBF node whose coordinates carry more decimals than allowed."""
+def _read_varint(data: bytes, position: int):
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, position
+        shift += 7
+
+
+def _blob_header_fields(header: bytes):
+    """The `type` and `datasize` of a PBF BlobHeader message."""
+    block_type = data_size = None
+    position = 0
+    while position < len(header):
+        key, position = _read_varint(header, position)
+        field, wire_type = key >> 3, key & 0x07
+        if wire_type == 0:
+            value, position = _read_varint(header, position)
+            if field == 3:
+                data_size = value
+        elif wire_type == 2:
+            length, position = _read_varint(header, position)
+            if field == 1:
+                block_type = header[position:position + length].decode('ascii', 'replace')
+            position += length
+        else:
+            raise ValueError(f'unexpected wire type {wire_type}')
+    return block_type, data_size
+
+
+def pbf_file_blocks(file_path: str) -> Optional[List[Tuple[str, int, int]]]:
+    """The `(type, offset, length)` of every file block in a PBF.
+
+    Only the block headers are read. None is returned for anything that does
+    not split cleanly into an `OSMHeader` block followed by `OSMData` blocks,
+    leaving osmium to report what is wrong with it.
+    """
+    blocks = []
+    file_size = os.path.getsize(file_path)
+    offset = 0
+    with open(file_path, 'rb') as pbf_file:
+        while offset < file_size:
+            header_size = int.from_bytes(pbf_file.read(4), 'big')
+            header = pbf_file.read(header_size)
+            try:
+                block_type, data_size = _blob_header_fields(header)
+            except (IndexError, ValueError):
+                return None
+            if len(header) < header_size or data_size is None:
+                return None
+            length = 4 + header_size + data_size
+            blocks.append((block_type, offset, length))
+            offset += length
+            pbf_file.seek(offset)
+    if offset != file_size or not blocks or blocks[0][0] != 'OSMHeader':
+        return None
+    if any(block_type != 'OSMData' for block_type, _, _ in blocks[1:]):
+        return None
+    return blocks
+
+
+def _pbf_span_precision_offenders(
+    file_path: str,
+    header_span: Tuple[int, int],
+    data_span: Tuple[int, int],
+    coordinate_precision: int,
+) -> List[Dict[str, Any]]:
+    """Scan one run of data blocks, read behind the file's header block."""
+    with open(file_path, 'rb') as pbf_file:
+        pbf_file.seek(header_span[0])
+        data = pbf_file.read(header_span[1])
+        pbf_file.seek(data_span[0])
+        data += pbf_file.read(data_span[1])
+    handler = _PbfPrecisionHandler(coordinate_precision)
+    handler.apply_buffer(data, 'pbf')
+    return handler.offenders
+
+
+def _pbf_scan_spans(blocks: List[Tuple[str, int, int]], span_bytes: int) -> List[Tuple[int, int]]:
+    """Group consecutive data blocks into runs of about `span_bytes`."""
+    spans = []
+    start = length = 0
+    for _block_type, offset, block_length in blocks[1:]:
+        if length and length + block_length > span_bytes:
+            spans.append((start, length))
+            length = 0
+        if not length:
+            start = offset
+        length += block_length
+    if length:
+        spans.append((start, length))
+    return spans
+
+
+def osm_pbf_precision_offenders(
+    file_path: str,
+    coordinate_precision: int,
+    workers: int = 1,
+    span_bytes: int = PBF_SCAN_SPAN_BYTES,
+) -> List[Dict[str, Any]]:
+    """Every PBF node whose coordinates carry more decimals than allowed.
+
+    The file is scanned in this process unless `workers` is more than one.
+    Then it is split into runs of data blocks of about `span_bytes`, scanned
+    across that many processes; don't ask for them from inside a worker of
+    another pool. Offenders are reported in file order either way.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1.")
     # Nothing osmium reads can exceed its own 1e-7 resolution, so at or above
     # that precision the scan can only ever pass.
     if coordinate_precision >= OSMIUM_LOCATION_PRECISION:
         return []
-    handler = _PbfPrecisionHandler(coordinate_precision)
+
     try:
-        handler.apply_file(file_path)
+        blocks = pbf_file_blocks(file_path) if workers > 1 else None
+        if blocks is None or len(blocks) < 3:
+            handler = _PbfPrecisionHandler(coordinate_precision)
+            handler.apply_file(file_path)
+            return handler.offenders
+
+        header_span = blocks[0][1:]
+        spans = _pbf_scan_spans(blocks, span_bytes)
+        with ProcessPoolExecutor(max_workers=min(workers, len(spans))) as executor:
+            results = executor.map(
+                _pbf_span_precision_offenders,
+                repeat(file_path),
+                repeat(header_span),
+                spans,
+                repeat(coordinate_precision),
+            )
+            return [offender for offenders in results for offender in offenders]
     except RuntimeError as error:
         raise OSMFileCorruptError(str(error)) from error
-    return handler.offenders
 
 
-def osm_precision_offenders(file_path: str, coordinate_precision: int) -> List[Dict[str, Any]]:
-    """Every node coordinate carrying more decimals than allowed."""
+def osm_precision_offenders(file_path: str, coordinate_precision: int, workers: int = 1) -> List[Dict[str, Any]]:
+    """Every node coordinate carrying more decimals than allowed.
+
+    `workers` above one spreads the scan of a PBF over that many processes.
+    """
     if Path(file_path).suffix.lower() == '.pbf':
-        return osm_pbf_precision_offenders(file_path, coordinate_precision)
+        return osm_pbf_precision_offenders(file_path, coordinate_precision, workers=workers)
     return osm_xml_precision_offenders(file_path, coordinate_precision)
 
 
@@ -268,23 +433,50 @@ def osm_exceeds_coordinate_precision(file_path: str, coordinate_precision: int)
     return bool(osm_precision_offenders(file_path, coordinate_precision))
 
 
-def validate_osm_input(file_path: str, config: Optional[FormatterConfig] = None) -> None:
+def validate_osm_input(file_path: str, config: Optional[FormatterConfig] = None, workers: int = 1) -> None:
     """Reject OSM input whose coordinates exceed the configured precision.
 
     Args:
         file_path: Path to the OSM `.xml`, `.osm`, or `.pbf` file.
         config: Formatter settings supplying `coordinate_precision`.
+        workers: Processes to scan a PBF across; the default scans it here.
 
     Raises:
         OSMFileCorruptError: If the file cannot be parsed.
         OSMCoordinatePrecisionError: If any node coordinate is too precise.
     """
     config = config or FormatterConfig()
-    offenders = osm_precision_offenders(str(file_path), config.coordinate_precision)
+    offenders = osm_precision_offenders(str(file_path), config.coordinate_precision, workers=workers)
     if offenders:
         raise OSMCoordinatePrecisionError(config.coordinate_precision, offenders)
 
 
+def osm_node_precision_check(
+    file_path: str,
+    config: Optional[FormatterConfig] = None,
+) -> Optional[_PbfPrecisionHandler]:
+    """Validate OSM input, leaving what a later node pass can check to it.
+
+    osmium reads coordinates as 1e-7 degree integers, so a node pass over a
+    PBF sees exactly what `validate_osm_input` would. Rather than reading the
+    file twice, the returned handler's `node` is meant to be fed every node of
+    the graph-building pass, and `raise_for_offenders` called after it. XML
+    coordinates are judged as written, which osmium does not keep, so an XML
+    file is still scanned here. None is returned when nothing is left to check.
+
+    Raises:
+        OSMFileCorruptError: If an XML file cannot be parsed.
+        OSMCoordinatePrecisionError: If an XML node coordinate is too precise.
+    """
+    config = config or FormatterConfig()
+    if Path(file_path).suffix.lower() != '.pbf':
+        validate_osm_input(file_path, config=config)
+        return None
+    if config.coordinate_precision >= OSMIUM_LOCATION_PRECISION:
+        return None
+    return _PbfPrecisionHandler(config.coordinate_precision)
+
+
 def _issue_messages(issue: Any) -> List[str]:
     """Return the message(s) an issue carries, whatever shape it arrived in."""
     if not isinstance(issue, dict):
@@ -370,13 +562,25 @@ def validate_osw_input(
         zip_file_path: Path to the OSW dataset archive.
         config: Formatter settings; `coordinate_precision` and
             `allow_zero_length_lines` are applied to the validator so the input
-            is judged by the same rules the formatter converts with.
+            is judged by the same rules the formatter converts with. With
+            `validation_cache_dir` set, verdicts are cached there by archive
+            content and settings, and an unchanged archive is not re-validated.
         max_issues: Maximum number of validator issues reported back to the caller.
 
     Raises:
         InputValidationError: If the validator rejects the dataset, or fails to run.
     """
     _ensure_osw_archive_readable(zip_file_path)
+    config = config or FormatterConfig()
+    cache_path = None
+    if config.validation_cache_dir is not None:
+        cache_path = _validation_cache_path(zip_file_path, config, max_issues)
+        verdict = _read_cached_verdict(cache_path)
+        if verdict is not None:
+            if not verdict['is_valid']:
+                raise InputValidationError(verdict['issues'])
+            return
+
     try:
         validation = OSWValidation(
             zipfile_path=str(zip_file_path),
@@ -388,10 +592,64 @@ def validate_osw_input(
     except Exception as error:
         raise InputValidationError([{'error_message': str(error)}]) from error
 
+    # `issues` name the file and feature each problem came from; `errors` is
+    # the flatter legacy list and only stands in when no issue was recorded.
+    issues = [] if result.is_valid else (
+        result.issues
+        or [{'error_message': message} for message in (result.errors or [])]
+    )
+    if cache_path is not None:
+        _write_cached_verdict(cache_path, {'is_valid': result.is_valid, 'issues': issues})
     if not result.is_valid:
-        # `issues` name the file and feature each problem came from; `errors` is
-        # the flatter legacy list and only stands in when no issue was recorded.
-        raise InputValidationError(
-            result.issues
-            or [{'error_message': message} for message in (result.errors or [])]
-        )
+        raise InputValidationError(issues)
+
+
+def osw_archive_digest(zip_file_path: str) -> str:
+    """SHA-256 of an archive's bytes."""
+    digest = hashlib.sha256()
+    with open(zip_file_path, 'rb') as archive:
+        for chunk in iter(lambda: archive.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _validation_cache_path(zip_file_path: str, config: FormatterConfig, max_issues: int) -> Path:
+    """Where the verdict on this archive under these settings is cached.
+
+    The key covers everything the verdict depends on: the archive's content,
+    the validator settings and version, and how many issues are reported.
+    """
+    key = json.dumps({
+        'archive': osw_archive_digest(zip_file_path),
+        'settings': asdict(validation_config(config)),
+        'validator': VALIDATOR_VERSION,
+        'max_issues': max_issues,
+    }, sort_keys=True)
+    return Path(config.validation_cache_dir, hashlib.sha256(key.encode()).hexdigest() + '.json')
+
+
+def _read_cached_verdict(cache_path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(cache_path, encoding='utf-8') as cache_file:
+            verdict = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(verdict, dict) or not isinstance(verdict.get('issues'), list):
+        return None
+    return verdict
+
+
+def _write_cached_verdict(cache_path: Path, verdict: Dict[str, Any]) -> None:
+    """Store a verdict atomically; a cache that cannot be written is skipped."""
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=cache_path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as cache_file:
+                json.dump(verdict, cache_file, default=str)
+            os.replace(temp_path, cache_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    except OSError:
+        pass
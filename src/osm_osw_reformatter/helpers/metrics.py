@@ -0,0 +1,77 @@
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+@dataclass(frozen=True)
+class StageMetrics:
+    """What one stage of a conversion cost.
+
+    `wall_time` and `cpu_time` are in seconds; `cpu_time` counts every thread
+    of the process, so it also includes other work running alongside.
+    `peak_rss` is the process's peak resident set size in bytes by the end of
+    the stage -- the stage's own peak whenever it raised the high-water mark --
+    or None where the platform does not report it.
+    """
+
+    stage: str
+    wall_time: float
+    cpu_time: float
+    peak_rss: Optional[int]
+
+
+def peak_rss() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class ConversionMetrics:
+    """Collects the `StageMetrics` of one conversion, in the order run.
+
+    `hook`, if given, is called with each stage's metrics as it finishes. A
+    hook that raises is reported and otherwise ignored, so exporting metrics
+    never fails a conversion.
+    """
+
+    def __init__(self, hook: Optional[Callable[[StageMetrics], None]] = None) -> None:
+        self.hook = hook
+        self.stages: List[StageMetrics] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """Measure the block as stage `name`, whether or not it raises."""
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            self.record(StageMetrics(
+                stage=name,
+                wall_time=time.perf_counter() - wall_start,
+                cpu_time=time.process_time() - cpu_start,
+                peak_rss=peak_rss(),
+            ))
+
+    def record(self, metrics: StageMetrics) -> None:
+        self.stages.append(metrics)
+        if self.hook is None:
+            return
+        try:
+            self.hook(metrics)
+        except Exception as error:
+            print(f'Metrics hook failed for stage {metrics.stage}: {error}')
+
+    def extend(self, stages: Optional[List[StageMetrics]]) -> None:
+        """Record stages measured elsewhere, such as in a worker process."""
+        for metrics in stages or []:
+            self.record(metrics)
@@ -1,17 +1,21 @@
 import gc
+import io
 import os
-import json
 import zipfile
-import asyncio
-from typing import List
+from typing import List, Union
 from pathlib import Path
 from ...config import FormatterConfig
-from ...serializer.geometry_cleanup import clean_feature_geometry
+from ..executor import ConversionExecutor, stage_executor
+from ...serializer.geojson_writer import FeatureCollectionWriter
+from ...serializer.geometry_cleanup import clean_feature_geometries
+from ...serializer.json_backend import get_json_backend
 from ...serializer.osm.osm_graph import OSMGraph
 from ...serializer.counters import WayCounter, NodeCounter, PointCounter, LineCounter, ZoneCounter, PolygonCounter
 from ...serializer.osw.osw_normalizer import OSWWayNormalizer, OSWNodeNormalizer, OSWPointNormalizer, OSWLineNormalizer, \
     OSWZoneNormalizer, OSWPolygonNormalizer
 
+OSW_DATASET_FILES = ['nodes', 'edges', 'points', 'lines', 'zones', 'polygons']
+
 
 class OSWHelper:
     @staticmethod
@@ -45,59 +49,43 @@ class OSWHelper:
         return normalizer.filter()
 
     @staticmethod
-    async def count_ways(osm_file_path: str):
-        loop = asyncio.get_event_loop()
-        way_counter = WayCounter()
-        await loop.run_in_executor(None, way_counter.apply_file, osm_file_path)
-        return way_counter.count
+    async def count_ways(osm_file_path: str, executor: ConversionExecutor = None):
+        return await OSWHelper.count_entities(osm_file_path, WayCounter, executor=executor)
 
     @staticmethod
-    async def count_nodes(osm_file_path: str):
-        loop = asyncio.get_event_loop()
-        node_counter = NodeCounter()
-        await loop.run_in_executor(None, node_counter.apply_file, osm_file_path)
-        return node_counter.count
+    async def count_nodes(osm_file_path: str, executor: ConversionExecutor = None):
+        return await OSWHelper.count_entities(osm_file_path, NodeCounter, executor=executor)
 
     @staticmethod
-    async def count_points(osm_file_path: str):
-        loop = asyncio.get_event_loop()
-        point_counter = PointCounter()
-        await loop.run_in_executor(None, point_counter.apply_file, osm_file_path)
-        return point_counter.count
+    async def count_points(osm_file_path: str, executor: ConversionExecutor = None):
+        return await OSWHelper.count_entities(osm_file_path, PointCounter, executor=executor)
 
     @staticmethod
-    async def count_lines(osm_file_path: str):
-        loop = asyncio.get_event_loop()
-        line_counter = LineCounter()
-        await loop.run_in_executor(None, line_counter.apply_file, osm_file_path)
-        return line_counter.count
+    async def count_lines(osm_file_path: str, executor: ConversionExecutor = None):
+        return await OSWHelper.count_entities(osm_file_path, LineCounter, executor=executor)
 
     @staticmethod
-    async def count_zones(osm_file_path: str):
-        loop = asyncio.get_event_loop()
-        zone_counter = ZoneCounter()
-        await loop.run_in_executor(None, zone_counter.apply_file, osm_file_path)
-        return zone_counter.count
+    async def count_zones(osm_file_path: str, executor: ConversionExecutor = None):
+        return await OSWHelper.count_entities(osm_file_path, ZoneCounter, executor=executor)
 
     @staticmethod
-    async def count_polygons(osm_file_path: str):
-        loop = asyncio.get_event_loop()
-        polygon_counter = PolygonCounter()
-        await loop.run_in_executor(None, polygon_counter.apply_file, osm_file_path)
-        return polygon_counter.count
+    async def count_polygons(osm_file_path: str, executor: ConversionExecutor = None):
+        return await OSWHelper.count_entities(osm_file_path, PolygonCounter, executor=executor)
 
     @staticmethod
-    async def count_entities(osm_file_path: str, counter_class):
-        loop = asyncio.get_event_loop()
+    async def count_entities(osm_file_path: str, counter_class, executor: ConversionExecutor = None):
         counter = counter_class()
-        await loop.run_in_executor(None, counter.apply_file, osm_file_path)
+        await stage_executor(executor).run(counter.apply_file, osm_file_path)
         return counter.count
 
     @staticmethod
-    async def get_osm_graph(osm_file_path: str, config: FormatterConfig = None):
-        loop = asyncio.get_event_loop()
-        OG = await loop.run_in_executor(
-            None,
+    async def get_osm_graph(
+        osm_file_path: str,
+        config: FormatterConfig = None,
+        node_check=None,
+        executor: ConversionExecutor = None,
+    ):
+        OG = await stage_executor(executor).run(
             lambda: OSMGraph.from_osm_file(
                 osm_file_path,
                 OSWHelper.osw_way_filter,
@@ -107,6 +95,7 @@ class OSWHelper:
                 OSWHelper.osw_zone_filter,
                 OSWHelper.osw_polygon_filter,
                 config=config,
+                node_check=node_check,
             )
         )
 
@@ -114,84 +103,137 @@ class OSWHelper:
 
         return OG
 
+    @staticmethod
+    def dataset_members(names: List[str]) -> dict:
+        """Map each OSW dataset file found among archive member `names` to its member."""
+        members = {}
+        for optional_file in OSW_DATASET_FILES:
+            for name in names:
+                if '__MACOSX' in name:
+                    continue
+                if optional_file.lower() in name.lower():
+                    members[optional_file] = name
+        return members
+
     @staticmethod
     def unzip(zip_file: str, output: str):
         with zipfile.ZipFile(zip_file, 'r') as zip_ref:
             zip_ref.extractall(output)
-            extracted_files = zip_ref.namelist()
-            optional_files = ['nodes', 'edges', 'points', 'lines', 'zones', 'polygons']
-            file_locations = {}
-
-            for optional_file in optional_files:
-                for extracted_file in extracted_files:
-                    if '__MACOSX' in extracted_file:
-                        continue
-                    if optional_file.lower() in extracted_file.lower():
-                        file_locations[optional_file] = f'{output}/{extracted_file}'
+            members = OSWHelper.dataset_members(zip_ref.namelist())
+            file_locations = {
+                optional_file: f'{output}/{name}'
+                for optional_file, name in members.items()
+            }
 
             gc.collect()
             return file_locations
 
     @staticmethod
     def merge(osm_files: object, output: str, prefix: str, config: FormatterConfig = None):
-        config = config or FormatterConfig()
-        fc = {'type': 'FeatureCollection', 'features': []}
-        for file, location in osm_files.items():
-            geojson_path = Path(location)
-            if geojson_path.exists():
-                with open(geojson_path) as f:
-                    region_fc = json.load(f)
-                    for index, feature in enumerate(region_fc['features']):
-                        cleaned_feature = clean_feature_geometry(
-                            feature,
-                            collapsed_to_point=True,
-                            allow_zero_length_lines=(
-                                config.allow_zero_length_lines
-                                and file in {"edges", "lines"}
-                            ),
-                        )
-                        if cleaned_feature is None:
-                            feature_id = feature.get("properties", {}).get("_id", index)
-                            print(
-                                f"Skipped zero-length geometry in '{file}' "
-                                f"for feature '{feature_id}'."
-                            )
-                            continue
-                        fc['features'].append(cleaned_feature)
+        """Merge extracted OSW files into one GeoJSON file, removing each once read."""
+        json_backend = get_json_backend((config or FormatterConfig()).json_backend)
+
+        def datasets():
+            for file, location in osm_files.items():
+                geojson_path = Path(location)
+                if not geojson_path.exists():
+                    continue
+                with open(geojson_path, 'rb') as f:
+                    yield file, json_backend.load(f)['features']
                 os.remove(geojson_path)
+
+        return OSWHelper._write_merged(datasets(), output, prefix, config)
+
+    @staticmethod
+    def merge_archive(zip_file: Union[str, bytes], output: str, prefix: str, config: FormatterConfig = None):
+        """Merge the OSW files of an archive into one GeoJSON file.
+
+        `zip_file` is the archive's path or its contents. Members are decoded
+        straight from the archive, so nothing is extracted to `output`.
+        """
+        json_backend = get_json_backend((config or FormatterConfig()).json_backend)
+        if isinstance(zip_file, (bytes, bytearray, memoryview)):
+            zip_file = io.BytesIO(zip_file)
+
+        with zipfile.ZipFile(zip_file, 'r') as archive:
+            def datasets():
+                members = OSWHelper.dataset_members(archive.namelist())
+                for file, name in members.items():
+                    if archive.getinfo(name).is_dir():
+                        continue
+                    with archive.open(name) as f:
+                        yield file, json_backend.load(f)['features']
+
+            return OSWHelper._write_merged(datasets(), output, prefix, config)
+
+    @staticmethod
+    def _write_merged(datasets, output: str, prefix: str, config: FormatterConfig = None) -> str:
+        config = config or FormatterConfig()
+        json_backend = get_json_backend(config.json_backend)
+        header = {'type': 'FeatureCollection'}
         output_path = Path(output, f'{prefix}.graph.all.geojson')
-        with open(output_path, 'w') as f:
-            json.dump(fc, f)
+        # Each file's features are cleaned in place and written out before the
+        # next file is read, so only one input file is held in memory. The file
+        # is only read back by ogr2osm, so it is written compact.
+        with FeatureCollectionWriter(output_path, header, indent=None, json_backend=json_backend) as writer:
+            for file, features in datasets:
+                cleaned_features = clean_feature_geometries(
+                    features,
+                    collapsed_to_point=True,
+                    allow_zero_length_lines=(
+                        config.allow_zero_length_lines
+                        and file in {"edges", "lines"}
+                    ),
+                    in_place=True,
+                )
+                for index, cleaned_feature in enumerate(cleaned_features):
+                    if cleaned_feature is None:
+                        feature_id = features[index].get("properties", {}).get("_id", index)
+                        print(
+                            f"Skipped zero-length geometry in '{file}' "
+                            f"for feature '{feature_id}'."
+                        )
+                        continue
+                    writer.write(cleaned_feature)
+                del features, cleaned_features
+
+        if not writer.count:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json_backend.dump({**header, 'features': []}, f)
 
-        del f
         gc.collect()
 
         return str(output_path)
 
     @classmethod
-    async def simplify_og(cls, og):
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, og.simplify)
+    async def simplify_og(cls, og, executor: ConversionExecutor = None):
+        await stage_executor(executor).run(og.simplify)
 
     @classmethod
-    async def construct_geometries(cls, og, config: FormatterConfig = None):
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            None,
+    async def construct_geometries(cls, og, config: FormatterConfig = None, executor: ConversionExecutor = None):
+        await stage_executor(executor).run(
             lambda: og.construct_geometries(config=config),
         )
 
     @classmethod
-    async def write_og(cls, workdir: str, filename: str, og) -> List[str]:
-        loop = asyncio.get_event_loop()
+    async def write_og(
+        cls,
+        workdir: str,
+        filename: str,
+        og,
+        config: FormatterConfig = None,
+        executor: ConversionExecutor = None,
+    ) -> List[str]:
         points_path = Path(workdir, f'{filename}.graph.points.geojson')
         nodes_path = Path(workdir, f'{filename}.graph.nodes.geojson')
         edges_path = Path(workdir, f'{filename}.graph.edges.geojson')
         lines_path = Path(workdir, f'{filename}.graph.lines.geojson')
         zones_path = Path(workdir, f'{filename}.graph.zones.geojson')
         polygons_path = Path(workdir, f'{filename}.graph.polygons.geojson')
-        await loop.run_in_executor(None, og.to_geojson, nodes_path, edges_path, points_path, lines_path, zones_path,
-                                   polygons_path)
+        await stage_executor(executor).run(
+            lambda: og.to_geojson(nodes_path, edges_path, points_path, lines_path, zones_path, polygons_path,
+                                  config=config),
+        )
         # for the fi
         pot_gen_files = [str(nodes_path), str(edges_path), str(points_path), str(lines_path), str(zones_path),
                          str(polygons_path)]
@@ -2,7 +2,6 @@ import tempfile
 import zipfile
 from pathlib import Path
 from typing import Any, Iterable, List, Optional, Union
-from xml.etree import ElementTree as ET
 
 from python_osw_validation import OSWValidation
 
@@ -59,17 +58,6 @@ def ensure_generated_files(
         raise ConversionOutputError(NO_GENERATED_FILES_ERROR)
 
 
-def osm_xml_has_entities(osm_xml_path: Path) -> bool:
-    tree = ET.parse(osm_xml_path)
-    root = tree.getroot()
-    return any(root.findall(f".//{tag}") for tag in ("node", "way", "relation"))
-
-
-def ensure_osm_xml_has_entities(osm_xml_path: Path) -> None:
-    if not osm_xml_has_entities(osm_xml_path):
-        raise ConversionOutputError(EMPTY_OSM_XML_ERROR)
-
-
 def validate_osw_output(
     generated_files: Optional[Union[str, List[str]]],
     config: Optional[FormatterConfig] = None,
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from typing import List, Union, Optional
+from .metrics import StageMetrics
 
 
 @dataclass
@@ -7,3 +8,4 @@ class Response:
     status: bool
     generated_files: Optional[Union[str, List[str]]] = None
     error: str = None
+    metrics: Optional[List[StageMetrics]] = None
@@ -3,13 +3,16 @@ import os
 import asyncio
 import traceback
 from pathlib import Path
+from typing import Callable, Optional
 from ..config import FormatterConfig
 from ..helpers.input_validation import (
     OSMCoordinatePrecisionError,
     OSMFileCorruptError,
     is_osm_parse_failure,
-    validate_osm_input,
+    osm_node_precision_check,
 )
+from ..helpers.executor import ConversionExecutor, conversion_executor
+from ..helpers.metrics import ConversionMetrics, StageMetrics
 from ..helpers.osw import OSWHelper
 from ..helpers.output_validation import (
     ConversionOutputError,
@@ -20,7 +23,16 @@ from ..helpers.response import Response
 
 
 class OSM2OSW:
-    def __init__(self, prefix: str, osm_file=None, workdir=None, config: FormatterConfig = None):
+    def __init__(
+        self,
+        prefix: str,
+        osm_file=None,
+        workdir=None,
+        config: FormatterConfig = None,
+        executor: ConversionExecutor = None,
+        metrics_hook: Optional[Callable[[StageMetrics], None]] = None,
+    ):
+        self.prefix = prefix
         self.osm_file_path = str(Path(osm_file))
         filename = os.path.basename(osm_file).replace('.pbf', '').replace('.xml', '').replace('.osm', '')
         self.workdir = workdir
@@ -29,39 +41,86 @@ class OSM2OSW:
         if config is not None and not isinstance(config, FormatterConfig):
             raise TypeError("config must be a FormatterConfig instance.")
         self.config = config or FormatterConfig()
+        self.executor = conversion_executor(executor)
+        self.metrics_hook = metrics_hook
 
     async def convert(self) -> Response:
+        async with self.executor.slot():
+            if self.executor.in_processes:
+                # The graph is too large to pass between processes stage by
+                # stage, so the whole conversion runs in one.
+                try:
+                    resp = await self.executor.run(
+                        _convert_in_process, self.prefix, self.osm_file_path, self.workdir, self.config
+                    )
+                except Exception as error:
+                    # The worker never returned a response: the pool broke,
+                    # e.g. a worker was killed, or the job could not be pickled.
+                    traceback.print_exc()
+                    return Response(
+                        status=False,
+                        generated_files=self.generated_files,
+                        error=str(error) or type(error).__name__,
+                    )
+                self.generated_files = resp.generated_files
+                # The worker measured the stages; report them from here.
+                ConversionMetrics(self.metrics_hook).extend(resp.metrics)
+                return resp
+            return await self._convert()
+
+    async def _convert(self) -> Response:
+        metrics = ConversionMetrics(self.metrics_hook)
         try:
+            precision_check = None
             if self.config.validate_input:
-                validate_osm_input(self.osm_file_path, config=self.config)
+                # A PBF is checked during the graph's own node pass.
+                with metrics.stage('input_validation'):
+                    precision_check = await self.executor.run(
+                        osm_node_precision_check, self.osm_file_path, self.config
+                    )
 
             print('Creating networks from region extracts...')
             tasks = [
                 OSWHelper.get_osm_graph(
                     self.osm_file_path,
                     config=self.config,
+                    node_check=precision_check,
+                    executor=self.executor,
                 )
             ]
-            try:
-                osm_graph_results = await asyncio.gather(*tasks)
-            except RuntimeError as error:
-                # The reader raises RuntimeError both for unreadable files and
-                # for complaints about the data; only the former is corruption.
-                if is_osm_parse_failure(error):
-                    raise OSMFileCorruptError(str(error)) from error
-                raise
+            with metrics.stage('parse'):
+                try:
+                    osm_graph_results = await asyncio.gather(*tasks)
+                except RuntimeError as error:
+                    # The reader raises RuntimeError both for unreadable files and
+                    # for complaints about the data; only the former is corruption.
+                    if is_osm_parse_failure(error):
+                        raise OSMFileCorruptError(str(error)) from error
+                    raise
+            if precision_check is not None:
+                precision_check.raise_for_offenders()
             osm_graph_results = list(osm_graph_results)
             OG = osm_graph_results[0]
 
-            await OSWHelper.simplify_og(OG)
-            await OSWHelper.construct_geometries(OG, config=self.config)
+            with metrics.stage('simplify'):
+                await OSWHelper.simplify_og(OG, executor=self.executor)
+            with metrics.stage('construct_geometries'):
+                await OSWHelper.construct_geometries(OG, config=self.config, executor=self.executor)
 
             # for OG in osm_graph_results:
-            generated_files = await OSWHelper.write_og(self.workdir, self.filename, OG)
+            with metrics.stage('write'):
+                generated_files = await OSWHelper.write_og(
+                    self.workdir,
+                    self.filename,
+                    OG,
+                    config=self.config,
+                    executor=self.executor,
+                )
             self.generated_files = generated_files
             ensure_generated_files(generated_files, require_existing=True)
             if self.config.validate_output:
-                validate_osw_output(generated_files, config=self.config)
+                with metrics.stage('output_validation'):
+                    await self.executor.run(validate_osw_output, generated_files, self.config)
 
             print(f'Created OSW files!')
 
@@ -97,4 +156,10 @@ class OSM2OSW:
             )
         finally:
             gc.collect()
+        resp.metrics = metrics.stages
         return resp
+
+
+def _convert_in_process(prefix: str, osm_file: str, workdir: str, config: FormatterConfig) -> Response:
+    """Run one `OSM2OSW` conversion of a process executor in its worker."""
+    return asyncio.run(OSM2OSW(prefix=prefix, osm_file=osm_file, workdir=workdir, config=config).convert())
@@ -1,178 +1,335 @@
 import gc
+import os
+import asyncio
+import tempfile
 import ogr2osm
 from xml.etree import ElementTree as ET
 from pathlib import Path
+from typing import Callable, Optional, Union
 from ..config import FormatterConfig
+from ..helpers.executor import ConversionExecutor, conversion_executor
 from ..helpers.input_validation import InputValidationError, validate_osw_input
 from ..helpers.osw import OSWHelper
+from ..helpers.metrics import ConversionMetrics, StageMetrics
 from ..helpers.output_validation import (
+    EMPTY_OSM_XML_ERROR,
     ConversionOutputError,
     ensure_generated_files,
-    ensure_osm_xml_has_entities,
 )
 from ..helpers.response import Response
 from ..serializer.osm.osm_normalizer import OSMNormalizer
 
 
 class OSW2OSM:
-    def __init__(self, zip_file_path: str, workdir: str, prefix: str, config: FormatterConfig = None):
-        self.zip_path = str(Path(zip_file_path))
+    def __init__(
+        self,
+        zip_file_path: Union[str, bytes],
+        workdir: str,
+        prefix: str,
+        config: FormatterConfig = None,
+        executor: ConversionExecutor = None,
+        metrics_hook: Optional[Callable[[StageMetrics], None]] = None,
+    ):
+        # The archive can be given by path or as its contents.
+        if isinstance(zip_file_path, (bytes, bytearray, memoryview)):
+            self.zip_path = None
+            self.zip_bytes = bytes(zip_file_path)
+        else:
+            self.zip_path = str(Path(zip_file_path))
+            self.zip_bytes = None
         self.workdir = workdir
         self.prefix = prefix
         if config is not None and not isinstance(config, FormatterConfig):
             raise TypeError("config must be a FormatterConfig instance.")
         self.config = config or FormatterConfig()
+        self.executor = conversion_executor(executor)
+        self.metrics_hook = metrics_hook
 
     def convert(self) -> Response:
+        metrics = ConversionMetrics(self.metrics_hook)
         try:
             if self.config.validate_input:
-                validate_osw_input(self.zip_path, config=self.config)
-            unzipped_files = OSWHelper.unzip(self.zip_path, self.workdir)
-            input_file = OSWHelper.merge(
-                osm_files=unzipped_files,
-                output=self.workdir,
-                prefix=self.prefix,
-                config=self.config,
-            )
-            output_file = Path(self.workdir, f'{self.prefix}.graph.osm.xml')
-
-            # Create the translation object.
-            translation_object = OSMNormalizer(config=self.config)
-
-            # Create the ogr datasource
-            datasource = ogr2osm.OgrDatasource(translation_object)
-            datasource.open_datasource(input_file)
-
-            # Instantiate the ogr to osm converter class ogr2osm. OsmData and start the conversion process
-            # ogr2osm splits any way longer than this, sharing a node between
-            # the pieces so the run stays joined. Its own default is 1800; the
-            # formatter's limit governs instead.
-            osm_data = ogr2osm.OsmData(
-                translation_object,
-                max_points_in_way=self.config.max_geometry_vertices,
-            )
-            osm_data.process(datasource)
-
-            # Instantiate either ogr2osm.OsmDataWriter or ogr2osm.PbfDataWriter
-            data_writer = ogr2osm.OsmDataWriter(output_file, suppress_empty_tags=True)
-            osm_data.output(data_writer)
-            self._restore_zero_length_way_refs(output_file)
-            self._ensure_version_attribute(output_file)
-            self._remap_ids_to_sequential(output_file)
-            ensure_generated_files(str(output_file), require_existing=True)
-            ensure_osm_xml_has_entities(output_file)
-
-            del translation_object
-            del datasource
-            del osm_data
-            del data_writer
+                with metrics.stage('input_validation'):
+                    self._validate_input()
+            with metrics.stage('merge'):
+                input_file = self._merge_input()
+            with metrics.stage('ogr2osm'):
+                output_file = self._write_osm(input_file)
+            with metrics.stage('postprocess'):
+                self._postprocess_output(output_file)
             # Delete merge file
             Path(input_file).unlink()
             resp = Response(
                 status=True,
                 generated_files=str(output_file),
             )
-        except InputValidationError as error:
-            print(f'Invalid OSW input: {error}')
-            resp = Response(status=False, error=str(error))
-        except ConversionOutputError as error:
-            print(f'Error during conversion: {error}')
-            resp = Response(status=False, error=str(error))
         except Exception as error:
-            print(f'Error during conversion: {error}')
-            resp = Response(status=False, error=str(error))
+            resp = self._failure(error)
         finally:
             gc.collect()
+        resp.metrics = metrics.stages
         return resp
 
-    @staticmethod
-    def _restore_zero_length_way_refs(osm_xml_path: Path) -> None:
-        """Re-add the node reference ogr2osm drops from a zero-length way.
-
-        A zero-length OSW edge has both endpoints at the same node, so ogr2osm's
-        linestring parser skips the second vertex as a consecutive duplicate and
-        emits a way with one node, which is not valid OSM. Such an edge is meant
-        to survive as ``w = [n, n]``. A single-node way has no other source, so
-        any that appears here is this case.
+    async def convert_async(self) -> Response:
+        """Convert as `convert` does without blocking the event loop.
+
+        Each stage -- input validation, merging the archive, the ogr2osm
+        conversion and post-processing -- runs on the `executor`, the loop's
+        default one unless given. A running stage cannot be interrupted, so
+        cancelling the task takes effect once the current stage returns: the
+        merged input and any partial output are then removed and
+        `CancelledError` propagates. A process executor runs the whole
+        conversion as one job instead.
         """
-        try:
-            tree = ET.parse(osm_xml_path)
-        except Exception:
-            return
+        async with self.executor.slot():
+            if self.executor.in_processes:
+                try:
+                    resp = await self.executor.run(
+                        _convert_in_process,
+                        self.zip_bytes if self.zip_path is None else self.zip_path,
+                        self.workdir,
+                        self.prefix,
+                        self.config,
+                    )
+                except Exception as error:
+                    # The worker never returned a response: the pool broke,
+                    # e.g. a worker was killed, or the job could not be pickled.
+                    print(f'Error during conversion: {error}')
+                    return Response(status=False, error=str(error) or type(error).__name__)
+                # The worker measured the stages; report them from here.
+                ConversionMetrics(self.metrics_hook).extend(resp.metrics)
+                return resp
+            return await self._convert_stages()
 
-        root = tree.getroot()
-        restored = False
-        for way in root.findall('.//way'):
-            refs = way.findall('nd')
-            if len(refs) != 1:
-                continue
-            duplicate = ET.Element('nd', {'ref': refs[0].get('ref')})
-            way.insert(list(way).index(refs[0]) + 1, duplicate)
-            restored = True
+    async def _convert_stages(self) -> Response:
+        metrics = ConversionMetrics(self.metrics_hook)
+        try:
+            if self.config.validate_input:
+                with metrics.stage('input_validation'):
+                    await self._run_stage(self._validate_input)
+            with metrics.stage('merge'):
+                input_file = await self._run_stage(self._merge_input)
+            with metrics.stage('ogr2osm'):
+                output_file = await self._run_stage(self._write_osm, input_file)
+            with metrics.stage('postprocess'):
+                await self._run_stage(self._postprocess_output, output_file)
+            Path(input_file).unlink()
+            resp = Response(
+                status=True,
+                generated_files=str(output_file),
+            )
+        except asyncio.CancelledError:
+            # The merge stage may have written its file before the cancel,
+            # without its path ever reaching `input_file`.
+            self.merged_file.unlink(missing_ok=True)
+            self.output_file.unlink(missing_ok=True)
+            raise
+        except Exception as error:
+            resp = self._failure(error)
+        finally:
+            gc.collect()
+        resp.metrics = metrics.stages
+        return resp
 
-        if restored:
-            tree.write(osm_xml_path, encoding='utf-8', xml_declaration=True)
+    async def _run_stage(self, func, *args):
+        future = asyncio.ensure_future(self.executor.run(func, *args))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # Let the stage finish before the caller removes its files.
+            await asyncio.wait([future])
+            raise
 
     @staticmethod
-    def _ensure_version_attribute(osm_xml_path: Path) -> None:
-        """Ensure nodes, ways, and relations include a version attribute."""
-        try:
-            tree = ET.parse(osm_xml_path)
-        except Exception:
-            return
+    def _failure(error: Exception) -> Response:
+        if isinstance(error, InputValidationError):
+            print(f'Invalid OSW input: {error}')
+        else:
+            print(f'Error during conversion: {error}')
+        return Response(status=False, error=str(error))
 
-        root = tree.getroot()
-        for tag in ('node', 'way', 'relation'):
-            for element in root.findall(f'.//{tag}'):
-                if not element.get('version'):
-                    element.set('version', '1')
+    @property
+    def merged_file(self) -> Path:
+        return Path(self.workdir, f'{self.prefix}.graph.all.geojson')
 
-        tree.write(osm_xml_path, encoding='utf-8', xml_declaration=True)
+    @property
+    def output_file(self) -> Path:
+        return Path(self.workdir, f'{self.prefix}.graph.osm.xml')
 
-    @staticmethod
-    def _remap_ids_to_sequential(osm_xml_path: Path) -> None:
-        """Remap node/way/relation IDs to sequential values starting at 1 and update references."""
-        try:
-            tree = ET.parse(osm_xml_path)
-        except Exception:
+    def _merge_input(self) -> str:
+        return OSWHelper.merge_archive(
+            self.zip_bytes if self.zip_path is None else self.zip_path,
+            output=self.workdir,
+            prefix=self.prefix,
+            config=self.config,
+        )
+
+    def _write_osm(self, input_file) -> Path:
+        output_file = self.output_file
+
+        # Create the translation object.
+        translation_object = OSMNormalizer(config=self.config)
+
+        # Create the ogr datasource
+        datasource = ogr2osm.OgrDatasource(translation_object)
+        datasource.open_datasource(input_file)
+
+        # Instantiate the ogr to osm converter class ogr2osm. OsmData and start the conversion process
+        # ogr2osm splits any way longer than this, sharing a node between
+        # the pieces so the run stays joined. Its own default is 1800; the
+        # formatter's limit governs instead.
+        osm_data = ogr2osm.OsmData(
+            translation_object,
+            max_points_in_way=self.config.max_geometry_vertices,
+        )
+        osm_data.process(datasource)
+
+        # Instantiate either ogr2osm.OsmDataWriter or ogr2osm.PbfDataWriter
+        data_writer = ogr2osm.OsmDataWriter(output_file, suppress_empty_tags=True)
+        osm_data.output(data_writer)
+
+        del translation_object
+        del datasource
+        del osm_data
+        del data_writer
+        return output_file
+
+    def _postprocess_output(self, output_file: Path) -> None:
+        ensure_generated_files(str(output_file), require_existing=True)
+        if not self._postprocess_osm_xml(output_file):
+            raise ConversionOutputError(EMPTY_OSM_XML_ERROR)
+
+    def _validate_input(self) -> None:
+        if self.zip_path is not None:
+            validate_osw_input(self.zip_path, config=self.config)
             return
 
-        root = tree.getroot()
-
-        def remap_elements(xpath: str):
-            mapping = {}
-            elems = root.findall(xpath)
-            for idx, elem in enumerate(elems, start=1):
-                old_id = elem.get('id')
-                if old_id is None:
-                    continue
-                mapping[old_id] = str(idx)
-                elem.set('id', str(idx))
-                for tag in elem.findall("./tag[@k='_id']"):
-                    tag.set('v', str(idx))
-            return mapping
-
-        node_map = remap_elements('.//node')
-        way_map = remap_elements('.//way')
-        rel_map = remap_elements('.//relation')
-
-        # Update way nd refs
-        for way in root.findall('.//way'):
-            for nd in way.findall('nd'):
-                ref = nd.get('ref')
-                if ref in node_map:
-                    nd.set('ref', node_map[ref])
-
-        # Update relation member refs
-        for rel in root.findall('.//relation'):
-            for member in rel.findall('member'):
+        # The validator only reads archives from disk.
+        fd, zip_path = tempfile.mkstemp(dir=self.workdir, prefix=f'{self.prefix}.', suffix='.zip')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self.zip_bytes)
+            validate_osw_input(zip_path, config=self.config)
+        finally:
+            os.remove(zip_path)
+
+    @staticmethod
+    def _postprocess_osm_xml(osm_xml_path: Path) -> int:
+        """Rewrite ogr2osm's output in one streaming pass and count its entities.
+
+        Element by element, without holding the document in memory:
+
+        - A way with a single node reference gets it again. A zero-length OSW
+          edge has both endpoints at the same node, and ogr2osm drops the
+          second as a consecutive duplicate, leaving a way that is not valid
+          OSM. Such an edge is meant to survive as ``w = [n, n]``.
+        - Nodes, ways and relations without a version get ``version="1"``.
+        - Ids are renumbered from 1 per element type, along with `_id` tags,
+          way node references and relation members.
+
+        Elements are expected in OSM order -- nodes, then ways, then relations
+        -- so a way's node references are renumbered as it is read. Relations
+        may refer to relations further on, so they are held back until the end
+        of the document.
+        """
+        osm_xml_path = Path(osm_xml_path)
+        counters = {'node': 0, 'way': 0, 'relation': 0}
+        maps = {'node': {}, 'way': {}, 'relation': {}}
+        held = []
+        entities = 0
+
+        def rewrite(element: ET.Element) -> None:
+            kind = element.tag
+            if kind not in counters:
+                return
+            if kind == 'way':
+                refs = element.findall('nd')
+                if len(refs) == 1:
+                    duplicate = ET.Element('nd', {'ref': refs[0].get('ref')})
+                    element.insert(list(element).index(refs[0]) + 1, duplicate)
+            if not element.get('version'):
+                element.set('version', '1')
+            counters[kind] += 1
+            old_id = element.get('id')
+            if old_id is not None:
+                new_id = str(counters[kind])
+                maps[kind][old_id] = new_id
+                element.set('id', new_id)
+                for tag in element.findall("./tag[@k='_id']"):
+                    tag.set('v', new_id)
+            if kind == 'way':
+                node_map = maps['node']
+                for nd in element.findall('nd'):
+                    ref = nd.get('ref')
+                    if ref in node_map:
+                        nd.set('ref', node_map[ref])
+
+        def remap_members(relation: ET.Element) -> None:
+            for member in relation.findall('member'):
                 ref = member.get('ref')
-                m_type = member.get('type')
-                if m_type == 'node' and ref in node_map:
-                    member.set('ref', node_map[ref])
-                elif m_type == 'way' and ref in way_map:
-                    member.set('ref', way_map[ref])
-                elif m_type == 'relation' and ref in rel_map:
-                    member.set('ref', rel_map[ref])
-
-        tree.write(osm_xml_path, encoding='utf-8', xml_declaration=True)
+                mapping = maps.get(member.get('type'))
+                if mapping is not None and ref in mapping:
+                    member.set('ref', mapping[ref])
+
+        fd, temp_path = tempfile.mkstemp(dir=osm_xml_path.parent, suffix='.osm.xml')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as out:
+                out.write("<?xml version='1.0' encoding='utf-8'?>\n")
+
+                def flush(element: ET.Element) -> None:
+                    # Only called once the next sibling starts or the root
+                    # ends, when the element's tail has been read in full.
+                    if held or element.tag == 'relation':
+                        held.append(element)
+                    else:
+                        out.write(ET.tostring(element, encoding='unicode'))
+                    root.remove(element)
+
+                root = None
+                pending = None
+                opened = False
+                depth = 0
+                for event, element in ET.iterparse(osm_xml_path, events=('start', 'end')):
+                    if event == 'start':
+                        depth += 1
+                        if root is None:
+                            root = element
+                        elif depth == 2:
+                            if pending is not None:
+                                flush(pending)
+                                pending = None
+                            if not opened:
+                                shell = ET.Element(root.tag, root.attrib)
+                                shell.text = root.text
+                                start = ET.tostring(shell, encoding='unicode', short_empty_elements=False)
+                                out.write(start[:-len(f'</{root.tag}>')])
+                                opened = True
+                        continue
+                    depth -= 1
+                    if depth == 1:
+                        if element.tag in counters:
+                            entities += 1
+                        rewrite(element)
+                        pending = element
+                    elif depth == 0 and pending is not None:
+                        flush(pending)
+                        pending = None
+
+                for element in held:
+                    if element.tag == 'relation':
+                        remap_members(element)
+                    out.write(ET.tostring(element, encoding='unicode'))
+                if opened:
+                    out.write(f'</{root.tag}>')
+                else:
+                    out.write(ET.tostring(root, encoding='unicode'))
+            os.replace(temp_path, osm_xml_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return entities
+
+
+def _convert_in_process(zip_file: Union[str, bytes], workdir: str, prefix: str, config: FormatterConfig) -> Response:
+    """Run one `OSW2OSM` conversion of a process executor in its worker."""
+    return OSW2OSM(zip_file_path=zip_file, workdir=workdir, prefix=prefix, config=config).convert()
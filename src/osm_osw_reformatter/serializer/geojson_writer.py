@@ -0,0 +1,82 @@
+import json
+import os
+from typing import Optional
+
+from .json_backend import StdlibJSON
+
+
+class FeatureCollectionWriter:
+    """Writes a GeoJSON FeatureCollection to `path` one feature at a time.
+
+    Features are serialized as they arrive, so only one is held in memory.
+    The file is created with the first feature; a collection that never gets
+    one leaves no file behind. With `indent=None` the output is compact,
+    otherwise it is laid out exactly as `json.dump(collection, indent=indent)`.
+    Features are encoded with `json_backend`, the stdlib by default.
+    """
+
+    def __init__(self, path, header: dict, indent: Optional[int] = 2, json_backend: StdlibJSON = None):
+        self.path = path
+        self.header = header
+        self.indent = indent
+        self.json_backend = json_backend or StdlibJSON()
+        self.count = 0
+        self._file = None
+
+        if indent is None:
+            self._feature_separator = ','
+            self._end = ']}'
+        else:
+            self._feature_pad = ' ' * (2 * indent)
+            self._feature_separator = ',\n'
+            self._end = '\n' + ' ' * indent + ']\n}'
+
+    def _start(self) -> str:
+        if self.indent is None:
+            members = [
+                json.dumps(key) + ':' + json.dumps(value, separators=(',', ':'))
+                for key, value in self.header.items()
+            ]
+            return '{' + ''.join(member + ',' for member in members) + '"features":['
+
+        pad = '\n' + ' ' * self.indent
+        members = [
+            json.dumps(key) + ': ' + json.dumps(value, indent=self.indent).replace('\n', pad)
+            for key, value in self.header.items()
+        ]
+        return '{' + ''.join(pad + member + ',' for member in members) + pad + '"features": [\n'
+
+    def write(self, feature: dict) -> None:
+        text = self.json_backend.dumps(feature, indent=self.indent)
+        if self.indent is not None:
+            text = self._feature_pad + text.replace('\n', '\n' + self._feature_pad)
+        if self._file is None:
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self._file.write(self._start())
+        else:
+            text = self._feature_separator + text
+        self._file.write(text)
+        self.count += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.write(self._end)
+            self._file.close()
+            self._file = None
+
+    def discard(self) -> None:
+        """Close the file unfinished and remove it."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+        return False
@@ -1,7 +1,9 @@
 from copy import deepcopy
+from itertools import chain
 from typing import Iterable, Optional
 
-from shapely.geometry import LineString, Polygon
+import numpy as np
+import shapely
 
 
 def _coord_key(coord):
@@ -55,12 +57,12 @@ def first_coordinate(coordinates):
     return None
 
 
-def collapsed_feature_to_point(feature: dict) -> Optional[dict]:
+def collapsed_feature_to_point(feature: dict, in_place: bool = False) -> Optional[dict]:
     coord = first_coordinate(feature.get("geometry", {}).get("coordinates"))
     if coord is None:
         return None
 
-    cleaned = deepcopy(feature)
+    cleaned = feature if in_place else deepcopy(feature)
     cleaned["geometry"] = {
         "type": "Point",
         "coordinates": list(coord),
@@ -68,44 +70,161 @@ def collapsed_feature_to_point(feature: dict) -> Optional[dict]:
     return cleaned
 
 
+def _run_indices(offsets: list, total: int):
+    counts = np.diff(np.append(offsets, total))
+    return np.repeat(np.arange(len(offsets)), counts)
+
+
+def linestrings_from_offsets(coords: list, offsets: list):
+    """Build one LineString per run of `coords` in a single shapely call.
+
+    `coords` holds the coordinates of every line end to end and `offsets` the
+    index at which each line starts.
+    """
+    if not offsets:
+        return []
+    return shapely.linestrings(
+        np.asarray(coords, dtype=float),
+        indices=_run_indices(offsets, len(coords)),
+    )
+
+
+def polygons_from_rings(polygons: list):
+    """Build one Polygon per list of closed rings, exterior first, in bulk."""
+    coords = []
+    ring_offsets = []
+    ring_polygons = []
+    for index, rings in enumerate(polygons):
+        for ring in rings:
+            ring_offsets.append(len(coords))
+            ring_polygons.append(index)
+            coords.extend(ring)
+    if not ring_offsets:
+        return []
+    rings = shapely.linearrings(
+        np.asarray(coords, dtype=float),
+        indices=_run_indices(ring_offsets, len(coords)),
+    )
+    return shapely.polygons(rings, indices=ring_polygons)
+
+
+def _planar(rings: list) -> list:
+    # Areas are planar, so only x and y take part in the checks.
+    return [[[coord[0], coord[1]] for coord in ring] for ring in rings]
+
+
+def _degenerate_lines(lines: list) -> list:
+    """Whether each line, as a list of coordinates, is empty or has no length."""
+    coords = []
+    offsets = []
+    for line in lines:
+        offsets.append(len(coords))
+        coords.extend([coord[0], coord[1]] for coord in line)
+    geometries = linestrings_from_offsets(coords, offsets)
+    return (shapely.is_empty(geometries) | (shapely.length(geometries) == 0)).tolist()
+
+
+def _degenerate_polygons(polygons: list) -> list:
+    """Whether each polygon, as a list of closed rings, is empty or has no area."""
+    geometries = polygons_from_rings([_planar(rings) for rings in polygons])
+    return (shapely.is_empty(geometries) | (shapely.area(geometries) == 0)).tolist()
+
+
+def geodesic_line_lengths(geod, coords: list, offsets: list) -> list:
+    """Geodesic length of each line laid out as for `linestrings_from_offsets`.
+
+    Every segment is measured in one `Geod.inv` call. Each line's segments are
+    then summed in order, so the lengths match `Geod.geometry_length` exactly.
+    """
+    if not offsets:
+        return []
+    xy = np.asarray(coords, dtype=float)
+    starts = np.asarray(offsets)
+    counts = np.append(starts[1:], len(xy)) - starts - 1
+    # Segment i joins point i to i + 1; those bridging two lines go unused.
+    _, _, distances = geod.inv(xy[:-1, 0], xy[:-1, 1], xy[1:, 0], xy[1:, 1])
+
+    # Add the j-th segment of every line that has one, longest lines first,
+    # so each sum runs in segment order as geometry_length's does.
+    order = np.argsort(-counts, kind='stable')
+    starts = starts[order]
+    descending = -counts[order]
+    totals = np.zeros(len(order))
+    for j in range(-descending[0]):
+        active = np.searchsorted(descending, -j)
+        totals[:active] += distances[starts[:active] + j]
+    lengths = np.empty_like(totals)
+    lengths[order] = totals
+    return lengths.tolist()
+
+
+def clean_linestrings_coords(
+    lines: Iterable,
+    allow_zero_length_lines: bool = False,
+) -> list:
+    """`clean_linestring_coords` for many lines, measuring them in one pass."""
+    results = []
+    candidates = []
+    for coords in lines:
+        original = list(coords)
+        cleaned = remove_consecutive_duplicate_coords(original)
+        if len(cleaned) < 2:
+            if allow_zero_length_lines and len(original) >= 2:
+                results.append([list(coord) for coord in original])
+            else:
+                results.append(None)
+            continue
+        candidates.append(len(results))
+        results.append(cleaned)
+
+    degenerate = _degenerate_lines([results[i] for i in candidates])
+    for i, zero_length in zip(candidates, degenerate):
+        if zero_length or distinct_coordinate_count(results[i]) < 2:
+            if not allow_zero_length_lines:
+                results[i] = None
+    return results
+
+
 def clean_linestring_coords(
     coords: Iterable,
     allow_zero_length_lines: bool = False,
 ) -> Optional[list]:
-    original = list(coords)
-    cleaned = remove_consecutive_duplicate_coords(original)
-    if len(cleaned) < 2:
-        if allow_zero_length_lines and len(original) >= 2:
-            return [list(coord) for coord in original]
-        return None
+    return clean_linestrings_coords(
+        [coords],
+        allow_zero_length_lines=allow_zero_length_lines,
+    )[0]
 
-    line = LineString(cleaned)
-    if line.is_empty or line.length == 0:
-        if allow_zero_length_lines:
-            return cleaned if len(cleaned) >= 2 else [list(coord) for coord in original]
-        return None
-    if distinct_coordinate_count(cleaned) < 2:
-        if allow_zero_length_lines:
-            return cleaned
-        return None
 
-    return cleaned
+def clean_linestring_geometries(
+    lines: Iterable,
+    allow_zero_length_lines: bool = False,
+) -> list:
+    """A LineString, or None, per line, all built in one shapely call."""
+    cleaned = clean_linestrings_coords(
+        lines,
+        allow_zero_length_lines=allow_zero_length_lines,
+    )
+    kept = [coords for coords in cleaned if coords is not None]
+    offsets = []
+    flat = []
+    for coords in kept:
+        offsets.append(len(flat))
+        flat.extend(coords)
+    geometries = iter(linestrings_from_offsets(flat, offsets))
+    return [None if coords is None else next(geometries) for coords in cleaned]
 
 
 def clean_linestring_geometry(
     coords: Iterable,
     allow_zero_length_lines: bool = False,
 ):
-    cleaned_coords = clean_linestring_coords(
-        coords,
+    return clean_linestring_geometries(
+        [coords],
         allow_zero_length_lines=allow_zero_length_lines,
-    )
-    if cleaned_coords is None:
-        return None
-    return LineString(cleaned_coords)
+    )[0]
 
 
-def clean_polygon_ring(coords: Iterable) -> Optional[list]:
+def _polygon_ring_candidate(coords: Iterable) -> Optional[list]:
     original = list(coords)
     cleaned = remove_consecutive_duplicate_coords(original)
     if len(cleaned) > 1 and _coord_key(cleaned[0]) == _coord_key(cleaned[-1]):
@@ -117,61 +236,166 @@ def clean_polygon_ring(coords: Iterable) -> Optional[list]:
     if len(cleaned) < 3 or distinct_coordinate_count(cleaned) < 3:
         return None
 
-    ring = cleaned + [closing_coord if closing_coord is not None else cleaned[0]]
-    if Polygon(ring).is_empty or Polygon(ring).area == 0:
-        return None
+    return cleaned + [closing_coord if closing_coord is not None else cleaned[0]]
+
 
+def clean_polygon_ring(coords: Iterable) -> Optional[list]:
+    ring = _polygon_ring_candidate(coords)
+    if ring is None or _degenerate_polygons([[ring]])[0]:
+        return None
     return ring
 
 
-def clean_polygon_coords(coords: Iterable) -> Optional[list]:
-    rings = list(coords)
-    if not rings:
-        return None
+def clean_polygons_coords(polygons: Iterable) -> list:
+    """`clean_polygon_coords` for many polygons, checking their areas in bulk."""
+    results = []
+    for rings in polygons:
+        rings = list(rings)
+        if not rings:
+            results.append(None)
+            continue
+        exterior = _polygon_ring_candidate(rings[0])
+        if exterior is None:
+            results.append(None)
+            continue
+        results.append([exterior] + [_polygon_ring_candidate(ring) for ring in rings[1:]])
+
+    # Drop the rings enclosing no area, then the polygons whose exterior was
+    # one. Only a polygon with holes can still lose its area after that.
+    rings = [ring for polygon in results if polygon for ring in polygon if ring is not None]
+    degenerate = iter(_degenerate_polygons([[ring] for ring in rings]))
+    with_holes = []
+    for i, polygon in enumerate(results):
+        if polygon is None:
+            continue
+        kept = [ring is not None and not next(degenerate) for ring in polygon]
+        if not kept[0]:
+            results[i] = None
+            continue
+        results[i] = [ring for ring, keep in zip(polygon, kept) if keep]
+        if len(results[i]) > 1:
+            with_holes.append(i)
 
-    exterior = clean_polygon_ring(rings[0])
-    if exterior is None:
-        return None
+    degenerate = _degenerate_polygons([results[i] for i in with_holes])
+    for i, no_area in zip(with_holes, degenerate):
+        if no_area:
+            results[i] = None
+    return results
 
-    interiors = []
-    for ring in rings[1:]:
-        cleaned_ring = clean_polygon_ring(ring)
-        if cleaned_ring is not None:
-            interiors.append(cleaned_ring)
 
-    polygon = Polygon(exterior, interiors)
-    if polygon.is_empty or polygon.area == 0:
-        return None
+def clean_polygon_coords(coords: Iterable) -> Optional[list]:
+    return clean_polygons_coords([coords])[0]
+
 
-    return [exterior] + interiors
+def clean_polygon_geometries(polygons: Iterable) -> list:
+    """A Polygon, or None, per list of rings, all built in one shapely call."""
+    cleaned = clean_polygons_coords(polygons)
+    geometries = iter(polygons_from_rings([rings for rings in cleaned if rings is not None]))
+    return [None if rings is None else next(geometries) for rings in cleaned]
 
 
 def clean_polygon_geometry(
     exterior_coords: Iterable,
     interior_rings: Iterable = (),
 ):
-    cleaned_coords = clean_polygon_coords([exterior_coords] + list(interior_rings))
-    if cleaned_coords is None:
-        return None
-    return Polygon(cleaned_coords[0], cleaned_coords[1:])
+    return clean_polygon_geometries([[exterior_coords] + list(interior_rings)])[0]
+
+
+def clean_referenced_polygon_geometries(polygons: Iterable) -> list:
+    """`clean_referenced_polygon_geometry` for many `(ref_coords, interior_rings)`."""
+    candidates = []
+    for ref_coords, interior_rings in polygons:
+        cleaned_ref_coords = remove_consecutive_duplicate_ref_coords(list(ref_coords))
+        coords = [coord for _, coord in cleaned_ref_coords]
+        if len(coords) > 1 and coordinates_equal(coords[0], coords[-1]):
+            coords_for_validation = coords[:-1]
+        else:
+            coords_for_validation = coords
+        if distinct_coordinate_count(coords_for_validation) < 3:
+            candidates.append(None)
+        else:
+            candidates.append((cleaned_ref_coords, [coords] + list(interior_rings)))
+
+    geometries = iter(clean_polygon_geometries(
+        [rings for _, rings in filter(None, candidates)]
+    ))
+    results = []
+    for candidate in candidates:
+        geometry = None if candidate is None else next(geometries)
+        if geometry is None:
+            results.append((None, []))
+        else:
+            results.append((geometry, [ref for ref, _ in candidate[0]]))
+    return results
 
 
 def clean_referenced_polygon_geometry(ref_coords: Iterable, interior_rings: Iterable = ()):
-    original_ref_coords = list(ref_coords)
-    cleaned_ref_coords = remove_consecutive_duplicate_ref_coords(original_ref_coords)
-    coords = [coord for _, coord in cleaned_ref_coords]
-    if len(coords) > 1 and coordinates_equal(coords[0], coords[-1]):
-        coords_for_validation = coords[:-1]
-    else:
-        coords_for_validation = coords
-    if distinct_coordinate_count(coords_for_validation) < 3:
-        return None, []
+    return clean_referenced_polygon_geometries([(ref_coords, interior_rings)])[0]
 
-    geometry = clean_polygon_geometry(coords, interior_rings)
-    if geometry is None:
-        return None, []
 
-    return geometry, [ref for ref, _ in cleaned_ref_coords]
+def clean_feature_geometries(
+    features: Iterable,
+    collapsed_to_point: bool = False,
+    allow_zero_length_lines: bool = False,
+    in_place: bool = False,
+) -> list:
+    """`clean_feature_geometry` for many features, checking every line and
+    polygon part of them together.
+
+    With `in_place` the features themselves are cleaned and returned instead of
+    copies; a feature that is dropped is left as it was.
+    """
+    features = list(features)
+    cleaned = features if in_place else [deepcopy(feature) for feature in features]
+    whole = {}
+    parts = {}
+    lines, line_owners = [], []
+    polygons, polygon_owners = [], []
+    for index, feature in enumerate(cleaned):
+        geometry = feature.get("geometry")
+        if not geometry:
+            continue
+
+        geometry_type = geometry.get("type")
+        coordinates = geometry.get("coordinates") or []
+        if geometry_type == "LineString":
+            lines.append(coordinates)
+            line_owners.append((index, whole))
+        elif geometry_type == "Polygon":
+            polygons.append(coordinates)
+            polygon_owners.append((index, whole))
+        elif geometry_type == "MultiLineString":
+            parts[index] = []
+            lines.extend(coordinates)
+            line_owners.extend((index, parts) for _ in coordinates)
+        elif geometry_type == "MultiPolygon":
+            parts[index] = []
+            polygons.extend(coordinates)
+            polygon_owners.extend((index, parts) for _ in coordinates)
+
+    cleaned_lines = clean_linestrings_coords(
+        lines,
+        allow_zero_length_lines=allow_zero_length_lines,
+    )
+    cleaned_polygons = clean_polygons_coords(polygons)
+    for (index, owner), coords in chain(
+        zip(line_owners, cleaned_lines),
+        zip(polygon_owners, cleaned_polygons),
+    ):
+        if owner is whole:
+            whole[index] = coords
+        elif coords is not None:
+            parts[index].append(coords)
+
+    for index, coords in chain(whole.items(), parts.items()):
+        if coords:
+            cleaned[index]["geometry"]["coordinates"] = coords
+        else:
+            cleaned[index] = (
+                collapsed_feature_to_point(features[index], in_place=in_place)
+                if collapsed_to_point else None
+            )
+    return cleaned
 
 
 def clean_feature_geometry(
@@ -179,54 +403,8 @@ def clean_feature_geometry(
     collapsed_to_point: bool = False,
     allow_zero_length_lines: bool = False,
 ) -> Optional[dict]:
-    cleaned = deepcopy(feature)
-    geometry = cleaned.get("geometry")
-    if not geometry:
-        return cleaned
-
-    geometry_type = geometry.get("type")
-    coordinates = geometry.get("coordinates")
-
-    if geometry_type == "LineString":
-        cleaned_coords = clean_linestring_coords(
-            coordinates or [],
-            allow_zero_length_lines=allow_zero_length_lines,
-        )
-        if cleaned_coords is None:
-            return collapsed_feature_to_point(feature) if collapsed_to_point else None
-        cleaned["geometry"]["coordinates"] = cleaned_coords
-        return cleaned
-
-    if geometry_type == "Polygon":
-        cleaned_coords = clean_polygon_coords(coordinates or [])
-        if cleaned_coords is None:
-            return collapsed_feature_to_point(feature) if collapsed_to_point else None
-        cleaned["geometry"]["coordinates"] = cleaned_coords
-        return cleaned
-
-    if geometry_type == "MultiLineString":
-        cleaned_parts = []
-        for part in coordinates or []:
-            cleaned_part = clean_linestring_coords(
-                part,
-                allow_zero_length_lines=allow_zero_length_lines,
-            )
-            if cleaned_part is not None:
-                cleaned_parts.append(cleaned_part)
-        if not cleaned_parts:
-            return collapsed_feature_to_point(feature) if collapsed_to_point else None
-        cleaned["geometry"]["coordinates"] = cleaned_parts
-        return cleaned
-
-    if geometry_type == "MultiPolygon":
-        cleaned_parts = []
-        for part in coordinates or []:
-            cleaned_part = clean_polygon_coords(part)
-            if cleaned_part is not None:
-                cleaned_parts.append(cleaned_part)
-        if not cleaned_parts:
-            return collapsed_feature_to_point(feature) if collapsed_to_point else None
-        cleaned["geometry"]["coordinates"] = cleaned_parts
-        return cleaned
-
-    return cleaned
+    return clean_feature_geometries(
+        [feature],
+        collapsed_to_point=collapsed_to_point,
+        allow_zero_length_lines=allow_zero_length_lines,
+    )[0]
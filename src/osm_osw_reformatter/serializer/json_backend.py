@@ -0,0 +1,112 @@
+"""JSON encoding and decoding for the GeoJSON the formatter reads and writes.
+
+`get_json_backend` returns the library chosen by `FormatterConfig.json_backend`.
+`orjson` and `msgspec` are optional; when the chosen one is not installed the
+stdlib `json` module is used instead. All backends write the same layout --
+compact, or indented as `json.dump(indent=...)` does -- but the faster ones
+write non-ASCII characters as UTF-8 rather than escapes, spell float exponents
+without padding (`1e-7` instead of `1e-07`) and write NaN and infinite floats
+as `null`, where the stdlib writes the non-standard `NaN` and `Infinity`.
+
+The faster libraries also reject those literals on input. A document they
+cannot decode is handed to the stdlib, so every backend reads what the stdlib
+reads, and a document none can read raises `json.JSONDecodeError`.
+"""
+import json
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class StdlibJSON:
+    name = "json"
+    available = True
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def load(self, f):
+        return self.loads(f.read())
+
+    def dumps(self, obj, indent: Optional[int] = None) -> str:
+        if indent is None:
+            return json.dumps(obj, separators=(",", ":"))
+        return json.dumps(obj, indent=indent)
+
+    def dump(self, obj, f, indent: Optional[int] = None) -> None:
+        if indent is None:
+            json.dump(obj, f, separators=(",", ":"))
+        else:
+            json.dump(obj, f, indent=indent)
+
+
+class OrjsonJSON(StdlibJSON):
+    name = "orjson"
+    available = orjson is not None
+
+    def loads(self, data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return super().loads(data)
+
+    def dumps(self, obj, indent: Optional[int] = None) -> str:
+        if indent not in (None, 2):
+            # orjson only indents by two spaces.
+            return super().dumps(obj, indent)
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option).decode()
+
+    def dump(self, obj, f, indent: Optional[int] = None) -> None:
+        f.write(self.dumps(obj, indent))
+
+
+class MsgspecJSON(StdlibJSON):
+    name = "msgspec"
+    available = msgspec is not None
+
+    def __init__(self):
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def loads(self, data):
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError:
+            return super().loads(data)
+
+    def dumps(self, obj, indent: Optional[int] = None) -> str:
+        encoded = self._encoder.encode(obj)
+        if indent is not None:
+            encoded = msgspec.json.format(encoded, indent=indent)
+        return encoded.decode()
+
+    def dump(self, obj, f, indent: Optional[int] = None) -> None:
+        f.write(self.dumps(obj, indent))
+
+
+_BACKEND_CLASSES = {
+    "json": StdlibJSON,
+    "orjson": OrjsonJSON,
+    "msgspec": MsgspecJSON,
+}
+_backends = {}
+
+
+def get_json_backend(name: str = "json") -> StdlibJSON:
+    """The backend named `name`, or the stdlib one if its library is missing."""
+    backend = _backends.get(name)
+    if backend is None:
+        backend_class = _BACKEND_CLASSES[name]
+        backend = _backends[name] = backend_class() if backend_class.available else StdlibJSON()
+    return backend
@@ -1,18 +1,54 @@
+from contextlib import ExitStack
 from typing import List, Optional
-import json
 import pyproj
 import osmium
 import networkx as nx
-from shapely.geometry import Point, mapping, shape
+import shapely
+from shapely.geometry import mapping, shape
 from ...config import FormatterConfig
+from ..geojson_writer import FeatureCollectionWriter
+from ..json_backend import get_json_backend
+from .slim_graph import SlimMultiDiGraph
 from ..geometry_cleanup import (
-    clean_linestring_geometry,
-    clean_polygon_geometry,
-    clean_referenced_polygon_geometry,
+    clean_linestrings_coords,
+    clean_polygon_geometries,
+    clean_referenced_polygon_geometries,
     coordinates_equal,
+    geodesic_line_lengths,
+    linestrings_from_offsets,
 )
 from ..osw.osw_normalizer import OSW_SCHEMA_ID, OSWPointNormalizer, OSWWayNormalizer, OSWNodeNormalizer, OSWLineNormalizer, OSWZoneNormalizer, OSWPolygonNormalizer
 
+# The output file each graph node is written to by `OSMGraph.to_geojson`.
+_NODE_FEATURE = 0
+_POINT_FEATURE = 1
+_LINE_FEATURE = 2
+_ZONE_FEATURE = 3
+_POLYGON_FEATURE = 4
+
+GRAPH_CLASSES = {
+    "networkx": nx.MultiDiGraph,
+    "slim": SlimMultiDiGraph,
+}
+
+
+def graph_class(config: FormatterConfig = None):
+    """The graph type the configured `graph_backend` stores the network in."""
+    return GRAPH_CLASSES[(config or FormatterConfig()).graph_backend]
+
+
+def _lines_with_lengths(geod: pyproj.Geod, lines: list):
+    """The LineString and geodesic length of each list of coordinates."""
+    coords = []
+    offsets = []
+    for line in lines:
+        offsets.append(len(coords))
+        coords.extend(line)
+    return (
+        linestrings_from_offsets(coords, offsets),
+        geodesic_line_lengths(geod, coords, offsets),
+    )
+
 
 def _way_tags_as_custom_point(tags: dict) -> dict:
     point_tags = {}
@@ -38,8 +74,8 @@ class OSMWayParser(osmium.SimpleHandler):
         config: FormatterConfig = None,
     ) -> None:
         osmium.SimpleHandler.__init__(self)
-        self.G = nx.MultiDiGraph()
         self.config = config or FormatterConfig()
+        self.G = graph_class(self.config)()
         if way_filter is None:
             self.way_filter = lambda w: True
         else:
@@ -173,7 +209,7 @@ class OSMPointParser(osmium.SimpleHandler):
         normalizer = OSWPointNormalizer(tags)
         normalized = normalizer.normalize()
 
-        node_id = n.id if normalizer.is_custom() else "p" + str(n.id)
+        node_id = n.id if normalizer.kind() == "custom" else "p" + str(n.id)
         self.G.add_node(node_id, lon=n.location.lon, lat=n.location.lat, **normalized)
 
 
@@ -205,9 +241,7 @@ class OSMLineParser(osmium.SimpleHandler):
         normalizer = OSWLineNormalizer(tags)
 
         is_closed = len(w.nodes) > 2 and w.nodes[0].ref == w.nodes[-1].ref
-        if is_closed and normalizer.is_custom() and not (
-            normalizer.is_fence() or normalizer.is_tree_row()
-        ):
+        if is_closed and normalizer.kind() == "custom":
             return
 
         d2 = {**d, **normalizer.normalize()}
@@ -324,15 +358,6 @@ class OSMPolygonParser(osmium.SimpleHandler):
 
         d = {}
         normalizer = OSWPolygonNormalizer(tags)
-        line_normalizer = OSWLineNormalizer(tags)
-        zone_normalizer = OSWZoneNormalizer(tags)
-
-        if normalizer.is_custom() and (
-            line_normalizer.is_fence()
-            or line_normalizer.is_tree_row()
-            or zone_normalizer.is_pedestrian()
-        ):
-            return
 
         d2 = {**d, **normalizer.normalize()}
 
@@ -396,9 +421,107 @@ class OSMTaggedNodeParser(osmium.SimpleHandler):
             normalizer = OSWPointNormalizer(tags)
             normalized = normalizer.normalize()
             if normalized:
-                node_id = n.id if normalizer.is_custom() else "p" + str(n.id)
+                node_id = n.id if normalizer.kind() == "custom" else "p" + str(n.id)
                 self.G.add_node(node_id, lon=n.location.lon, lat=n.location.lat, **normalized)
 
+
+class _DeferredNode:
+    """The id and tags of a node, kept past the osmium callback that read it."""
+
+    __slots__ = ("id", "tags")
+
+    def __init__(self, node_id, tags) -> None:
+        self.id = node_id
+        self.tags = tags
+
+
+def _merge_nodes(G: nx.MultiDiGraph, H: nx.MultiDiGraph) -> None:
+    # Adding in H's order updates nodes G already has and appends the rest,
+    # exactly as the parser that filled H would have done had it written to G.
+    for n, d in H.nodes(data=True):
+        G.add_node(n, **d)
+
+
+class OSMReader(osmium.SimpleHandler):
+    def __init__(
+        self,
+        way_filter: Optional[callable] = None,
+        node_filter: Optional[callable] = None,
+        point_filter: Optional[callable] = None,
+        line_filter: Optional[callable] = None,
+        zone_filter: Optional[callable] = None,
+        polygon_filter: Optional[callable] = None,
+        progressbar: Optional[callable] = None,
+        config: FormatterConfig = None,
+        node_check=None,
+    ) -> None:
+        """Run every parser over a single read of an OSM file.
+
+        osmium delivers nodes before ways, while the parsers were written to
+        run one after another, each seeing what the earlier ones added. Each
+        parser therefore fills a graph of its own, and `graph()` folds them
+        together in the original order, so the result is the same as applying
+        the parsers one file pass at a time.
+
+        `node_check`, if given, is a handler whose `node` also sees every node
+        read, such as the input precision check.
+
+        """
+        osmium.SimpleHandler.__init__(self)
+        self.progressbar = progressbar
+        self.node_check = node_check
+        self.way_parser = OSMWayParser(way_filter, progressbar=progressbar, config=config)
+        # Node attributes only land on nodes a way has already added, so the
+        # nodes are held back until the ways have been read.
+        Graph = graph_class(config)
+        self.node_parser = OSMNodeParser(Graph(), node_filter)
+        self.point_parser = OSMPointParser(Graph(), point_filter, progressbar=progressbar)
+        self.line_parser = OSMLineParser(Graph(), line_filter, progressbar=progressbar)
+        self.tagged_node_parser = OSMTaggedNodeParser(Graph(), node_filter, point_filter)
+        self.zone_parser = OSMZoneParser(Graph(), zone_filter, progressbar=progressbar)
+        self.polygon_parser = OSMPolygonParser(Graph(), polygon_filter, progressbar=progressbar)
+        self.deferred_nodes = []
+
+    def node(self, n) -> None:
+        if self.progressbar:
+            self.progressbar.update(1)
+        if self.node_check is not None:
+            self.node_check.node(n)
+        if self.node_parser.node_filter(n.tags):
+            self.deferred_nodes.append(_DeferredNode(n.id, dict(n.tags)))
+
+        self.point_parser.node(n)
+        self.tagged_node_parser.node(n)
+
+    def way(self, w) -> None:
+        self.way_parser.way(w)
+        self.line_parser.way(w)
+
+    def area(self, a) -> None:
+        self.zone_parser.area(a)
+        self.polygon_parser.area(a)
+
+    def graph(self) -> nx.MultiDiGraph:
+        G = self.way_parser.G
+
+        self.node_parser.G = G
+        for n in self.deferred_nodes:
+            self.node_parser.node(n)
+        self.deferred_nodes = []
+
+        for parser in (
+            self.point_parser,
+            self.line_parser,
+            self.tagged_node_parser,
+            self.zone_parser,
+            self.polygon_parser,
+        ):
+            _merge_nodes(G, parser.G)
+            parser.G = None
+
+        return G
+
+
 class OSMGraph:
     def __init__(self, G: nx.MultiDiGraph = None) -> None:
         if G is not None:
@@ -417,48 +540,26 @@ class OSMGraph:
       self, osm_file, way_filter: Optional[callable] = None, node_filter: Optional[callable] = None,
       point_filter: Optional[callable] = None, line_filter: Optional[callable] = None, zone_filter: Optional[callable] = None, 
       polygon_filter: Optional[callable] = None, progressbar: Optional[callable] = None,
-      config: FormatterConfig = None
+      config: FormatterConfig = None, node_check=None
     ):
-        way_parser = OSMWayParser(
+        config = config or FormatterConfig()
+        # One read of the file feeds every parser, so the node-location index
+        # is built once and shared by ways, lines and areas. osmium adds a
+        # relations-only pre-pass of its own to assemble multipolygon areas.
+        reader = OSMReader(
             way_filter,
+            node_filter,
+            point_filter,
+            line_filter,
+            zone_filter,
+            polygon_filter,
             progressbar=progressbar,
             config=config,
+            node_check=node_check,
         )
-        way_parser.apply_file(osm_file, locations=True)
-        G = way_parser.G
-        del way_parser
-
-        node_parser = OSMNodeParser(G, node_filter, progressbar=progressbar)
-        node_parser.apply_file(osm_file)
-        G = node_parser.G
-        del node_parser
-
-        point_parser = OSMPointParser(G, point_filter, progressbar=progressbar)
-        point_parser.apply_file(osm_file)
-        G = point_parser.G
-        del point_parser
-
-        line_parser = OSMLineParser(G, line_filter, progressbar=progressbar)
-        line_parser.apply_file(osm_file, locations=True)
-        G = line_parser.G
-        del line_parser
-
-        # --- PATCH START: Add all loose/tagged nodes ---
-        tagged_node_parser = OSMTaggedNodeParser(G, node_filter, point_filter)
-        tagged_node_parser.apply_file(osm_file)
-        G = tagged_node_parser.G
-        del tagged_node_parser
-        # --- PATCH END ---
-
-        zone_parser = OSMZoneParser(G, zone_filter, progressbar=progressbar)
-        zone_parser.apply_file(osm_file)
-        G = zone_parser.G
-        del zone_parser
-
-        polygon_parser = OSMPolygonParser(G, polygon_filter, progressbar=progressbar)
-        polygon_parser.apply_file(osm_file)
-        G = polygon_parser.G
-        del polygon_parser
+        reader.apply_file(osm_file, locations=True, idx=config.location_index)
+        G = reader.graph()
+        del reader
 
         return OSMGraph(G)
 
@@ -466,18 +567,42 @@ class OSMGraph:
         '''Simplifies graph by merging way segments of degree 2 - i.e.
         continuations.
 
+        OSMWayParser numbers each way's segments in order as it adds them, so
+        a way's removable nodes are keyed by segment and every run of them is
+        found in one linear sweep along the way, without sorting. The merged
+        edge of each run is built first; the graph is then changed once, all
+        replaced edges removed and all merged edges added in one batch.
+
         '''
+        G = self.G
+        pred = G._pred
+        succ = G._succ
+
         # Do not simplify edges that share a node with a zone
         zone_nodes = set()
-        for node, d in self.G.nodes(data=True):
+        for node, d in G._node.items():
             if OSWZoneNormalizer.osw_zone_filter(d):
                 zone_nodes.update(d["ndref"])
 
-        # Structure is way_id: (node, segment_number). This makes it easy to
-        # sort on-the-fly.
+        # Structure is way_id: {segment_number: (node_in, node, node_out)}.
         remove_nodes = {}
 
-        for node, d in self.G.nodes(data=True):
+        for node, d in G._node.items():
+            node_preds = pred[node]
+            node_succs = succ[node]
+            if len(node_preds) != 1 or len(node_succs) != 1:
+                # Only a node with one predecessor and one successor is an
+                # internal node whose location can merge into other edges.
+                continue
+
+            (node_in,) = node_preds
+            (node_out,) = node_succs
+            if node_in == node or node_out == node:
+                # A zero-length edge is a self-loop, so the node looks like a
+                # degree-2 continuation of its own way. Splicing it in would
+                # make it an internal node and delete both it and the edge.
+                continue
+
             if OSWNodeNormalizer.osw_node_filter(d):
                 # Skip if this is a node feature of interest, e.g. kerb ramp
                 continue
@@ -486,88 +611,70 @@ class OSMGraph:
                 # Do not simplify edges that share a node with a zone
                 continue
 
-            predecessors = list(self.G.predecessors(node))
-            successors = list(self.G.successors(node))
+            edge_in = node_preds[node_in][0]
+            edge_out = node_succs[node_out][0]
 
-            if node in predecessors or node in successors:
-                # A zero-length edge is a self-loop, so the node looks like a
-                # degree-2 continuation of its own way. Splicing it in would
-                # make it an internal node and delete both it and the edge.
+            # Only one exception: we shouldn't remove a node that's shared
+            # between two different ways: this is an important decision
+            # point for some paths.
+            if edge_in['osm_id'] != edge_out['osm_id']:
                 continue
 
-            if (len(predecessors) == 1) and (len(successors) == 1):
-                # Only one predecessor and one successor - ideal internal node
-                # to remove from the graph, merging its location data into other
-                # edges.
-                node_in = predecessors[0]
-                node_out = successors[0]
-                edge_in = self.G[node_in][node][0]
-                edge_out = self.G[node][node_out][0]
-
-                # Only one exception: we shouldn't remove a node that's shared
-                # between two different ways: this is an important decision
-                # point for some paths.
-                if edge_in['osm_id'] != edge_out['osm_id']:
-                    continue
-
-                node_data = (node_in, node, node_out, edge_in['segment'])
-
-                # Group by way
-                edge_id = edge_in['osm_id']
-                if edge_id in remove_nodes:
-                    remove_nodes[edge_id].append(node_data)
-                else:
-                    remove_nodes[edge_id] = [node_data]
+            way_nodes = remove_nodes.get(edge_in['osm_id'])
+            if way_nodes is None:
+                way_nodes = remove_nodes[edge_in['osm_id']] = {}
+            way_nodes[edge_in['segment']] = (node_in, node, node_out)
 
         # NOTE: an otherwise unconnected circular path would be removed, as all
         # nodes are degree 2 and on the same way. This path is pointless for a
         # network, but is something to keep in mind for any downstream
         # analysis.
+        removed_edges = []
+        merged_edges = []
         for way_id, node_data in remove_nodes.items():
-            # Sort by segment number
-            sorted_node_data = list(sorted(node_data, key=lambda x: x[3]))
-
-            # First node matches last node_out?
-            is_circular = sorted_node_data[0][1] == sorted_node_data[-1][2]
-
-            # Split into lists of neighboring nodes
+            # Split into runs of neighboring nodes: each run starts at a
+            # segment whose predecessor is not removable and follows the
+            # segment numbers from there.
             neighbors_list = []
+            for segment in node_data:
+                if segment - 1 in node_data:
+                    continue
+                neighbors = []
+                while segment in node_data:
+                    neighbors.append(node_data[segment])
+                    segment += 1
+                neighbors_list.append(neighbors)
 
-            neighbors = [sorted_node_data.pop(0)]
-            for node_in, node, node_out, segment_n in sorted_node_data:
-                if (segment_n - neighbors[-1][3]) != 1:
-                    # Not neighbors!
-                    neighbors_list.append(neighbors)
-                    neighbors = [(node_in, node, node_out, segment_n)]
-                else:
-                    # Neighbors!
-                    neighbors.append((node_in, node, node_out, segment_n))
-            neighbors_list.append(neighbors)
+            # First node matches last node_out?
+            first = node_data[min(node_data)]
+            last = node_data[max(node_data)]
+            is_circular = first[1] == last[2]
 
             # Detect neighbors in circular ways which are not completely disjoint from other ways
             if is_circular and len(neighbors_list) > 1:
-                # Combine first and last neighbor lists
-                neighbors_list[-1].extend(neighbors_list.pop(0))
-            
-            # Remove internal nodes by group
+                # Combine the runs holding the first and last segments
+                first_run = next(run for run in neighbors_list if run[0] is first)
+                last_run = next(run for run in neighbors_list if run[-1] is last)
+                last_run.extend(first_run)
+                neighbors_list.remove(first_run)
+
+            # Replace each run with one edge carrying all of its node refs
             for neighbors in neighbors_list:
-                u, v, w, segment_n = neighbors[0]
-                # FIXME: this try/except is a hack to avert an uncommon and
+                u, v, _ = neighbors[0]
+                # FIXME: this KeyError guard is a hack to avert an uncommon and
                 # unexplored edge case. Come back and fix!
                 try:
-                    edge_data = self.G[u][v][0]
+                    edge_data = succ[u][v][0]
                 except KeyError:
                     continue
-                ndref = edge_data['ndref']
-                self.G.remove_edge(u, v)
-                for node_in, node, node_out, segment_n in neighbors:
-                    ndref.append(node_out)
-                    # Remove intervening edge
-                    try:
-                        self.G.remove_edge(node, node_out)
-                    except nx.exception.NetworkXError:
-                        pass
-                self.G.add_edges_from([(u, node_out, edge_data)])
+                edge_data['ndref'].extend(node_out for _, _, node_out in neighbors)
+                removed_edges.append((u, v))
+                removed_edges.extend((node, node_out) for _, node, node_out in neighbors)
+                merged_edges.append((u, neighbors[-1][2], edge_data))
+
+        # Edges already merged away by another run are skipped.
+        G.remove_edges_from(removed_edges)
+        G.add_edges_from(merged_edges)
 
     def construct_geometries(
         self,
@@ -579,26 +686,33 @@ class OSMGraph:
 
         '''
         config = config or FormatterConfig()
+        nodes = self.G._node
+        edges = list(self.G.edges(keys=True, data=True))
+        edge_coords = clean_linestrings_coords(
+            (
+                [(nodes[ref]['lon'], nodes[ref]['lat']) for ref in d['ndref']]
+                for _u, _v, _key, d in edges
+            ),
+            allow_zero_length_lines=config.allow_zero_length_lines,
+        )
+
         internal_nodes = []
         edges_to_remove = []
-        for u, v, key, d in list(self.G.edges(keys=True, data=True)):
-            coords = []
-            for ref in d['ndref']:
-                # FIXME: is this the best way to retrieve node attributes?
-                node_d = self.G._node[ref]
-                coords.append((node_d['lon'], node_d['lat']))
-
-            geometry = clean_linestring_geometry(
-                coords,
-                allow_zero_length_lines=config.allow_zero_length_lines,
-            )
-            if geometry is None:
+        kept_edges = []
+        kept_coords = []
+        for (u, v, key, d), coords in zip(edges, edge_coords):
+            if coords is None:
                 edges_to_remove.append((u, v, key))
                 continue
+            kept_edges.append(d)
+            kept_coords.append(coords)
+            internal_nodes.extend(d['ndref'][1:-1])
+        del edges, edge_coords
 
+        geometries, lengths = _lines_with_lengths(self.geod, kept_coords)
+        for d, geometry, length in zip(kept_edges, geometries, lengths):
             d['geometry'] = geometry
-            d['length'] = round(self.geod.geometry_length(geometry), 1)
-            internal_nodes = internal_nodes + d["ndref"][1:len(d["ndref"])-1]
+            d['length'] = round(length, 1)
             del d['ndref']
             if progressbar:
                 progressbar.update(1)
@@ -631,11 +745,16 @@ class OSMGraph:
         if orphan_topology_nodes:
             self.G.remove_nodes_from(orphan_topology_nodes)
 
+        # Sort the features out first, then build each kind's geometries in
+        # bulk.
         nodes_to_remove = []
+        zones = []
+        polygons = []
+        lines = []
+        points = []
         for n, d in list(self.G.nodes(data=True)):
             if OSWZoneNormalizer.osw_zone_filter(d):
                 ndref = d.get("ndref")
-                indref = d.get("indref", [])
                 if not ndref:
                     nodes_to_remove.append(n)
                     continue
@@ -643,62 +762,79 @@ class OSMGraph:
                 for ref in ndref:
                     node_d = self.G._node[int(ref)]
                     ref_coords.append((ref, (node_d["lon"], node_d["lat"])))
-
-                geometry, cleaned_refs = clean_referenced_polygon_geometry(
-                    ref_coords,
-                    indref,
-                )
-                if geometry is None:
-                    nodes_to_remove.append(n)
-                    continue
-                d["geometry"] = geometry
-
-                d["_w_id"] = cleaned_refs
-                d.pop("indref", None)
-                d.pop("ndref", None)
-
-                if progressbar:
-                    progressbar.update(1)
+                zones.append((n, d, ref_coords))
             elif "ndref" in d and "indref" in d:
-                ndref = d.get("ndref")
-                indref = d.get("indref", [])
-                if not ndref:
+                if not d.get("ndref"):
                     nodes_to_remove.append(n)
                     continue
-                geometry = clean_polygon_geometry(ndref, indref)
-                if geometry is None:
+                polygons.append((n, d))
+            elif "ndref" in d:
+                if not d.get("ndref"):
                     nodes_to_remove.append(n)
                     continue
-                d["geometry"] = geometry
+                lines.append((n, d))
+            else:
+                points.append((d, (d["lon"], d["lat"])))
 
-                d.pop("ndref", None)
-                d.pop("indref", None)
+        zone_geometries = clean_referenced_polygon_geometries(
+            (ref_coords, d.get("indref", [])) for _n, d, ref_coords in zones
+        )
+        for (n, d, _ref_coords), (geometry, cleaned_refs) in zip(zones, zone_geometries):
+            if geometry is None:
+                nodes_to_remove.append(n)
+                continue
+            d["geometry"] = geometry
 
-                if progressbar:
-                    progressbar.update(1)
-            elif "ndref" in d:
-                ndref = d.get("ndref")
-                if not ndref:
-                    nodes_to_remove.append(n)
-                    continue
-                geometry = clean_linestring_geometry(
-                    ndref,
-                    allow_zero_length_lines=config.allow_zero_length_lines,
-                )
-                if geometry is None:
-                    nodes_to_remove.append(n)
-                    continue
-                d["geometry"] = geometry
-                d["length"] = round(self.geod.geometry_length(geometry), 1)
-                d.pop("ndref", None)
-                if progressbar:
-                    progressbar.update(1)
+            d["_w_id"] = cleaned_refs
+            d.pop("indref", None)
+            d.pop("ndref", None)
+
+            if progressbar:
+                progressbar.update(1)
+
+        polygon_geometries = clean_polygon_geometries(
+            [d["ndref"]] + list(d["indref"]) for _n, d in polygons
+        )
+        for (n, d), geometry in zip(polygons, polygon_geometries):
+            if geometry is None:
+                nodes_to_remove.append(n)
+                continue
+            d["geometry"] = geometry
+
+            d.pop("ndref", None)
+            d.pop("indref", None)
+
+            if progressbar:
+                progressbar.update(1)
+
+        line_coords = clean_linestrings_coords(
+            (d["ndref"] for _n, d in lines),
+            allow_zero_length_lines=config.allow_zero_length_lines,
+        )
+        kept_lines = []
+        for (n, d), coords in zip(lines, line_coords):
+            if coords is None:
+                nodes_to_remove.append(n)
             else:
-                geometry = Point(d["lon"], d["lat"])
+                kept_lines.append(d)
+        geometries, lengths = _lines_with_lengths(
+            self.geod,
+            [coords for coords in line_coords if coords is not None],
+        )
+        for d, geometry, length in zip(kept_lines, geometries, lengths):
+            d["geometry"] = geometry
+            d.pop("ndref", None)
+            d["length"] = round(length, 1)
+            if progressbar:
+                progressbar.update(1)
+
+        if points:
+            geometries = shapely.points([coords for _d, coords in points])
+            for (d, _coords), geometry in zip(points, geometries):
                 d["geometry"] = geometry
                 if progressbar:
                     progressbar.update(1)
-                
+
         if nodes_to_remove:
             self.G.remove_nodes_from(nodes_to_remove)
 
@@ -759,8 +895,11 @@ class OSMGraph:
     def is_directed(self) -> bool:
         return self.G.is_directed()
 
-    def to_geojson(self, *args) -> None:
+    def to_geojson(self, *args, config: FormatterConfig = None) -> None:
+        config = config or FormatterConfig()
         OSW_JSON_HEADER = {"$schema": OSW_SCHEMA_ID, "type": "FeatureCollection"}
+        indent = None if config.compact_geojson else 2
+        json_backend = get_json_backend(config.json_backend)
         nodes_path = args[0]
         edges_path = args[1]
         points_path = args[2]
@@ -768,13 +907,6 @@ class OSMGraph:
         zones_path = args[4]
         polygons_path = args[5]
 
-        edge_id_counter = 1
-        node_id_counter = 1
-        point_id_counter = 1
-        line_id_counter = 1
-        zone_id_counter = 1
-        polygon_id_counter = 1
-
         def _source_id(node_key):
             id_str = str(node_key)
             if isinstance(node_key, str) and id_str[:1] in {"p", "l", "z", "g"}:
@@ -798,12 +930,6 @@ class OSMGraph:
                 return node_id_map[ref_int]
             return str(ref)
 
-        node_features = []
-        point_features = []
-        line_features = []
-        zone_features = []
-        polygon_features = []
-        node_id_map = {}
         zone_node_refs = set()
         for _, d in self.G.nodes(data=True):
             if OSWZoneNormalizer.osw_zone_filter(d):
@@ -818,146 +944,97 @@ class OSMGraph:
                     except (TypeError, ValueError):
                         pass
 
+        # Sort every node into its output file first, numbering the nodes as
+        # it goes, so zones and edges can be written with remapped node ids
+        # as soon as they are reached.
+        node_id_map = {}
+        node_id_counter = 1
+        feature_kinds = bytearray()
         for n, d in self.G.nodes(data=True):
-            d_copy = {**d}
-            source_id = _source_id(n)
-            geometry_obj = d_copy.pop("geometry")
-            geometry = mapping(geometry_obj)
-            geometry_type = geometry_obj.geom_type
+            geometry_type = d["geometry"].geom_type
             is_topology_node = geometry_type == "Point" and self.G.degree(n) > 0
             is_zone_node = geometry_type == "Point" and n in zone_node_refs
 
             if is_topology_node or is_zone_node:
-                _assign_ids(d_copy, node_id_counter, source_id)
-                node_id_map[n] = d_copy["_id"]
-                node_id_counter += 1
-
-                if 'lon' in d_copy:
-                    d_copy.pop('lon')
-
-                if 'lat' in d_copy:
-                    d_copy.pop('lat')
-
-                node_features.append(
-                    {'type': 'Feature', 'geometry': geometry, 'properties': d_copy}
-                )
+                kind = _NODE_FEATURE
             elif geometry_type == "Point" and OSWPointNormalizer.osw_point_filter(d):
-                _assign_ids(d_copy, point_id_counter, source_id)
-                point_id_counter += 1
-
-                if "lon" in d_copy:
-                    d_copy.pop("lon")
-
-                if "lat" in d_copy:
-                    d_copy.pop("lat")
-
-                point_features.append(
-                    {"type": "Feature", "geometry": geometry, "properties": d_copy}
-                )
+                kind = _POINT_FEATURE
             elif geometry_type == "LineString":
-                _assign_ids(d_copy, line_id_counter, source_id)
-                line_id_counter += 1
-
-                line_features.append(
-                    {"type": "Feature", "geometry": geometry, "properties": d_copy}
-                )
+                kind = _LINE_FEATURE
             elif geometry_type == "Polygon" and OSWZoneNormalizer.osw_zone_filter(d):
-                _assign_ids(d_copy, zone_id_counter, source_id)
-                zone_id_counter += 1
-
-                zone_features.append(
-                    {"type": "Feature", "geometry": geometry, "properties": d_copy}
-                )
+                kind = _ZONE_FEATURE
             elif geometry_type == "Polygon":
-                _assign_ids(d_copy, polygon_id_counter, source_id)
-                polygon_id_counter += 1
-
-                polygon_features.append(
-                    {"type": "Feature", "geometry": geometry, "properties": d_copy}
-                )
+                kind = _POLYGON_FEATURE
             else:
-                _assign_ids(d_copy, node_id_counter, source_id)
-                node_id_map[n] = d_copy["_id"]
+                kind = _NODE_FEATURE
+            if kind == _NODE_FEATURE:
+                node_id_map[n] = str(node_id_counter)
                 node_id_counter += 1
+            feature_kinds.append(kind)
 
-                if 'lon' in d_copy:
-                    d_copy.pop('lon')
-
-                if 'lat' in d_copy:
-                    d_copy.pop('lat')
-
-                node_features.append(
-                    {'type': 'Feature', 'geometry': geometry, 'properties': d_copy}
+        with ExitStack() as stack:
+            writers = {
+                kind: stack.enter_context(
+                    FeatureCollectionWriter(path, OSW_JSON_HEADER, indent=indent, json_backend=json_backend)
                 )
-
-        for zone_feature in zone_features:
-            props = zone_feature.get("properties", {})
-            w_ids = props.get("_w_id")
-            if isinstance(w_ids, list):
-                props["_w_id"] = [str(_remap_node_ref(ref, node_id_map)) for ref in w_ids]
-            elif w_ids is not None:
-                props["_w_id"] = str(_remap_node_ref(w_ids, node_id_map))
-
-        edge_features = []
-        for u, v, d in self.G.edges(data=True):
-            d_copy = {**d}
-            d_copy['_id'] = str(edge_id_counter)
-            edge_id_counter += 1
-            d_copy['_u_id'] = str(node_id_map.get(u, u))
-            d_copy['_v_id'] = str(node_id_map.get(v, v))
-
-            d_copy['ext:osm_id'] = str(d['osm_id'])
-
-            if 'osm_id' in d_copy:
-                d_copy.pop('osm_id')
-
-            if 'segment' in d_copy:
-                d_copy.pop('segment')
-
-            geometry = mapping(d_copy.pop('geometry'))
-
-            edge_features.append(
-                {'type': 'Feature', 'geometry': geometry, 'properties': d_copy}
+                for kind, path in (
+                    (_NODE_FEATURE, nodes_path),
+                    (_POINT_FEATURE, points_path),
+                    (_LINE_FEATURE, lines_path),
+                    (_ZONE_FEATURE, zones_path),
+                    (_POLYGON_FEATURE, polygons_path),
+                )
+            }
+
+            for (n, d), kind in zip(self.G.nodes(data=True), feature_kinds):
+                writer = writers[kind]
+                d_copy = {**d}
+                geometry = mapping(d_copy.pop("geometry"))
+                _assign_ids(d_copy, writer.count + 1, _source_id(n))
+
+                if kind in (_NODE_FEATURE, _POINT_FEATURE):
+                    d_copy.pop("lon", None)
+                    d_copy.pop("lat", None)
+                elif kind == _ZONE_FEATURE:
+                    w_ids = d_copy.get("_w_id")
+                    if isinstance(w_ids, list):
+                        d_copy["_w_id"] = [str(_remap_node_ref(ref, node_id_map)) for ref in w_ids]
+                    elif w_ids is not None:
+                        d_copy["_w_id"] = str(_remap_node_ref(w_ids, node_id_map))
+
+                writer.write({"type": "Feature", "geometry": geometry, "properties": d_copy})
+
+            edge_writer = stack.enter_context(
+                FeatureCollectionWriter(edges_path, OSW_JSON_HEADER, indent=indent, json_backend=json_backend)
             )
-        edges_fc = {**OSW_JSON_HEADER, **{"features": edge_features}}
+            for u, v, d in self.G.edges(data=True):
+                d_copy = {**d}
+                d_copy['_id'] = str(edge_writer.count + 1)
+                d_copy['_u_id'] = str(node_id_map.get(u, u))
+                d_copy['_v_id'] = str(node_id_map.get(v, v))
 
-        nodes_fc = {**OSW_JSON_HEADER, **{"features": node_features}}
-        points_fc = {**OSW_JSON_HEADER, **{"features": point_features}}
-        lines_fc = {**OSW_JSON_HEADER, **{"features": line_features}}
-        zones_fc = {**OSW_JSON_HEADER, **{"features": zone_features}}
-        polygons_fc = {**OSW_JSON_HEADER, **{"features": polygon_features}}
+                d_copy['ext:osm_id'] = str(d['osm_id'])
 
-        if len(edge_features) > 0:
-            with open(edges_path, 'w') as f:
-                json.dump(edges_fc, f, indent=2)
+                if 'osm_id' in d_copy:
+                    d_copy.pop('osm_id')
 
-        if len(node_features) > 0:
-            with open(nodes_path, 'w') as f:
-                json.dump(nodes_fc, f, indent=2)
+                if 'segment' in d_copy:
+                    d_copy.pop('segment')
 
-        if len(point_features) > 0:
-            with open(points_path, "w") as f:
-                json.dump(points_fc, f, indent=2)
+                geometry = mapping(d_copy.pop('geometry'))
 
-        if len(line_features) > 0:
-            with open(lines_path, "w") as f:
-                json.dump(lines_fc, f, indent=2)
-
-        if len(zone_features) > 0:
-            with open(zones_path, "w") as f:
-                json.dump(zones_fc, f, indent=2)
-
-        if len(polygon_features) > 0:
-            with open(polygons_path, "w") as f:
-                json.dump(polygons_fc, f, indent=2)
+                edge_writer.write(
+                    {'type': 'Feature', 'geometry': geometry, 'properties': d_copy}
+                )
 
     @classmethod
-    def from_geojson(cls, nodes_path, edges_path):
-        with open(nodes_path) as f:
-            nodes_fc = json.load(f)
+    def from_geojson(cls, nodes_path, edges_path, config: FormatterConfig = None):
+        json_backend = get_json_backend((config or FormatterConfig()).json_backend)
+        with open(nodes_path, 'rb') as f:
+            nodes_fc = json_backend.load(f)
 
-        with open(edges_path) as f:
-            edges_fc = json.load(f)
+        with open(edges_path, 'rb') as f:
+            edges_fc = json_backend.load(f)
 
         G = nx.MultiDiGraph()
         osm_graph = cls(G=G)
@@ -3,6 +3,7 @@ import math
 import ogr2osm
 
 from ...config import FormatterConfig
+from ..json_backend import get_json_backend
 
 
 class OSMNormalizer(ogr2osm.TranslationBase):
@@ -58,6 +59,7 @@ class OSMNormalizer(ogr2osm.TranslationBase):
     def __init__(self, config: FormatterConfig = None):
         super().__init__()
         self.config = config or FormatterConfig()
+        self.json_backend = get_json_backend(self.config.json_backend)
         # OSW `_id` -> the OsmNode created for that node feature, and each way
         # -> the `_u_id`/`_v_id` of the edge it came from. ogr2osm builds ways
         # from geometry alone, so co-located nodes are indistinguishable to it;
@@ -90,7 +92,11 @@ class OSMNormalizer(ogr2osm.TranslationBase):
         return super().merge_tags(geometry_type, tags_existing_geometry, tags_new_geometry)
 
     def _stash_ext(self, tags, key, value):
-        """Preserve non-compliant values under an ext: namespace."""
+        """Preserve non-compliant values under an ext: namespace.
+
+        JSON values are parsed with the configured backend but always written
+        back by the stdlib, whose `", "`/`": "` layout is what the tag holds.
+        """
         if value is None:
             return
         try:
@@ -103,7 +109,7 @@ class OSMNormalizer(ogr2osm.TranslationBase):
                     stripped.startswith("[") and stripped.endswith("]")
                 ):
                     try:
-                        safe_value = json.dumps(json.loads(stripped), separators=(",", ": "))
+                        safe_value = json.dumps(self.json_backend.loads(stripped), separators=(",", ": "))
                     except Exception:
                         safe_value = value
                 else:
@@ -117,7 +123,7 @@ class OSMNormalizer(ogr2osm.TranslationBase):
             s = safe_value.strip()
             if (s.startswith("{") and s.endswith("}")) or (s.startswith("[") and s.endswith("]")):
                 try:
-                    safe_value = json.dumps(json.loads(s), separators=(",", ": "))
+                    safe_value = json.dumps(self.json_backend.loads(s), separators=(",", ": "))
                 except Exception:
                     pass
         tags[f"ext:{key}"] = safe_value
@@ -0,0 +1,223 @@
+"""Slimmer per-node and per-edge dicts for the networkx OSM graph.
+
+networkx keeps a dict for every node's attributes, every edge's attributes and
+every neighbour and edge-key table. `SlimMultiDiGraph` swaps those dicts for
+smaller mappings through networkx's storage factories, so everything `OSMGraph`
+does runs unchanged against it. It is still a dict-of-dicts graph, not an
+array-backed store: it trims the per-object overhead, mostly that of the
+neighbour tables, and each access costs a little more Python than a dict's.
+"""
+import sys
+from collections.abc import MutableMapping
+
+import networkx as nx
+
+# Entries a `SmallMap` scans before it moves into a dict.
+SMALL_MAP_LIMIT = 8
+
+
+class _Shape:
+    """An ordered tuple of attribute keys shared by every mapping holding them.
+
+    Adding or removing a key moves a mapping to another shape. The moves are
+    cached, so mappings built the same way -- the segments of one way, or every
+    plain topology node -- end up sharing a single shape.
+    """
+
+    __slots__ = ("table", "keys", "index", "added", "removed")
+
+    def __init__(self, table, keys):
+        self.table = table
+        self.keys = keys
+        self.index = {key: i for i, key in enumerate(keys)}
+        self.added = {}
+        self.removed = {}
+
+    def add(self, key):
+        shape = self.added.get(key)
+        if shape is None:
+            shape = self.added[key] = self.table.shape(self.keys + (key,))
+        return shape
+
+    def remove(self, key):
+        shape = self.removed.get(key)
+        if shape is None:
+            keys = tuple(k for k in self.keys if k != key)
+            shape = self.removed[key] = self.table.shape(keys)
+        return shape
+
+
+class ShapeTable:
+    """Interns the attribute shapes of one graph."""
+
+    def __init__(self):
+        self.shapes = {}
+        self.empty = self.shape(())
+
+    def shape(self, keys):
+        shape = self.shapes.get(keys)
+        if shape is None:
+            shape = self.shapes[keys] = _Shape(self, keys)
+        return shape
+
+
+class SlimAttrs(MutableMapping):
+    """Attribute mapping storing an interned key shape and a list of values.
+
+    Behaves as an insertion-ordered dict. String values are interned, so the
+    tag values repeated across ways are held once.
+    """
+
+    __slots__ = ("_shape", "_values")
+
+    def __init__(self, table: ShapeTable):
+        self._shape = table.empty
+        self._values = []
+
+    def __getitem__(self, key):
+        return self._values[self._shape.index[key]]
+
+    def __setitem__(self, key, value):
+        if type(value) is str:
+            value = sys.intern(value)
+        i = self._shape.index.get(key)
+        if i is None:
+            self._shape = self._shape.add(key)
+            self._values.append(value)
+        else:
+            self._values[i] = value
+
+    def __delitem__(self, key):
+        i = self._shape.index[key]
+        self._shape = self._shape.remove(key)
+        del self._values[i]
+
+    def __iter__(self):
+        return iter(self._shape.keys)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key):
+        return key in self._shape.index
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def copy(self):
+        return dict(self)
+
+
+class SmallMap(MutableMapping):
+    """Insertion-ordered mapping for the handful of entries a node has.
+
+    Up to `SMALL_MAP_LIMIT` entries are held in two tuples, which cost nothing
+    while empty -- as the adjacency of every point feature is -- and are
+    scanned rather than hashed. A map that outgrows the limit, such as the
+    adjacency of a busy crossing, moves into a dict, so no update costs more
+    than a scan of a few entries.
+    """
+
+    __slots__ = ("_keys", "_values", "_dict")
+
+    def __init__(self):
+        self._keys = ()
+        self._values = ()
+        self._dict = None
+
+    def _find(self, key):
+        try:
+            return self._keys.index(key)
+        except ValueError:
+            raise KeyError(key) from None
+
+    def __getitem__(self, key):
+        if self._dict is not None:
+            return self._dict[key]
+        return self._values[self._find(key)]
+
+    def __setitem__(self, key, value):
+        if self._dict is not None:
+            self._dict[key] = value
+            return
+        try:
+            i = self._keys.index(key)
+        except ValueError:
+            if len(self._keys) < SMALL_MAP_LIMIT:
+                self._keys += (key,)
+                self._values += (value,)
+            else:
+                self._dict = dict(zip(self._keys, self._values))
+                self._dict[key] = value
+                self._keys = self._values = ()
+        else:
+            self._values = self._values[:i] + (value,) + self._values[i + 1:]
+
+    def __delitem__(self, key):
+        if self._dict is not None:
+            del self._dict[key]
+            return
+        i = self._find(key)
+        self._keys = self._keys[:i] + self._keys[i + 1:]
+        self._values = self._values[:i] + self._values[i + 1:]
+
+    def __iter__(self):
+        if self._dict is not None:
+            return iter(self._dict)
+        return iter(self._keys)
+
+    def __len__(self):
+        if self._dict is not None:
+            return len(self._dict)
+        return len(self._keys)
+
+    def __contains__(self, key):
+        if self._dict is not None:
+            return key in self._dict
+        return key in self._keys
+
+    def __repr__(self):
+        return repr(self.copy())
+
+    def popitem(self):
+        # Like dict, remove the entry added last; networkx relies on it to
+        # drop the newest parallel edge when no key is given.
+        if self._dict is not None:
+            return self._dict.popitem()
+        if not self._keys:
+            raise KeyError("popitem(): mapping is empty")
+        item = self._keys[-1], self._values[-1]
+        self._keys = self._keys[:-1]
+        self._values = self._values[:-1]
+        return item
+
+    def copy(self):
+        if self._dict is not None:
+            return dict(self._dict)
+        return dict(zip(self._keys, self._values))
+
+
+class _AttrsFactory:
+    # A class rather than a closure so the graph stays picklable.
+    __slots__ = ("table",)
+
+    def __init__(self, table: ShapeTable):
+        self.table = table
+
+    def __call__(self):
+        return SlimAttrs(self.table)
+
+
+class SlimMultiDiGraph(nx.MultiDiGraph):
+    """A `networkx.MultiDiGraph` with slimmer attribute and adjacency mappings."""
+
+    adjlist_inner_dict_factory = SmallMap
+    edge_key_dict_factory = SmallMap
+
+    def __init__(self, incoming_graph_data=None, multigraph_input=None, **attr):
+        # networkx reads the factories off the instance, so each graph interns
+        # its own shapes and they are freed along with it.
+        table = ShapeTable()
+        self.node_attr_dict_factory = _AttrsFactory(table)
+        self.edge_attr_dict_factory = _AttrsFactory(table)
+        super().__init__(incoming_graph_data, multigraph_input, **attr)
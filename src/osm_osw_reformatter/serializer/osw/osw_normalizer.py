@@ -1,5 +1,6 @@
 import types
 import math
+from functools import lru_cache, wraps
 
 OSW_SCHEMA_ID = "https://sidewalks.washington.edu/opensidewalks/0.3/schema.json"
 
@@ -66,6 +67,73 @@ def _has_only_ext_tags(tags):
     return all(str(k).startswith("ext:") for k in tags.keys())
 
 
+# `filter()` and `normalize()` results are memoized per normalizer class, keyed
+# by the tags in their original order. Keys internal to the graph never affect
+# either result, so they are left out of the key; "length" is an OSM tag too and
+# stays in. osmium TagLists are not memoized: reading one into a key costs more
+# than the predicates it would save.
+NORMALIZATION_CACHE_SIZE = 8192
+_UNCACHED_KEYS = frozenset({"geometry", "indref", "lat", "lon", "ndref", "osm_id", "segment"})
+_memoized_methods = []
+
+
+def _tag_key(tags):
+    if not isinstance(tags, dict):
+        return None
+    if _UNCACHED_KEYS.isdisjoint(tags):
+        key = tuple(tags.items())
+    else:
+        key = tuple((k, v) for k, v in tags.items() if k not in _UNCACHED_KEYS)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _classify(tags, rules):
+    """The kind named by the first `(key, {value: kind})` rule the tags match."""
+    for key, kinds in rules:
+        kind = kinds.get(_tag_value(tags, key))
+        if kind is not None:
+            return kind
+    return None
+
+
+def _memoized(method):
+    def compute(normalizer_class, key):
+        return method(normalizer_class(dict(key)))
+
+    @wraps(method)
+    def wrapper(self):
+        key = _tag_key(self.tags)
+        if key is None:
+            return method(self)
+        result = wrapper.cache(type(self), key)
+        # Callers get their own copy of a cached tag dict.
+        return dict(result) if isinstance(result, dict) else result
+
+    wrapper.cache = lru_cache(maxsize=NORMALIZATION_CACHE_SIZE)(compute)
+    _memoized_methods.append(wrapper)
+    return wrapper
+
+
+def normalization_cache_info():
+    """Hit and miss counts of each memoized `filter()` and `normalize()`."""
+    return {method.__qualname__: method.cache.cache_info() for method in _memoized_methods}
+
+
+def clear_normalization_caches():
+    for method in _memoized_methods:
+        method.cache.cache_clear()
+
+
+def set_normalization_cache_size(maxsize):
+    """Bound each cache to `maxsize` tag sets, clearing them; 0 turns caching off."""
+    for method in _memoized_methods:
+        method.cache = lru_cache(maxsize=maxsize)(method.cache.__wrapped__)
+
+
 class OSWWayNormalizer:
 
     ROAD_HIGHWAY_VALUES = (
@@ -90,129 +158,30 @@ class OSWWayNormalizer:
     def __init__(self, tags):
         self.tags = tags
 
+    def kind(self):
+        """The kind of way the tags describe, naming its plan, or None."""
+        highway = _tag_value(self.tags, "highway")
+        kind = _WAY_KINDS.get(highway)
+        refinement = _WAY_REFINEMENTS.get(highway)
+        if refinement is not None:
+            key, kinds = refinement
+            kind = kinds.get(_tag_value(self.tags, key), kind)
+        return kind
+
+    @_memoized
     def filter(self):
-        return (
-            self.is_sidewalk()
-            or self.is_crossing()
-            or self.is_traffic_island()
-            or self.is_footway()
-            or self.is_stairs()
-            or self.is_pedestrian()
-            or self.is_living_street()
-            or self.is_driveway()
-            or self.is_alley()
-            or self.is_parking_aisle()
-            or self.is_road()
-        )
+        return self.kind() is not None
 
     @staticmethod
     def osw_way_filter(tags):
         return OSWWayNormalizer(tags).filter()
 
+    @_memoized
     def normalize(self):
-        if self.is_sidewalk():
-            return self._normalize_sidewalk()
-        elif self.is_crossing():
-            return self._normalize_crossing()
-        elif self.is_traffic_island():
-            return self._normalize_traffic_island()
-        elif self.is_footway():
-            return self._normalize_footway()
-        elif self.is_stairs():
-            return self._normalize_stairs()
-        elif self.is_pedestrian():
-            return self._normalize_pedestrian()
-        elif self.is_living_street():
-            return self._normalize_living_street()
-        elif self.is_driveway():
-            return self._normalize_service_road()
-        elif self.is_alley():
-            return self._normalize_service_road()
-        elif self.is_parking_aisle():
-            return self._normalize_service_road()
-        elif self.is_road():
-            return self._normalize_road()
-        else:
+        kind = self.kind()
+        if kind is None:
             raise ValueError("This is an invalid way")
-    
-    def _normalize_way(self, keep_keys={}, defaults = {}):
-        generic_keep_keys = {
-            "highway": str,
-            "width": float,
-            "surface": surface,
-            "name": str,
-            "description": str,
-            "foot": foot,
-            "incline": incline,
-            "length": float,
-        }
-        generic_defaults = {}
-        
-        new_tags = _normalize(self.tags, {**generic_keep_keys, **keep_keys}, {**generic_defaults, **defaults})
-        return new_tags
-    
-    def _normalize_pedestrian(self, keep_keys = {}, defaults = {}):
-        generic_keep_keys = {}
-        generic_defaults = {"foot": "yes"}
-        
-        new_tags = self._normalize_way({**generic_keep_keys, **keep_keys}, {**generic_defaults, **defaults})
-        return new_tags
-    
-    def _normalize_stairs(self, keep_keys = {}, defaults = {}):
-        generic_keep_keys = {"step_count": int, "climb": climb}
-        generic_defaults = {"foot": "yes"}
-        
-        new_tags = self._normalize_way({**generic_keep_keys, **keep_keys}, {**generic_defaults, **defaults})
-        return new_tags
-    
-    def _normalize_footway(self, keep_keys = {}, defaults = {}):
-        generic_keep_keys = {"highway": "footway"}
-        generic_defaults = {"foot": "yes"}
-        
-        new_tags = self._normalize_way({**generic_keep_keys, **keep_keys}, {**generic_defaults, **defaults})
-        return new_tags
-
-    def _normalize_sidewalk(self, keep_keys = {}, defaults = {}):
-        generic_keep_keys = {"footway": str}
-        generic_defaults = {}
-        
-        new_tags = self._normalize_footway({**generic_keep_keys, **keep_keys}, {**generic_defaults, **defaults})
-        return new_tags
-
-    def _normalize_crossing(self, keep_keys = {}, defaults = {}):
-        generic_keep_keys = {"footway": str, "crossing": ["crossing:markings", crossing_markings], "crossing:markings": crossing_markings}
-        generic_defaults = {}
-        
-        new_tags = self._normalize_footway({**generic_keep_keys, **keep_keys}, {**generic_defaults, **defaults})
-        return new_tags
-
-    def _normalize_traffic_island(self, keep_keys = {}, defaults = {}):
-        generic_keep_keys = {"footway": str}
-        generic_defaults = {}
-        
-        new_tags = self._normalize_footway({**generic_keep_keys, **keep_keys}, {**generic_defaults, **defaults})
-        return new_tags
-
-    def _normalize_living_street(self, keep_keys = {}, defaults = {}):
-        generic_keep_keys = {}
-        generic_defaults = {"foot": "yes"}
-        
-        new_tags = self._normalize_way({**generic_keep_keys, **keep_keys}, {**generic_defaults, **defaults})
-        return new_tags
-    
-    def _normalize_service_road(self, keep_keys = {}, defaults = {}):
-        generic_keep_keys = {"service": str}
-        generic_defaults = {}
-        
-        new_tags = self._normalize_road({**generic_keep_keys, **keep_keys}, {**generic_defaults, **defaults})
-        return new_tags
-    
-    def _normalize_road(self, keep_keys = {}, defaults = {}):
-        generic_keep_keys = {"highway": (lambda tag_value, tags: tag_value.partition("_")[0]), "maxspeed": ["ext:maxspeed", str]}
-        generic_defaults = {}
-        
-        new_tags = self._normalize_way({**generic_keep_keys, **keep_keys}, {**generic_defaults, **defaults})
-        return new_tags
+        return _apply_plan(self.tags, _PLANS[kind])
 
     def is_sidewalk(self):
         return (_tag_value(self.tags, "highway") == "footway") and (
@@ -265,32 +234,23 @@ class OSWNodeNormalizer:
     def __init__(self, tags):
         self.tags = tags
 
+    def kind(self):
+        return "kerb" if self.is_kerb() else None
+
+    @_memoized
     def filter(self):
-        return self.is_kerb()
+        return self.kind() is not None
 
     @staticmethod
     def osw_node_filter(tags):
         return OSWNodeNormalizer(tags).filter()
 
+    @_memoized
     def normalize(self):
-        if self.is_kerb():
-            return self._normalize_kerb()
-        else:
+        kind = self.kind()
+        if kind is None:
             raise ValueError("This is an invalid node")
-
-    def _normalize_node(self, keep_keys={}, defaults = {}):
-        generic_keep_keys = {}
-        generic_defaults = {}
-        
-        new_tags = _normalize(self.tags, {**generic_keep_keys, **keep_keys}, {**generic_defaults, **defaults})
-        return new_tags
-    
-    def _normalize_kerb(self, keep_keys = {}, defaults = {}):
-        generic_keep_keys = {"barrier": "kerb", "kerb": kerb, "tactile_paving": tactile_paving}
-        generic_defaults = {}
-        
-        new_tags = self._normalize_node({**generic_keep_keys, **keep_keys}, {**generic_defaults, **defaults})
-        return new_tags
+        return _apply_plan(self.tags, _PLANS[kind])
 
     def is_kerb(self):
         kerb_value = _tag_value(self.tags, "kerb")
@@ -304,55 +264,25 @@ class OSWPointNormalizer:
     def __init__(self, tags):
         self.tags = tags
 
+    def kind(self):
+        return _classify(self.tags, _POINT_RULES) or ("custom" if self.is_custom() else None)
+
+    @_memoized
     def filter(self):
-        return (self.is_powerpole()) or (
-            self.is_firehydrant()) or (
-            self.is_bench()) or (
-            self.is_waste_basket()) or (
-            self.is_manhole()) or (
-            self.is_bollard()) or (
-            self.is_street_lamp()) or (
-            self.is_tree()) or (
-            self.is_custom())
-    
+        return self.kind() is not None
+
     @staticmethod
     def osw_point_filter(tags):
         return OSWPointNormalizer(tags).filter()
 
+    @_memoized
     def normalize(self):
-        if self.is_powerpole():
-            return self._normalize_point({"power": str})
-        elif self.is_firehydrant():
-            return self._normalize_point({"emergency": str})
-        elif self.is_bench() or self.is_waste_basket():
-            return self._normalize_point({"amenity": str})
-        elif self.is_manhole():
-            return self._normalize_point({"man_made": str})
-        elif self.is_bollard():
-            return self._normalize_point({"barrier": str})
-        elif self.is_street_lamp():
-            return self._normalize_point({"highway": str})
-        elif self.is_tree():
-            return self._normalize_point(
-                {
-                    "natural": natural_point,
-                    "leaf_cycle": leaf_cycle,
-                    "leaf_type": leaf_type
-                }
-            )
-        elif self.is_custom():
-            return self._normalize_point()
-        else:
+        kind = self.kind()
+        if kind is None:
             print(f"Invalid point skipped. Tags: {self.tags}")
             return {}
-    
-    def _normalize_point(self, keep_keys={}, defaults = {}):
-        generic_keep_keys = {}
-        generic_defaults = {}
-        
-        new_tags = _normalize(self.tags, {**generic_keep_keys, **keep_keys}, {**generic_defaults, **defaults})
-        return new_tags
-    
+        return _apply_plan(self.tags, _PLANS[kind])
+
     def is_powerpole(self):
         return _tag_value(self.tags, "power") == "pole"
     
@@ -385,36 +315,24 @@ class OSWLineNormalizer:
     def __init__(self, tags):
         self.tags = tags
 
+    def kind(self):
+        return _classify(self.tags, _LINE_RULES) or ("custom" if self.is_custom() else None)
+
+    @_memoized
     def filter(self):
-        return (self.is_fence()) or (self.is_tree_row()) or (self.is_custom())
-    
+        return self.kind() is not None
+
     @staticmethod
     def osw_line_filter(tags):
         return OSWLineNormalizer(tags).filter()
 
+    @_memoized
     def normalize(self):
-        if self.is_fence():
-            return self._normalize_line({"barrier": str})
-        elif self.is_tree_row():
-            return self._normalize_line(
-                {
-                    "natural": natural_line,
-                    "leaf_cycle": leaf_cycle,
-                    "leaf_type": leaf_type
-                }
-            )
-        elif self.is_custom():
-            return self._normalize_line()
-        else:
+        kind = self.kind()
+        if kind is None:
             raise ValueError("This is an invalid line")
-    
-    def _normalize_line(self, keep_keys={}, defaults = {}):
-        generic_keep_keys = {}
-        generic_defaults = {}
-        
-        new_tags = _normalize(self.tags, {**generic_keep_keys, **keep_keys}, {**generic_defaults, **defaults})
-        return new_tags
-    
+        return _apply_plan(self.tags, _PLANS[kind])
+
     def is_fence(self):
         return _tag_value(self.tags, "barrier") == "fence"
     
@@ -532,46 +450,24 @@ class OSWPolygonNormalizer:
     def __init__(self, tags):
         self.tags = tags
 
+    def kind(self):
+        return _classify(self.tags, _POLYGON_RULES) or ("custom" if self.is_custom() else None)
+
+    @_memoized
     def filter(self):
-        return self.is_building() or self.is_wood() or self.is_custom()
-    
+        return self.kind() is not None
+
     @staticmethod
     def osw_polygon_filter(tags):
         return OSWPolygonNormalizer(tags).filter()
 
+    @_memoized
     def normalize(self):
-        if self.is_building():
-            return self._normalize_polygon(
-                {
-                    "building": str,
-                    "name": str,
-                    "opening_hours": str,
-                    "leaf_cycle": leaf_cycle,
-                    "leaf_type": leaf_type
-                }
-            )
-        elif self.is_wood():
-            return self._normalize_polygon(
-                {
-                    "natural": natural_polygon,
-                    "name": str,
-                    "opening_hours": str,
-                    "leaf_cycle": leaf_cycle,
-                    "leaf_type": leaf_type
-                }
-            )
-        elif self.is_custom():
-            return self._normalize_polygon()
-        else:
+        kind = self.kind()
+        if kind is None:
             raise ValueError("This is an invalid polygon")
-    
-    def _normalize_polygon(self, keep_keys={}, defaults = {}):
-        generic_keep_keys = {}
-        generic_defaults = {}
-        
-        new_tags = _normalize(self.tags, {**generic_keep_keys, **keep_keys}, {**generic_defaults, **defaults})
-        return new_tags
-    
+        return _apply_plan(self.tags, _PLANS[kind])
+
     def is_building(self):
         return self.tags.get("building", "") in self.BUILDING_VALUES
     
@@ -586,103 +482,99 @@ class OSWZoneNormalizer:
     def __init__(self, tags):
         self.tags = tags
 
+    def kind(self):
+        return _classify(self.tags, _ZONE_RULES)
+
+    @_memoized
     def filter(self):
-        return self.is_pedestrian()
-    
+        return self.kind() is not None
+
     @staticmethod
     def osw_zone_filter(tags):
         return OSWZoneNormalizer(tags).filter()
 
+    @_memoized
     def normalize(self):
-        if self.is_pedestrian():
-            return self._normalize_zone({"highway": str, "surface": surface, "name": str, "description": str})
-        else:
+        kind = self.kind()
+        if kind is None:
             raise ValueError("This is an invalid zone")
-    
-    def _normalize_zone(self, keep_keys={}, defaults = {}):
-        generic_keep_keys = {}
-        generic_defaults = {"foot": "yes"}
-        
-        new_tags = _normalize(self.tags, {**generic_keep_keys, **keep_keys}, {**generic_defaults, **defaults})
-        return new_tags
-    
+        return _apply_plan(self.tags, _PLANS[kind])
+
     def is_pedestrian(self):
         return _tag_value(self.tags, "highway") == "pedestrian"
 
 
-def check_nan_and_raise(tag_type, temp):
-    if (tag_type == float or tag_type == int) and math.isnan(temp):
-        raise ValueError("Value cannot be NaN")
-    return temp
+# A normalization plan is a tuple of (source key, output key, kind, converter)
+# steps plus the defaults, flattened from a keep_keys dict. keep_keys maps each
+# source key to a literal value, a type or a `(value, tags)` function to convert
+# it with, or a [output key, literal/type/function] pair to store it elsewhere.
+_LITERAL = 0
+_CONVERT = 1
+_CONVERT_WITH_TAGS = 2
+_CONVERT_NUMBER = 3
 
-    
-def _normalize(tags, keep_keys, defaults):
+
+def compile_plan(keep_keys, defaults):
+    steps = []
+    for tag, tag_type in keep_keys.items():
+        output_key = tag
+        renamed = isinstance(tag_type, list)
+        if renamed:
+            output_key, tag_type = tag_type
+        if isinstance(tag_type, (str, bool, int, float)):
+            kind = _LITERAL
+        elif isinstance(tag_type, types.FunctionType):
+            kind = _CONVERT_WITH_TAGS
+        elif tag_type in (float, int) and not renamed:
+            # Only values kept under their own key are checked for NaN.
+            kind = _CONVERT_NUMBER
+        else:
+            kind = _CONVERT
+        steps.append((tag, output_key, kind, tag_type))
+    return tuple(steps), dict(defaults)
+
+
+def _apply_plan(tags, plan):
+    steps, defaults = plan
     new_tags = {}
     consumed_tags = set()
     invalid_tags = set()
-    for tag, tag_type in keep_keys.items():
+    for tag, output_key, kind, convert in steps:
+        if kind == _LITERAL:
+            new_tags[output_key] = convert
+            consumed_tags.add(tag)
+            continue
         try:
-            if isinstance(tag_type, list):
-                if isinstance(tag_type[1], (str, bool, int, float)):
-                    new_tags[tag_type[0]] = tag_type[1]
-                    consumed_tags.add(tag)
-                elif isinstance(tag_type[1], types.FunctionType):
-                    temp = tag_type[1](tags[tag], tags)
-                    if temp is not None:
-                        check_nan_and_raise(tag_type[0], temp)
-                        new_tags[tag_type[0]] = temp
-                        consumed_tags.add(tag)
-                    else:
-                        raise ValueError
-                else:
-                    temp = tag_type[1](tags[tag])
-                    if temp is not None:
-                        check_nan_and_raise(tag_type[0], temp)
-                        new_tags[tag_type[0]] = temp
-                        consumed_tags.add(tag)
-                    else:
-                        raise ValueError
-            else:
-                if isinstance(tag_type, (str, bool, int, float)):
-                    new_tags[tag] = tag_type
-                    consumed_tags.add(tag)
-                elif isinstance(tag_type, types.FunctionType):
-                    temp = tag_type(tags[tag], tags)
-                    if temp is not None:
-                        check_nan_and_raise(tag_type, temp)
-                        new_tags[tag] = temp
-                        consumed_tags.add(tag)
-                    else:
-                        raise ValueError
-                else:
-                    temp = tag_type(tags[tag])
-                    if temp is not None:
-                        check_nan_and_raise(tag_type, temp)
-                        new_tags[tag] = temp
-                        consumed_tags.add(tag)
-                    else:
-                        raise ValueError
+            value = tags[tag]
+            value = convert(value, tags) if kind == _CONVERT_WITH_TAGS else convert(value)
+            if value is None or (kind == _CONVERT_NUMBER and math.isnan(value)):
+                raise ValueError
         except ValueError:
             if tag in tags:
                 invalid_tags.add(tag)
-            pass
+            continue
         except KeyError:
-            pass
-    
+            continue
+        new_tags[output_key] = value
+        consumed_tags.add(tag)
+
     # Preserve order of keep_keys first followed by defaults
     new_tags.update(defaults)
 
     # Preserve non-compliant or unknown source tags under ext:*.
-    ext_tags = {}
     for key, value in _feature_tags(tags).items():
         if str(key).startswith("ext:"):
-            ext_tags[key] = value
+            new_tags[key] = value
         elif key in invalid_tags or key not in consumed_tags:
-            ext_tags[f"ext:{key}"] = value
+            new_tags[f"ext:{key}"] = value
+
+    return new_tags
+
+
+def _normalize(tags, keep_keys, defaults):
+    return _apply_plan(tags, compile_plan(keep_keys, defaults))
 
-    return {**{**new_tags, **defaults}, **{**new_tags, **ext_tags}}
 
-    
 def leaf_cycle(tag_value, tags):
     if tag_value.lower() not in LEAF_CYCLE_VALUES:
         return None
@@ -803,3 +695,92 @@ def kerb(tag_value, tags):
         return None
     else:
         return tag_value.lower()
+
+
+def _refine(base, keep_keys=None, defaults=None):
+    """Layer `keep_keys` and `defaults` over those of the more general `base`."""
+    return {**base[0], **(keep_keys or {})}, {**base[1], **(defaults or {})}
+
+
+_WAY = (
+    {
+        "highway": str,
+        "width": float,
+        "surface": surface,
+        "name": str,
+        "description": str,
+        "foot": foot,
+        "incline": incline,
+        "length": float,
+    },
+    {},
+)
+_FOOTWAY = _refine(_WAY, {"highway": "footway"}, {"foot": "yes"})
+_ROAD = _refine(_WAY, {"highway": (lambda tag_value, tags: tag_value.partition("_")[0]), "maxspeed": ["ext:maxspeed", str]})
+_LEAVES = {"leaf_cycle": leaf_cycle, "leaf_type": leaf_type}
+
+# The keep_keys and defaults of every kind of feature, compiled into `_PLANS`
+# once at import.
+PLAN_SOURCES = {
+    "pedestrian": _refine(_WAY, defaults={"foot": "yes"}),
+    "stairs": _refine(_WAY, {"step_count": int, "climb": climb}, {"foot": "yes"}),
+    "footway": _FOOTWAY,
+    "sidewalk": _refine(_FOOTWAY, {"footway": str}),
+    "crossing": _refine(
+        _FOOTWAY,
+        {"footway": str, "crossing": ["crossing:markings", crossing_markings], "crossing:markings": crossing_markings},
+    ),
+    "traffic_island": _refine(_FOOTWAY, {"footway": str}),
+    "living_street": _refine(_WAY, defaults={"foot": "yes"}),
+    "road": _ROAD,
+    "service_road": _refine(_ROAD, {"service": str}),
+    "kerb": ({"barrier": "kerb", "kerb": kerb, "tactile_paving": tactile_paving}, {}),
+    "power": ({"power": str}, {}),
+    "emergency": ({"emergency": str}, {}),
+    "amenity": ({"amenity": str}, {}),
+    "man_made": ({"man_made": str}, {}),
+    "bollard": ({"barrier": str}, {}),
+    "street_lamp": ({"highway": str}, {}),
+    "tree": ({"natural": natural_point, **_LEAVES}, {}),
+    "fence": ({"barrier": str}, {}),
+    "tree_row": ({"natural": natural_line, **_LEAVES}, {}),
+    "building": ({"building": str, "name": str, "opening_hours": str, **_LEAVES}, {}),
+    "wood": ({"natural": natural_polygon, "name": str, "opening_hours": str, **_LEAVES}, {}),
+    "pedestrian_zone": ({"highway": str, "surface": surface, "name": str, "description": str}, {"foot": "yes"}),
+    "custom": ({}, {}),
+}
+_PLANS = {kind: compile_plan(*source) for kind, source in PLAN_SOURCES.items()}
+
+# Each normalizer's `kind()` looks the feature up in these tables once; the
+# kind names the plan `normalize()` applies. Rules are tried in order.
+_WAY_KINDS = {
+    "footway": "footway",
+    "steps": "stairs",
+    "pedestrian": "pedestrian",
+    "living_street": "living_street",
+    **{value: "road" for value in OSWWayNormalizer.ROAD_HIGHWAY_VALUES},
+}
+_WAY_REFINEMENTS = {
+    "footway": ("footway", {"sidewalk": "sidewalk", "crossing": "crossing", "traffic_island": "traffic_island"}),
+    "service": ("service", {"driveway": "service_road", "alley": "service_road", "parking_aisle": "service_road"}),
+}
+_POINT_RULES = (
+    ("power", {"pole": "power"}),
+    ("emergency", {"fire_hydrant": "emergency"}),
+    ("amenity", {"bench": "amenity", "waste_basket": "amenity"}),
+    ("man_made", {"manhole": "man_made"}),
+    ("barrier", {"bollard": "bollard"}),
+    ("highway", {"street_lamp": "street_lamp"}),
+    ("natural", {"tree": "tree"}),
+)
+_LINE_RULES = (
+    ("barrier", {"fence": "fence"}),
+    ("natural", {"tree_row": "tree_row"}),
+)
+_POLYGON_RULES = (
+    ("building", {value: "building" for value in OSWPolygonNormalizer.BUILDING_VALUES}),
+    ("natural", {"wood": "wood"}),
+)
+_ZONE_RULES = (
+    ("highway", {"pedestrian": "pedestrian_zone"}),
+)
@@ -0,0 +1,201 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.osm_osw_reformatter import Formatter
+from src.osm_osw_reformatter.config import FormatterConfig
+from src.osm_osw_reformatter.helpers.executor import (
+    DEFAULT_EXECUTOR,
+    ConversionExecutor,
+    conversion_executor,
+    stage_executor,
+)
+from src.osm_osw_reformatter.helpers.osw import OSWHelper
+from src.osm_osw_reformatter.helpers.response import Response
+from src.osm_osw_reformatter.osm2osw.osm2osw import OSM2OSW
+from src.osm_osw_reformatter.osw2osm.osw2osm import OSW2OSM
+from src.osm_osw_reformatter.serializer.osm.osm_graph import OSMGraph
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_PBF_FILE = os.path.join(ROOT_DIR, 'test_files/wa.microsoft.osm.pbf')
+TEST_OSW_FILE = os.path.join(ROOT_DIR, 'test_files/osw.zip')
+
+
+def thread_name():
+    return threading.current_thread().name
+
+
+def crash_worker(*args):
+    os._exit(1)
+
+
+class TestConversionExecutor(unittest.IsolatedAsyncioTestCase):
+    def test_rejects_invalid_arguments(self):
+        with self.assertRaises(TypeError):
+            ConversionExecutor(executor=object())
+        with self.assertRaises(TypeError):
+            ConversionExecutor(max_concurrent=True)
+        with self.assertRaises(ValueError):
+            ConversionExecutor(max_concurrent=0)
+
+    def test_conversion_executor_wraps_bare_executors(self):
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            wrapped = conversion_executor(pool)
+            shared = ConversionExecutor(pool, max_concurrent=2)
+
+            self.assertIs(wrapped.executor, pool)
+            self.assertIs(conversion_executor(shared), shared)
+        self.assertIs(conversion_executor(None), DEFAULT_EXECUTOR)
+        self.assertFalse(DEFAULT_EXECUTOR.in_processes)
+
+    async def test_run_uses_the_given_executor(self):
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='conversions') as pool:
+            name = await ConversionExecutor(pool).run(thread_name)
+
+        self.assertTrue(name.startswith('conversions'))
+
+    async def test_slots_cap_concurrent_conversions(self):
+        executor = ConversionExecutor(max_concurrent=2)
+        running = 0
+        most = 0
+
+        async def conversion():
+            nonlocal running, most
+            async with executor.slot():
+                running += 1
+                most = max(most, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(conversion() for _ in range(6)))
+
+        self.assertEqual(most, 2)
+
+    def test_stage_executor_rejects_processes(self):
+        with ThreadPoolExecutor(max_workers=1) as threads, ProcessPoolExecutor(max_workers=1) as processes:
+            self.assertIs(stage_executor(threads).executor, threads)
+            self.assertIs(stage_executor(None), DEFAULT_EXECUTOR)
+            with self.assertRaises(TypeError):
+                stage_executor(processes)
+            with self.assertRaises(TypeError):
+                stage_executor(ConversionExecutor(processes))
+
+
+class TestStagesOnExecutor(unittest.IsolatedAsyncioTestCase):
+    async def test_stages_run_on_a_thread_pool(self):
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix='conversions') as pool:
+            og = await OSWHelper.get_osm_graph(TEST_PBF_FILE, executor=pool)
+            edges = og.G.number_of_edges()
+            await OSWHelper.simplify_og(og, executor=pool)
+            # Simplifying changed the graph held here, not a copy of it.
+            self.assertLess(og.G.number_of_edges(), edges)
+            await OSWHelper.construct_geometries(og, executor=pool)
+            generated_files = await OSWHelper.write_og(tmpdir, 'thread', og, executor=pool)
+            ways = await OSWHelper.count_ways(TEST_PBF_FILE, executor=pool)
+
+            self.assertTrue(all(os.path.exists(file_path) for file_path in generated_files))
+            self.assertEqual(ways, await OSWHelper.count_ways(TEST_PBF_FILE))
+
+    async def test_stages_reject_a_process_pool(self):
+        og = await OSWHelper.get_osm_graph(TEST_PBF_FILE)
+        with tempfile.TemporaryDirectory() as tmpdir, ProcessPoolExecutor(max_workers=1) as pool:
+            stages = {
+                'count_ways': lambda: OSWHelper.count_ways(TEST_PBF_FILE, executor=pool),
+                'get_osm_graph': lambda: OSWHelper.get_osm_graph(TEST_PBF_FILE, executor=pool),
+                'simplify_og': lambda: OSWHelper.simplify_og(og, executor=pool),
+                'construct_geometries': lambda: OSWHelper.construct_geometries(og, executor=pool),
+                'write_og': lambda: OSWHelper.write_og(tmpdir, 'process', og, executor=pool),
+            }
+            for name, stage in stages.items():
+                with self.subTest(stage=name), self.assertRaises(TypeError):
+                    await stage()
+
+            self.assertEqual(os.listdir(tmpdir), [])
+
+
+class TestConversionsOnExecutor(unittest.IsolatedAsyncioTestCase):
+    async def test_osm2osw_stages_run_on_the_given_threads(self):
+        stage_threads = []
+        simplify = OSMGraph.simplify
+
+        def recording_simplify(graph):
+            stage_threads.append(thread_name())
+            return simplify(graph)
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix='conversions') as pool, \
+                patch.object(OSMGraph, 'simplify', autospec=True, side_effect=recording_simplify):
+            formatter = Formatter(
+                workdir=tmpdir,
+                file_path=TEST_PBF_FILE,
+                config=FormatterConfig(validate_output=False),
+                executor=ConversionExecutor(pool, max_concurrent=1),
+            )
+            result = await formatter.osm2osw()
+
+        self.assertTrue(result.status, msg=result.error)
+        self.assertEqual(len(stage_threads), 1)
+        self.assertTrue(stage_threads[0].startswith('conversions'))
+
+    async def test_osw2osm_is_given_the_formatter_executor(self):
+        with tempfile.TemporaryDirectory() as tmpdir, ThreadPoolExecutor(max_workers=1) as pool:
+            formatter = Formatter(workdir=tmpdir, file_path=TEST_OSW_FILE, executor=pool)
+            for method in ('osw2osm', 'osw2osm_async'):
+                with self.subTest(method=method), patch('src.osm_osw_reformatter.OSW2OSM') as converter:
+                    converter.return_value.convert.return_value = Response(status=True)
+                    converter.return_value.convert_async = AsyncMock(return_value=Response(status=True))
+                    result = getattr(formatter, method)()
+                    if method == 'osw2osm_async':
+                        await result
+
+                    self.assertIs(converter.call_args.kwargs['executor'], formatter.executor)
+
+    async def test_osm2osw_runs_whole_in_a_process(self):
+        config = FormatterConfig(validate_output=False)
+        with tempfile.TemporaryDirectory() as tmpdir, ProcessPoolExecutor(max_workers=1) as pool:
+            expected = await OSM2OSW(prefix='thread', osm_file=TEST_PBF_FILE, workdir=tmpdir, config=config).convert()
+            reported = []
+            converter = OSM2OSW(
+                prefix='process',
+                osm_file=TEST_PBF_FILE,
+                workdir=tmpdir,
+                config=config,
+                executor=pool,
+                metrics_hook=reported.append,
+            )
+            result = await converter.convert()
+
+            self.assertTrue(result.status, msg=result.error)
+            # Stages measured in the worker reach the hook in this process.
+            self.assertEqual(reported, result.metrics)
+            self.assertEqual([stage.stage for stage in reported], [stage.stage for stage in expected.metrics])
+            self.assertEqual(converter.generated_files, result.generated_files)
+            for produced, reference in zip(result.generated_files, expected.generated_files):
+                with open(produced, 'rb') as f, open(reference, 'rb') as g:
+                    self.assertEqual(f.read(), g.read())
+
+    async def test_process_failures_become_failed_responses(self):
+        # A worker that dies breaks the pool; a mock cannot be pickled at all.
+        for convert_in_process in (crash_worker, MagicMock()):
+            with tempfile.TemporaryDirectory() as tmpdir, ProcessPoolExecutor(max_workers=1) as pool:
+                converters = {
+                    'osm2osw': OSM2OSW(prefix='process', osm_file=TEST_PBF_FILE, workdir=tmpdir, executor=pool),
+                    'osw2osm': OSW2OSM(zip_file_path=TEST_OSW_FILE, workdir=tmpdir, prefix='process', executor=pool),
+                }
+                for name, converter in converters.items():
+                    with self.subTest(convert_in_process=convert_in_process, converter=name), \
+                            patch(f'{type(converter).__module__}._convert_in_process', convert_in_process):
+                        convert = converter.convert if name == 'osm2osw' else converter.convert_async
+                        result = await convert()
+
+                        self.assertFalse(result.status)
+                        self.assertTrue(result.error)
+
+
+if __name__ == '__main__':
+    unittest.main()
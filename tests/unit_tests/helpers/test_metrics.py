@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import MagicMock
+
+from src.osm_osw_reformatter.helpers.metrics import ConversionMetrics, StageMetrics, peak_rss
+
+
+class TestConversionMetrics(unittest.TestCase):
+    def test_stages_are_recorded_in_order(self):
+        metrics = ConversionMetrics()
+
+        with metrics.stage('parse'):
+            sum(range(10000))
+        with metrics.stage('write'):
+            pass
+
+        self.assertEqual([stage.stage for stage in metrics.stages], ['parse', 'write'])
+        for stage in metrics.stages:
+            self.assertGreaterEqual(stage.wall_time, 0)
+            self.assertGreaterEqual(stage.cpu_time, 0)
+
+    def test_failed_stage_is_still_recorded(self):
+        metrics = ConversionMetrics()
+
+        with self.assertRaises(ValueError):
+            with metrics.stage('simplify'):
+                raise ValueError('boom')
+
+        self.assertEqual([stage.stage for stage in metrics.stages], ['simplify'])
+
+    def test_hook_sees_each_stage_as_it_finishes(self):
+        hook = MagicMock()
+        metrics = ConversionMetrics(hook)
+
+        with metrics.stage('parse'):
+            hook.assert_not_called()
+
+        hook.assert_called_once_with(metrics.stages[0])
+
+    def test_failing_hook_does_not_fail_the_stage(self):
+        metrics = ConversionMetrics(MagicMock(side_effect=RuntimeError('exporter down')))
+
+        with metrics.stage('write'):
+            pass
+
+        self.assertEqual(len(metrics.stages), 1)
+
+    def test_extend_reports_stages_measured_elsewhere(self):
+        hook = MagicMock()
+        measured = [StageMetrics('parse', 1.0, 0.5, 1024), StageMetrics('write', 2.0, 1.5, 2048)]
+
+        metrics = ConversionMetrics(hook)
+        metrics.extend(measured)
+        metrics.extend(None)
+
+        self.assertEqual(metrics.stages, measured)
+        self.assertEqual([call.args[0] for call in hook.call_args_list], measured)
+
+    def test_peak_rss_is_in_bytes(self):
+        peak = peak_rss()
+
+        if peak is not None:
+            # Any Python process holds well over a megabyte.
+            self.assertGreater(peak, 1024 * 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
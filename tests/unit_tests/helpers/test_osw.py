@@ -213,6 +213,61 @@ class TestOSWHelper(unittest.TestCase):
         self.assertTrue(os.path.exists(output_path))
         self.assertTrue(Path(output_path).is_file())
 
+    def test_merge_writes_features_of_every_file_in_order(self):
+        osm_files = {file: file for file in self.geojson_files.keys()}
+        output_path = OSWHelper.merge(osm_files=osm_files, output=OUTPUT_DIR, prefix='test')
+
+        with open(output_path) as f:
+            merged = json.load(f)
+        os.remove(output_path)
+
+        self.assertEqual(merged['type'], 'FeatureCollection')
+        self.assertEqual(
+            [feature['geometry']['coordinates'] for feature in merged['features']],
+            [[1, 2], [3, 4]],
+        )
+
+    def test_merge_without_files_writes_empty_collection(self):
+        output_path = OSWHelper.merge(osm_files={}, output=OUTPUT_DIR, prefix='empty')
+
+        with open(output_path) as f:
+            merged = json.load(f)
+        os.remove(output_path)
+
+        self.assertEqual(merged, {'type': 'FeatureCollection', 'features': []})
+
+    def test_merge_archive_matches_merge_of_extracted_files(self):
+        zip_file_path = f'{OUTPUT_DIR}/test_merge_archive.zip'
+        with zipfile.ZipFile(zip_file_path, 'w') as zf:
+            for kind, filename in zip(('nodes', 'points'), self.geojson_files):
+                zf.write(filename, f'dataset/{kind}.geojson')
+        with open(zip_file_path, 'rb') as f:
+            contents = f.read()
+
+        merged_from_path = Path(OSWHelper.merge_archive(zip_file_path, output=OUTPUT_DIR, prefix='from_path'))
+        merged_from_bytes = Path(OSWHelper.merge_archive(contents, output=OUTPUT_DIR, prefix='from_bytes'))
+        extracted = OSWHelper.unzip(zip_file=zip_file_path, output=OUTPUT_DIR)
+        merged = Path(OSWHelper.merge(osm_files=extracted, output=OUTPUT_DIR, prefix='extracted'))
+
+        self.assertFalse(os.path.exists(f'{OUTPUT_DIR}/dataset/nodes.geojson'))
+        self.assertEqual(merged_from_path.read_bytes(), merged.read_bytes())
+        self.assertEqual(merged_from_bytes.read_bytes(), merged.read_bytes())
+
+        for path in (merged_from_path, merged_from_bytes, merged):
+            os.remove(path)
+        os.rmdir(f'{OUTPUT_DIR}/dataset')
+        os.remove(zip_file_path)
+
+    def test_dataset_members(self):
+        members = OSWHelper.dataset_members([
+            '__MACOSX/osw/._nodes.geojson',
+            'osw/nodes.geojson',
+            'osw/edges.geojson',
+            'readme.txt',
+        ])
+
+        self.assertEqual(members, {'nodes': 'osw/nodes.geojson', 'edges': 'osw/edges.geojson'})
+
     def test_cleanup_of_temp_files(self):
         osm_files = {file: file for file in self.geojson_files.keys()}
         output_path = OSWHelper.merge(osm_files=osm_files, output=OUTPUT_DIR, prefix='test')
@@ -9,6 +9,7 @@ class TestResponseClass(unittest.TestCase):
         self.assertTrue(response.status)
         self.assertIsNone(response.generated_files)
         self.assertIsNone(response.error)
+        self.assertIsNone(response.metrics)
 
     def test_custom_values(self):
         files = ['file1.txt', 'file2.txt']
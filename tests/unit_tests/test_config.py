@@ -49,6 +49,74 @@ class TestFormatterConfig(unittest.TestCase):
         with self.assertRaises(TypeError):
             FormatterConfig(validate_output="yes")
 
+    def test_location_index_defaults_to_flex_mem(self):
+        self.assertEqual(FormatterConfig().location_index, "flex_mem")
+
+    def test_location_index_accepts_osmium_index_types(self):
+        for location_index in (
+            "sparse_mem_array",
+            "dense_mmap_array",
+            "dense_file_array,/tmp/locations.idx",
+        ):
+            with self.subTest(location_index=location_index):
+                config = FormatterConfig(location_index=location_index)
+                self.assertEqual(config.location_index, location_index)
+
+    def test_location_index_must_be_string(self):
+        with self.assertRaises(TypeError):
+            FormatterConfig(location_index=None)
+
+    def test_location_index_must_be_known_type(self):
+        with self.assertRaises(ValueError):
+            FormatterConfig(location_index="btree_mem")
+
+    def test_file_backed_location_index_must_name_its_file(self):
+        with self.assertRaises(ValueError):
+            FormatterConfig(location_index="dense_file_array")
+
+    def test_formatter_accepts_location_index_override(self):
+        with TemporaryDirectory() as tmpdir:
+            formatter = Formatter(
+                workdir=tmpdir,
+                file_path="test.osm",
+                location_index="sparse_mem_array",
+            )
+
+        self.assertEqual(formatter.config.location_index, "sparse_mem_array")
+
+    def test_graph_backend_defaults_to_networkx(self):
+        self.assertEqual(FormatterConfig().graph_backend, "networkx")
+
+    def test_graph_backend_must_be_known(self):
+        with self.assertRaises(ValueError):
+            FormatterConfig(graph_backend="csr")
+        with self.assertRaises(TypeError):
+            FormatterConfig(graph_backend=1)
+
+    def test_compact_geojson_defaults_to_false(self):
+        self.assertFalse(FormatterConfig().compact_geojson)
+
+    def test_compact_geojson_must_be_boolean(self):
+        with self.assertRaises(TypeError):
+            FormatterConfig(compact_geojson="yes")
+
+    def test_json_backend_defaults_to_stdlib(self):
+        self.assertEqual(FormatterConfig().json_backend, "json")
+
+    def test_json_backend_must_be_known(self):
+        with self.assertRaises(ValueError):
+            FormatterConfig(json_backend="ujson")
+        with self.assertRaises(TypeError):
+            FormatterConfig(json_backend=None)
+
+    def test_validation_cache_is_off_by_default(self):
+        self.assertIsNone(FormatterConfig().validation_cache_dir)
+
+    def test_validation_cache_dir_must_be_a_path(self):
+        self.assertEqual(FormatterConfig(validation_cache_dir="/tmp/cache").validation_cache_dir, "/tmp/cache")
+        with self.assertRaises(TypeError):
+            FormatterConfig(validation_cache_dir=True)
+
 
 if __name__ == "__main__":
     unittest.main()
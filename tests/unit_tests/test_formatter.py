@@ -1,9 +1,12 @@
 import os
 import shutil
 import asyncio
+import tempfile
 import unittest
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from unittest.mock import patch
-from src.osm_osw_reformatter import Formatter
+from src.osm_osw_reformatter import Formatter, FormatterConfig, _convert_job, _job_response
 from src.osm_osw_reformatter.helpers.response import Response
 
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -103,7 +106,84 @@ class TestFormatter(unittest.TestCase):
         self.assertTrue(result.status)
         self.assertEqual(formatter.generated_files, [mock_response.generated_files])
 
+    @patch("src.osm_osw_reformatter.OSW2OSM.convert_async")
+    def test_osw2osm_async_successful(self, mock_convert):
+        mock_response = Response(status=True, generated_files='output.osm')
+        mock_convert.return_value = mock_response
+
+        formatter = Formatter(file_path=self.osw_file_path, workdir=OUTPUT_DIR)
+        result = asyncio.run(formatter.osw2osm_async())
+
+        mock_convert.assert_awaited_once()
+        self.assertTrue(result.status)
+        self.assertEqual(formatter.generated_files, [mock_response.generated_files])
+
+
+class TestConvertMany(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir, True)
+
+    def test_each_input_gets_its_own_workdir_and_response(self):
+        responses = Formatter.convert_many(
+            [TEST_PBF_FILE, 'missing.pbf', TEST_PBF_FILE],
+            workdir=self.workdir,
+            max_workers=2,
+            validate_output=False,
+        )
+
+        self.assertEqual(len(responses), 3)
+        self.assertTrue(responses[0].status, msg=responses[0].error)
+        self.assertFalse(responses[1].status)
+        self.assertTrue(responses[2].status, msg=responses[2].error)
+        for index in (0, 2):
+            for file_path in responses[index].generated_files:
+                self.assertEqual(os.path.dirname(file_path), os.path.join(self.workdir, str(index)))
+        self.assertEqual(
+            [os.path.basename(path) for path in responses[0].generated_files],
+            [os.path.basename(path) for path in responses[2].generated_files],
+        )
+
+    def test_no_inputs(self):
+        self.assertEqual(Formatter.convert_many([], workdir=self.workdir), [])
+
+    def test_options_are_checked_before_any_work_starts(self):
+        with self.assertRaises(ValueError):
+            Formatter.convert_many([TEST_PBF_FILE], workdir=self.workdir, max_workers=0)
+        with self.assertRaises(TypeError):
+            Formatter.convert_many([TEST_PBF_FILE], workdir=self.workdir, compact_geojson='yes')
+        for option in ('executor', 'metrics_hook'):
+            with self.subTest(option=option), self.assertRaises(TypeError):
+                Formatter.convert_many([TEST_PBF_FILE], workdir=self.workdir, **{option: None})
+
+    @patch("src.osm_osw_reformatter.OSW2OSM.convert")
+    def test_archives_convert_osw_to_osm(self, mock_convert):
+        mock_convert.return_value = Response(status=True, generated_files='out.xml')
+
+        archive = b'PK\x05\x06'
+        for file_path in (TEST_OSW_FILE, archive, bytearray(archive), memoryview(archive)):
+            result = _convert_job(file_path, self.workdir, 'final', FormatterConfig())
+            self.assertEqual(result.generated_files, 'out.xml')
+        self.assertEqual(mock_convert.call_count, 4)
+
+    @patch("src.osm_osw_reformatter.OSW2OSM.convert")
+    def test_archive_memoryviews_reach_the_workers(self, mock_convert):
+        mock_convert.return_value = Response(status=True, generated_files='out.xml')
+
+        with patch('src.osm_osw_reformatter.ProcessPoolExecutor', ThreadPoolExecutor):
+            responses = Formatter.convert_many([memoryview(b'PK\x05\x06')], workdir=self.workdir)
+
+        self.assertTrue(responses[0].status, msg=responses[0].error)
+        mock_convert.assert_called_once()
+
+    def test_worker_failures_become_failed_responses(self):
+        future = Future()
+        future.set_exception(BrokenProcessPool('A process in the process pool was terminated abruptly'))
+
+        response = _job_response(future)
 
+        self.assertFalse(response.status)
+        self.assertIn('terminated abruptly', response.error)
 
 
 if __name__ == '__main__':
@@ -6,6 +6,8 @@ import zipfile
 from pathlib import Path
 from unittest.mock import patch
 
+import osmium
+
 from src.osm_osw_reformatter.config import FormatterConfig
 from src.osm_osw_reformatter.helpers.input_validation import (
     INVALID_OSW_INPUT_ERROR,
@@ -16,8 +18,13 @@ from src.osm_osw_reformatter.helpers.input_validation import (
     format_issues,
     format_validation_error,
     osm_exceeds_coordinate_precision,
+    osm_node_precision_check,
+    osm_pbf_precision_offenders,
+    osm_xml_precision_offenders,
+    pbf_file_blocks,
     validate_osm_input,
     validate_osw_input,
+    _pbf_scan_spans,
 )
 from src.osm_osw_reformatter.helpers.output_validation import (
     INVALID_OSW_OUTPUT_ERROR,
@@ -36,6 +43,70 @@ INVALID_OSW_ZIP = FIXTURE_DIR / 'invalid_osw.zip'
 VALID_OSM_XML = FIXTURE_DIR / 'valid_osm.xml'
 INVALID_OSM_XML = FIXTURE_DIR / 'invalid_osm.xml'
 CORRUPT_OSM_XML = FIXTURE_DIR / 'corrupt_osm.xml'
+OSM_PBF = Path(__file__).parents[1] / 'test_files' / 'wa.microsoft.osm.pbf'
+
+
+class TestValidationCache(unittest.TestCase):
+    VALIDATOR = 'src.osm_osw_reformatter.helpers.input_validation.OSWValidation'
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        self.config = FormatterConfig(validation_cache_dir=self.cache_dir.name)
+
+    def test_repeated_invalid_archive_is_answered_from_the_cache(self):
+        with self.assertRaises(InputValidationError) as first:
+            validate_osw_input(str(INVALID_OSW_ZIP), config=self.config)
+
+        with patch(self.VALIDATOR) as validator:
+            with self.assertRaises(InputValidationError) as second:
+                validate_osw_input(str(INVALID_OSW_ZIP), config=self.config)
+
+        validator.assert_not_called()
+        self.assertEqual(second.exception.issues, first.exception.issues)
+        self.assertEqual(str(second.exception), str(first.exception))
+
+    def test_repeated_valid_archive_is_answered_from_the_cache(self):
+        validate_osw_input(str(VALID_OSW_ZIP), config=self.config)
+
+        with patch(self.VALIDATOR) as validator:
+            validate_osw_input(str(VALID_OSW_ZIP), config=self.config)
+
+        validator.assert_not_called()
+
+    def test_cache_is_keyed_by_content_and_settings(self):
+        validate_osw_input(str(VALID_OSW_ZIP), config=self.config)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            renamed = Path(tmpdir, 'renamed.zip')
+            renamed.write_bytes(VALID_OSW_ZIP.read_bytes())
+            with patch(self.VALIDATOR) as validator:
+                validate_osw_input(str(renamed), config=self.config)
+            validator.assert_not_called()
+
+        stricter = FormatterConfig(validation_cache_dir=self.cache_dir.name, coordinate_precision=3)
+        with patch(self.VALIDATOR) as validator:
+            validator.return_value.validate.return_value.is_valid = True
+            validate_osw_input(str(VALID_OSW_ZIP), config=stricter)
+        validator.assert_called_once()
+
+    def test_unreadable_cache_entries_are_revalidated(self):
+        validate_osw_input(str(VALID_OSW_ZIP), config=self.config)
+        for entry in Path(self.cache_dir.name).iterdir():
+            entry.write_text('not json')
+
+        with patch(self.VALIDATOR) as validator:
+            validator.return_value.validate.return_value.is_valid = True
+            validate_osw_input(str(VALID_OSW_ZIP), config=self.config)
+
+        validator.assert_called_once()
+
+    def test_failures_to_run_the_validator_are_not_cached(self):
+        with patch(self.VALIDATOR, side_effect=RuntimeError('boom')):
+            with self.assertRaises(InputValidationError):
+                validate_osw_input(str(VALID_OSW_ZIP), config=self.config)
+
+        self.assertEqual(list(Path(self.cache_dir.name).iterdir()), [])
 
 
 class TestValidateOSWInput(unittest.TestCase):
@@ -133,7 +204,7 @@ class TestOSW2OSMInputValidation(unittest.TestCase):
 
     def test_invalid_dataset_is_rejected_before_conversion(self):
         with tempfile.TemporaryDirectory() as tmpdir:
-            with patch('src.osm_osw_reformatter.osw2osm.osw2osm.OSWHelper.unzip') as unzip:
+            with patch('src.osm_osw_reformatter.osw2osm.osw2osm.OSWHelper.merge_archive') as merge_archive:
                 result = OSW2OSM(
                     zip_file_path=str(INVALID_OSW_ZIP),
                     workdir=tmpdir,
@@ -141,7 +212,7 @@ class TestOSW2OSMInputValidation(unittest.TestCase):
                 ).convert()
 
         self.assertFalse(result.status)
-        unzip.assert_not_called()
+        merge_archive.assert_not_called()
 
     def test_validation_can_be_switched_off(self):
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -265,6 +336,40 @@ class TestValidateOSMInput(unittest.TestCase):
                     msg=f'lat={latitude}',
                 )
 
+    def test_unusual_coordinate_spellings_count_like_decimal(self):
+        """Exponents and padding fall back to `Decimal`; plain digits are counted."""
+        cases = {
+            '47.12345678': True,
+            '-122.1234567': False,
+            '+47.12345678': True,
+            '.12345678': True,
+            '47.': False,
+            '1.5e-9': True,
+            '4712345678e-8': True,
+            '1.2345678E3': False,
+            ' 47.12345678 ': True,
+            'NaN': False,
+            'not-a-number': False,
+        }
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            osm_path = Path(tmpdir, 'spellings.xml')
+            osm_path.write_text(
+                '<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6">\n'
+                + ''.join(
+                    f'  <node id="{index}" lat="{latitude}" lon="-122.3095000" version="1"/>\n'
+                    for index, latitude in enumerate(cases)
+                )
+                + '  <node id="missing" lon="-122.30950001" version="1"/>\n</osm>\n'
+            )
+
+            offenders = osm_xml_precision_offenders(str(osm_path), 7)
+
+        expected = [str(index) for index, rejected in enumerate(cases.values()) if rejected]
+        self.assertEqual([offender['id'] for offender in offenders], expected + ['missing'])
+        self.assertEqual(offenders[-1]['lat'], None)
+        self.assertEqual(offenders[-1]['decimals'], 8)
+
     def test_corrupt_file_raises_a_readable_error(self):
         with self.assertRaises(OSMFileCorruptError) as ctx:
             validate_osm_input(str(CORRUPT_OSM_XML))
@@ -310,6 +415,58 @@ class TestValidateOSMInput(unittest.TestCase):
         self.assertFalse(osm_exceeds_coordinate_precision(str(pbf_path), 7))
         self.assertTrue(osm_exceeds_coordinate_precision(str(pbf_path), 2))
 
+    def test_pbf_scan_across_processes_matches_the_serial_scan(self):
+        blocks = pbf_file_blocks(str(OSM_PBF))
+        self.assertEqual(blocks[0][0], 'OSMHeader')
+        self.assertEqual(sum(length for _type, _offset, length in blocks), OSM_PBF.stat().st_size)
+
+        serial = osm_pbf_precision_offenders(str(OSM_PBF), 5)
+        parallel = osm_pbf_precision_offenders(str(OSM_PBF), 5, workers=2, span_bytes=1)
+
+        self.assertTrue(serial)
+        self.assertEqual(parallel, serial)
+
+    def test_pbf_scan_groups_blocks_into_spans(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pbf_path = str(Path(tmpdir, 'blocks.osm.pbf'))
+            writer = osmium.SimpleWriter(pbf_path)
+            # osmium writes at most 8000 nodes per block; every 7000th node
+            # carries 7 decimals, so offenders fall in each block.
+            for node_id in range(1, 30001):
+                lon = round(-122.3 + node_id * 1e-5, 5) + (3e-7 if node_id % 7000 == 0 else 0)
+                writer.add_node(osmium.osm.mutable.Node(id=node_id, location=osmium.osm.Location(lon, 47.6)))
+            writer.close()
+            blocks = pbf_file_blocks(pbf_path)
+            span_bytes = max(length for _type, _offset, length in blocks[1:]) * 2
+
+            serial = osm_pbf_precision_offenders(pbf_path, 5)
+            parallel = osm_pbf_precision_offenders(pbf_path, 5, workers=2, span_bytes=span_bytes)
+
+        self.assertEqual(len(blocks), 5)
+        self.assertEqual(len(_pbf_scan_spans(blocks, span_bytes)), 2)
+        self.assertEqual([offender['id'] for offender in serial], [7000, 14000, 21000, 28000])
+        self.assertEqual(parallel, serial)
+
+    def test_pbf_scan_stays_in_process_by_default(self):
+        with patch('src.osm_osw_reformatter.helpers.input_validation.ProcessPoolExecutor') as pool:
+            offenders = osm_pbf_precision_offenders(str(OSM_PBF), 5)
+
+        self.assertTrue(offenders)
+        pool.assert_not_called()
+        with self.assertRaises(ValueError):
+            osm_pbf_precision_offenders(str(OSM_PBF), 5, workers=0)
+
+    def test_files_that_do_not_split_into_pbf_blocks_are_left_to_osmium(self):
+        self.assertIsNone(pbf_file_blocks(str(VALID_OSM_XML)))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            truncated = Path(tmpdir, 'truncated.osm.pbf')
+            truncated.write_bytes(OSM_PBF.read_bytes()[:-100])
+
+            self.assertIsNone(pbf_file_blocks(str(truncated)))
+            with self.assertRaises(OSMFileCorruptError):
+                osm_pbf_precision_offenders(str(truncated), 5, workers=2)
+
 
 class TestOSM2OSWInputValidation(unittest.TestCase):
     def _convert(self, osm_file, config=None):
@@ -365,6 +522,28 @@ class TestOSM2OSWInputValidation(unittest.TestCase):
         self.assertTrue(result.status, msg=result.error)
         self.assertTrue(result.generated_files)
 
+    def test_pbf_precision_is_checked_during_the_graph_pass(self):
+        expected = OSMCoordinatePrecisionError(2, osm_pbf_precision_offenders(str(OSM_PBF), 2))
+
+        with patch(
+            'src.osm_osw_reformatter.helpers.input_validation.osm_pbf_precision_offenders'
+        ) as separate_scan:
+            result = self._convert(OSM_PBF, config=FormatterConfig(coordinate_precision=2))
+
+        separate_scan.assert_not_called()
+        self.assertFalse(result.status)
+        self.assertEqual(result.generated_files, [])
+        self.assertEqual(result.error, str(expected))
+
+    def test_only_pbf_input_is_left_to_the_graph_pass(self):
+        self.assertIsNone(osm_node_precision_check(str(VALID_OSM_XML)))
+        with self.assertRaises(OSMCoordinatePrecisionError):
+            osm_node_precision_check(str(INVALID_OSM_XML))
+        # osmium cannot read a PBF coordinate finer than 7 decimals.
+        self.assertIsNone(osm_node_precision_check(str(OSM_PBF)))
+        check = osm_node_precision_check(str(OSM_PBF), FormatterConfig(coordinate_precision=2))
+        self.assertEqual(check.offenders, [])
+
 
 class TestValidateOSWOutput(unittest.TestCase):
     SCHEMA = 'https://sidewalks.washington.edu/opensidewalks/0.3/schema.json'
@@ -440,9 +619,9 @@ class TestOSM2OSWOutputValidation(unittest.TestCase):
     @staticmethod
     def _break_edges(original):
         """Make the generated edges non-compliant after they are written."""
-        def wrapper(cls, workdir, filename, og):
+        def wrapper(cls, workdir, filename, og, **kwargs):
             async def _inner():
-                paths = await original.__func__(cls, workdir, filename, og)
+                paths = await original.__func__(cls, workdir, filename, og, **kwargs)
                 for path in paths:
                     if path.endswith('edges.geojson'):
                         with open(path) as f:
@@ -41,6 +41,29 @@ class TestOSM2OSW(unittest.IsolatedAsyncioTestCase):
 
         asyncio.run(run_test())
 
+    async def test_convert_reports_stage_metrics(self):
+        reported = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            result = await OSM2OSW(
+                osm_file=TEST_FILE, workdir=tmpdir, prefix='test', metrics_hook=reported.append
+            ).convert()
+
+        self.assertTrue(result.status, msg=result.error)
+        self.assertEqual(
+            [stage.stage for stage in result.metrics],
+            ['input_validation', 'parse', 'simplify', 'construct_geometries', 'write', 'output_validation'],
+        )
+        self.assertEqual(reported, result.metrics)
+        self.assertTrue(all(stage.wall_time >= 0 and stage.cpu_time >= 0 for stage in result.metrics))
+
+    async def test_failed_convert_reports_metrics_up_to_the_failure(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            missing = os.path.join(tmpdir, 'missing.osm.pbf')
+            result = await OSM2OSW(osm_file=missing, workdir=tmpdir, prefix='test').convert()
+
+        self.assertFalse(result.status)
+        self.assertEqual([stage.stage for stage in result.metrics][-1], 'parse')
+
     def test_generated_files(self):
         osm_file_path = TEST_FILE
 
@@ -1,10 +1,15 @@
+import asyncio
 import json
 import math
 import os
+import threading
+import time
 from pathlib import Path
 import tempfile
 import zipfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
 from src.osm_osw_reformatter.config import FormatterConfig
 from src.osm_osw_reformatter.osw2osm.osw2osm import OSW2OSM
 import xml.etree.ElementTree as ET
@@ -117,6 +122,18 @@ class TestOSW2OSM(unittest.IsolatedAsyncioTestCase):
         self.assertTrue(result.status)
         os.remove(result.generated_files)
 
+    def test_convert_accepts_archive_contents(self):
+        with open(TEST_VALID_OSW_ZIP_FILE, 'rb') as f:
+            contents = f.read()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            from_path = OSW2OSM(zip_file_path=TEST_VALID_OSW_ZIP_FILE, workdir=tmpdir, prefix='path').convert()
+            from_bytes = OSW2OSM(zip_file_path=contents, workdir=tmpdir, prefix='bytes').convert()
+
+            self.assertTrue(from_bytes.status, msg=from_bytes.error)
+            self.assertEqual(Path(from_bytes.generated_files).read_bytes(), Path(from_path.generated_files).read_bytes())
+            self.assertEqual(sorted(os.listdir(tmpdir)), ['bytes.graph.osm.xml', 'path.graph.osm.xml'])
+
     def test_generated_file(self):
         zip_file = TEST_ZIP_FILE
         osw2osm = OSW2OSM(zip_file_path=zip_file, workdir=OUTPUT_DIR, prefix='test', config=NO_INPUT_VALIDATION)
@@ -258,7 +275,7 @@ class TestOSW2OSM(unittest.IsolatedAsyncioTestCase):
         with open(xml_path, 'w') as fh:
             fh.write(xml_content)
 
-        OSW2OSM._ensure_version_attribute(Path(xml_path))
+        OSW2OSM._postprocess_osm_xml(Path(xml_path))
 
         tree = ET.parse(xml_path)
         root = tree.getroot()
@@ -327,7 +344,6 @@ class TestOSW2OSM(unittest.IsolatedAsyncioTestCase):
         osw2osm = OSW2OSM(zip_file_path=zip_file, workdir=OUTPUT_DIR, prefix='sequential', config=NO_INPUT_VALIDATION)
         result = osw2osm.convert()
 
-        OSW2OSM._remap_ids_to_sequential(Path(result.generated_files))
         tree = ET.parse(result.generated_files)
         root = tree.getroot()
 
@@ -361,7 +377,7 @@ class TestOSW2OSM(unittest.IsolatedAsyncioTestCase):
 </osm>"""
             )
 
-            OSW2OSM._remap_ids_to_sequential(xml_path)
+            OSW2OSM._postprocess_osm_xml(xml_path)
 
             root = ET.parse(xml_path).getroot()
             node_ids = [n.get("id") for n in root.findall(".//node")]
@@ -385,6 +401,45 @@ class TestOSW2OSM(unittest.IsolatedAsyncioTestCase):
             rel_tag_ids = [tag.get("v") for tag in root.findall(".//relation/tag[@k='_id']")]
             self.assertEqual(rel_tag_ids, ["1"])
 
+    def test_postprocess_rewrites_ogr2osm_output(self):
+        xml_content = """<?xml version="1.0"?>
+<osm version="0.6" generator="ogr2osm">
+  <node visible="true" id="-5" lat="0" lon="0"><tag k="_id" v="-5"/></node>
+  <node visible="true" id="-7" lat="1" lon="1" version=""/>
+  <way visible="true" id="-9"><nd ref="-5"/><tag k="_id" v="-9"/></way>
+  <way visible="true" id="-10" version="3"><nd ref="-5"/><nd ref="-7"/></way>
+  <relation visible="true" id="-1"><member type="relation" ref="-2" role=""/></relation>
+  <relation visible="true" id="-2"><member type="way" ref="-10" role="outer"/></relation>
+</osm>
+"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            xml_path = Path(tmpdir, "output.osm.xml")
+            xml_path.write_text(xml_content)
+
+            entities = OSW2OSM._postprocess_osm_xml(xml_path)
+
+            self.assertEqual(entities, 6)
+            # The single-node way gets its node again, every element a version
+            # and every id, reference and member a sequential number.
+            self.assertEqual(xml_path.read_text(), """<?xml version='1.0' encoding='utf-8'?>
+<osm version="0.6" generator="ogr2osm">
+  <node visible="true" id="1" lat="0" lon="0" version="1"><tag k="_id" v="1" /></node>
+  <node visible="true" id="2" lat="1" lon="1" version="1" />
+  <way visible="true" id="1" version="1"><nd ref="1" /><nd ref="1" /><tag k="_id" v="1" /></way>
+  <way visible="true" id="2" version="3"><nd ref="1" /><nd ref="2" /></way>
+  <relation visible="true" id="1" version="1"><member type="relation" ref="2" role="" /></relation>
+  <relation visible="true" id="2" version="1"><member type="way" ref="2" role="outer" /></relation>
+</osm>""")
+            self.assertEqual(os.listdir(tmpdir), ["output.osm.xml"])
+
+    def test_postprocess_counts_no_entities_in_empty_output(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            xml_path = Path(tmpdir, "empty.osm.xml")
+            xml_path.write_text('<?xml version="1.0"?>\n<osm version="0.6">\n</osm>\n')
+
+            self.assertEqual(OSW2OSM._postprocess_osm_xml(xml_path), 0)
+            self.assertEqual(ET.parse(xml_path).getroot().tag, "osm")
+
     def test_convert_preserves_way_geometry_when_osw_node_ids_overlap_generated_ids(self):
         with tempfile.TemporaryDirectory() as tmpdir:
             zip_path = Path(tmpdir, "overlapping_ids.zip")
@@ -483,5 +538,152 @@ class TestOSW2OSM(unittest.IsolatedAsyncioTestCase):
         )
 
 
+SMALL_OSM_XML = (
+    "<?xml version='1.0' encoding='utf-8'?>\n"
+    '<osm version="0.6"><node id="-5" lat="47.6" lon="-122.3" /><node id="-7" lat="47.7" lon="-122.3" />'
+    '<way id="-9"><nd ref="-5" /><nd ref="-7" /><tag k="highway" v="footway" /></way></osm>'
+)
+
+
+def _write_small_osm(converter, input_file):
+    converter.output_file.write_text(SMALL_OSM_XML)
+    return converter.output_file
+
+
+class TestOSW2OSMAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_convert_async_matches_convert(self):
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                patch.object(OSW2OSM, '_write_osm', autospec=True, side_effect=_write_small_osm):
+            expected = OSW2OSM(zip_file_path=TEST_ZIP_FILE, workdir=tmpdir, prefix='sync', config=NO_INPUT_VALIDATION).convert()
+            result = await OSW2OSM(
+                zip_file_path=TEST_ZIP_FILE, workdir=tmpdir, prefix='async', config=NO_INPUT_VALIDATION
+            ).convert_async()
+
+            self.assertTrue(result.status, msg=result.error)
+            self.assertEqual(Path(result.generated_files).read_bytes(), Path(expected.generated_files).read_bytes())
+            self.assertEqual(sorted(os.listdir(tmpdir)), ['async.graph.osm.xml', 'sync.graph.osm.xml'])
+
+    async def test_stages_run_on_the_given_executor(self):
+        stage_threads = []
+
+        def recording_write(converter, input_file):
+            stage_threads.append(threading.current_thread().name)
+            return _write_small_osm(converter, input_file)
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix='conversions') as pool, \
+                patch.object(OSW2OSM, '_write_osm', autospec=True, side_effect=recording_write):
+            result = await OSW2OSM(
+                zip_file_path=TEST_ZIP_FILE, workdir=tmpdir, prefix='test', config=NO_INPUT_VALIDATION, executor=pool
+            ).convert_async()
+
+        self.assertTrue(result.status, msg=result.error)
+        self.assertEqual(len(stage_threads), 1)
+        self.assertTrue(stage_threads[0].startswith('conversions'))
+
+    async def test_stage_metrics(self):
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                patch.object(OSW2OSM, '_write_osm', autospec=True, side_effect=_write_small_osm):
+            reported = []
+            result = OSW2OSM(
+                zip_file_path=TEST_VALID_OSW_ZIP_FILE, workdir=tmpdir, prefix='sync', metrics_hook=reported.append
+            ).convert()
+            async_result = await OSW2OSM(
+                zip_file_path=TEST_ZIP_FILE, workdir=tmpdir, prefix='async', config=NO_INPUT_VALIDATION
+            ).convert_async()
+
+        self.assertEqual(
+            [stage.stage for stage in result.metrics],
+            ['input_validation', 'merge', 'ogr2osm', 'postprocess'],
+        )
+        self.assertEqual(reported, result.metrics)
+        self.assertEqual([stage.stage for stage in async_result.metrics], ['merge', 'ogr2osm', 'postprocess'])
+
+    async def test_failed_conversion_reports_metrics_up_to_the_failure(self):
+        result = await OSW2OSM(zip_file_path='test.zip', workdir=OUTPUT_DIR, prefix='test', config=NO_INPUT_VALIDATION).convert_async()
+
+        self.assertFalse(result.status)
+        self.assertEqual([stage.stage for stage in result.metrics], ['merge'])
+
+    async def test_convert_async_error(self):
+        result = await OSW2OSM(zip_file_path='test.zip', workdir=OUTPUT_DIR, prefix='test', config=NO_INPUT_VALIDATION).convert_async()
+
+        self.assertFalse(result.status)
+        self.assertTrue(result.error)
+
+    async def test_stages_do_not_block_the_event_loop(self):
+        def slow_write(converter, input_file):
+            time.sleep(0.3)
+            return _write_small_osm(converter, input_file)
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                patch.object(OSW2OSM, '_write_osm', autospec=True, side_effect=slow_write):
+            ticking = asyncio.create_task(ticker())
+            result = await OSW2OSM(zip_file_path=TEST_ZIP_FILE, workdir=tmpdir, prefix='test', config=NO_INPUT_VALIDATION).convert_async()
+            ticking.cancel()
+
+        self.assertTrue(result.status, msg=result.error)
+        self.assertGreater(ticks, 10)
+
+    async def test_cancel_between_stages_removes_partial_files(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocked_write(converter, input_file):
+            started.set()
+            release.wait(5)
+            return _write_small_osm(converter, input_file)
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                patch.object(OSW2OSM, '_write_osm', autospec=True, side_effect=blocked_write), \
+                patch.object(OSW2OSM, '_postprocess_output') as postprocess:
+            converter = OSW2OSM(zip_file_path=TEST_ZIP_FILE, workdir=tmpdir, prefix='test', config=NO_INPUT_VALIDATION)
+            task = asyncio.create_task(converter.convert_async())
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            task.cancel()
+            await asyncio.sleep(0.05)
+            # The running stage is allowed to finish first.
+            self.assertFalse(task.done())
+            release.set()
+
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            postprocess.assert_not_called()
+            self.assertEqual(os.listdir(tmpdir), [])
+
+    async def test_cancel_during_merge_removes_merged_file(self):
+        started = threading.Event()
+        release = threading.Event()
+        merge = OSW2OSM._merge_input
+
+        def blocked_merge(converter):
+            started.set()
+            release.wait(5)
+            return merge(converter)
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                patch.object(OSW2OSM, '_merge_input', autospec=True, side_effect=blocked_merge), \
+                patch.object(OSW2OSM, '_write_osm') as write_osm:
+            converter = OSW2OSM(zip_file_path=TEST_ZIP_FILE, workdir=tmpdir, prefix='test', config=NO_INPUT_VALIDATION)
+            task = asyncio.create_task(converter.convert_async())
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            task.cancel()
+            await asyncio.sleep(0.05)
+            release.set()
+
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            write_osm.assert_not_called()
+            self.assertEqual(os.listdir(tmpdir), [])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,69 @@
+import json
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from src.osm_osw_reformatter.serializer.geojson_writer import FeatureCollectionWriter
+
+HEADER = {"$schema": "https://example.com/schema.json", "type": "FeatureCollection"}
+FEATURES = [
+    {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [index, 0.5]},
+        "properties": {"_id": str(index), "name": "café\n", "tags": [], "nested": {"a": [1, {}]}},
+    }
+    for index in range(3)
+]
+
+
+class TestFeatureCollectionWriter(unittest.TestCase):
+    def test_indented_output_matches_json_dump(self):
+        for indent in (2, 4):
+            with TemporaryDirectory() as tmpdir:
+                path = os.path.join(tmpdir, "out.geojson")
+                with FeatureCollectionWriter(path, HEADER, indent=indent) as writer:
+                    for feature in FEATURES:
+                        writer.write(feature)
+
+                with open(path) as f:
+                    text = f.read()
+
+            self.assertEqual(text, json.dumps({**HEADER, "features": FEATURES}, indent=indent))
+
+    def test_compact_output(self):
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "out.geojson")
+            with FeatureCollectionWriter(path, HEADER, indent=None) as writer:
+                for feature in FEATURES:
+                    writer.write(feature)
+
+            with open(path) as f:
+                text = f.read()
+
+        self.assertEqual(
+            text,
+            json.dumps({**HEADER, "features": FEATURES}, separators=(",", ":")),
+        )
+        self.assertEqual(writer.count, 3)
+
+    def test_no_features_writes_no_file(self):
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "out.geojson")
+            with FeatureCollectionWriter(path, HEADER):
+                pass
+
+            self.assertFalse(os.path.exists(path))
+
+    def test_error_removes_unfinished_file(self):
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "out.geojson")
+            with self.assertRaises(RuntimeError):
+                with FeatureCollectionWriter(path, HEADER) as writer:
+                    writer.write(FEATURES[0])
+                    raise RuntimeError("stop")
+
+            self.assertFalse(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+
+from shapely.geometry import LineString, Polygon
+
+from src.osm_osw_reformatter.serializer.geometry_cleanup import (
+    clean_feature_geometries,
+    clean_feature_geometry,
+    clean_linestring_geometries,
+    clean_polygon_geometries,
+    clean_polygon_ring,
+    clean_polygons_coords,
+    clean_referenced_polygon_geometries,
+)
+
+SQUARE = [[0, 0], [4, 0], [4, 4], [0, 4], [0, 0]]
+HOLE = [[1, 1], [2, 1], [2, 2], [1, 1]]
+FLAT_RING = [[0, 0], [1, 0], [2, 0], [0, 0]]
+
+
+def feature(geometry_type, coordinates):
+    return {
+        'type': 'Feature',
+        'geometry': {'type': geometry_type, 'coordinates': coordinates},
+        'properties': {'_id': geometry_type},
+    }
+
+
+class TestBulkGeometryCleanup(unittest.TestCase):
+    def test_clean_linestring_geometries(self):
+        geometries = clean_linestring_geometries([
+            [[0, 0], [1, 1], [1, 1], [2, 2]],
+            [[3, 3], [3, 3]],
+            [[0, 0], [0, 1]],
+        ])
+
+        self.assertEqual(geometries[0], LineString([[0, 0], [1, 1], [2, 2]]))
+        self.assertIsNone(geometries[1])
+        self.assertEqual(geometries[2], LineString([[0, 0], [0, 1]]))
+
+    def test_clean_linestring_geometries_keeps_zero_length_lines_when_allowed(self):
+        geometries = clean_linestring_geometries([[[3, 3], [3, 3]]], allow_zero_length_lines=True)
+
+        self.assertEqual(list(geometries[0].coords), [(3, 3), (3, 3)])
+
+    def test_clean_polygons_coords_drops_holes_and_rings_without_area(self):
+        polygons = clean_polygons_coords([
+            [SQUARE, FLAT_RING, HOLE],
+            [FLAT_RING, HOLE],
+            [SQUARE, SQUARE],
+            [],
+        ])
+
+        self.assertEqual(polygons[0], [SQUARE, HOLE])
+        self.assertIsNone(polygons[1])
+        self.assertIsNone(polygons[2])
+        self.assertIsNone(polygons[3])
+
+    def test_clean_polygon_ring_closes_ring(self):
+        self.assertEqual(clean_polygon_ring(SQUARE[:-1]), SQUARE)
+        self.assertIsNone(clean_polygon_ring(FLAT_RING))
+
+    def test_clean_polygon_geometries(self):
+        geometries = clean_polygon_geometries([[SQUARE, HOLE], [FLAT_RING]])
+
+        self.assertEqual(geometries[0], Polygon(SQUARE, [HOLE]))
+        self.assertIsNone(geometries[1])
+
+    def test_clean_referenced_polygon_geometries(self):
+        results = clean_referenced_polygon_geometries([
+            ([(1, (0, 0)), (2, (4, 0)), (2, (4, 0)), (3, (4, 4)), (1, (0, 0))], []),
+            ([(1, (0, 0)), (2, (1, 0)), (1, (0, 0))], []),
+        ])
+
+        self.assertEqual(results[0][0], Polygon([(0, 0), (4, 0), (4, 4)]))
+        self.assertEqual(results[0][1], [1, 2, 3, 1])
+        self.assertEqual(results[1], (None, []))
+
+    def test_clean_feature_geometries_matches_clean_feature_geometry(self):
+        features = [
+            feature('LineString', [[0, 0], [0, 0], [1, 1]]),
+            feature('LineString', [[2, 2], [2, 2]]),
+            feature('Polygon', [SQUARE, FLAT_RING]),
+            feature('Polygon', [FLAT_RING]),
+            feature('MultiLineString', [[[0, 0], [0, 0]], [[0, 0], [1, 0]]]),
+            feature('MultiPolygon', [[FLAT_RING], [FLAT_RING]]),
+            feature('Point', [5, 5]),
+            {'type': 'Feature', 'properties': {}},
+        ]
+
+        for collapsed_to_point in (False, True):
+            for allow_zero_length_lines in (False, True):
+                expected = [
+                    clean_feature_geometry(
+                        item,
+                        collapsed_to_point=collapsed_to_point,
+                        allow_zero_length_lines=allow_zero_length_lines,
+                    )
+                    for item in features
+                ]
+                self.assertEqual(
+                    clean_feature_geometries(
+                        features,
+                        collapsed_to_point=collapsed_to_point,
+                        allow_zero_length_lines=allow_zero_length_lines,
+                    ),
+                    expected,
+                )
+
+    def test_clean_feature_geometries_collapses_to_point(self):
+        cleaned = clean_feature_geometries(
+            [feature('MultiPolygon', [[FLAT_RING]]), feature('LineString', [[2, 2], [2, 2]])],
+            collapsed_to_point=True,
+        )
+
+        self.assertEqual(cleaned[0]['geometry'], {'type': 'Point', 'coordinates': [0, 0]})
+        self.assertEqual(cleaned[1]['geometry'], {'type': 'Point', 'coordinates': [2, 2]})
+
+    def test_clean_feature_geometries_does_not_modify_input(self):
+        item = feature('LineString', [[0, 0], [0, 0], [1, 1]])
+
+        clean_feature_geometries([item])
+
+        self.assertEqual(item['geometry']['coordinates'], [[0, 0], [0, 0], [1, 1]])
+
+    def test_clean_feature_geometries_in_place(self):
+        line = feature('LineString', [[0, 0], [0, 0], [1, 1]])
+        collapsed = feature('LineString', [[2, 2], [2, 2]])
+
+        cleaned = clean_feature_geometries([line, collapsed], collapsed_to_point=True, in_place=True)
+
+        self.assertIs(cleaned[0], line)
+        self.assertEqual(line['geometry']['coordinates'], [[0, 0], [1, 1]])
+        self.assertIs(cleaned[1], collapsed)
+        self.assertEqual(collapsed['geometry'], {'type': 'Point', 'coordinates': [2, 2]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import io
+import json
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from src.osm_osw_reformatter.serializer import json_backend
+from src.osm_osw_reformatter.serializer.geojson_writer import FeatureCollectionWriter
+from src.osm_osw_reformatter.serializer.json_backend import (
+    MsgspecJSON,
+    OrjsonJSON,
+    StdlibJSON,
+    get_json_backend,
+)
+
+DOCUMENT = {
+    "type": "Feature",
+    "geometry": {"type": "LineString", "coordinates": [(-122.3, 47.6), (-122.31, 47.61)]},
+    "properties": {"_id": "1", "width": 1.5, "tags": [], "ext:meta": {"a": [1, None, True]}},
+}
+FAST_BACKENDS = [
+    backend_class.name
+    for backend_class in (OrjsonJSON, MsgspecJSON)
+    if backend_class.available
+]
+
+
+class TestJSONBackend(unittest.TestCase):
+    def test_stdlib_is_the_default(self):
+        self.assertIsInstance(get_json_backend(), StdlibJSON)
+        self.assertEqual(get_json_backend().name, "json")
+
+    def test_stdlib_dumps(self):
+        backend = get_json_backend("json")
+
+        self.assertEqual(backend.dumps(DOCUMENT), json.dumps(DOCUMENT, separators=(",", ":")))
+        self.assertEqual(backend.dumps(DOCUMENT, indent=2), json.dumps(DOCUMENT, indent=2))
+
+    def test_missing_library_falls_back_to_stdlib(self):
+        with patch.object(OrjsonJSON, "available", False), patch.dict(json_backend._backends, clear=True):
+            backend = get_json_backend("orjson")
+
+        self.assertEqual(backend.name, "json")
+
+    def test_fast_backends_match_stdlib(self):
+        expected = json.loads(json.dumps(DOCUMENT))
+        for name in FAST_BACKENDS:
+            with self.subTest(backend=name):
+                backend = get_json_backend(name)
+                self.assertEqual(backend.name, name)
+                self.assertEqual(backend.loads(json.dumps(DOCUMENT).encode()), expected)
+                self.assertEqual(backend.load(io.BytesIO(json.dumps(DOCUMENT).encode())), expected)
+                self.assertEqual(backend.dumps(DOCUMENT), json.dumps(DOCUMENT, separators=(",", ":")))
+                self.assertEqual(backend.dumps(DOCUMENT, indent=2), json.dumps(DOCUMENT, indent=2))
+
+    def test_fast_backends_read_what_stdlib_reads(self):
+        text = '{"properties": {"width": NaN, "incline": -Infinity}}'
+        for name in FAST_BACKENDS:
+            with self.subTest(backend=name):
+                backend = get_json_backend(name)
+                decoded = backend.loads(text.encode())
+                self.assertNotEqual(decoded["properties"]["width"], decoded["properties"]["width"])
+                self.assertEqual(decoded["properties"]["incline"], float("-inf"))
+                with self.assertRaises(json.JSONDecodeError):
+                    backend.loads(b'{"width": }')
+
+    def test_fast_backends_write_the_same_feature_collection(self):
+        header = {"type": "FeatureCollection"}
+        for name in FAST_BACKENDS:
+            with self.subTest(backend=name), TemporaryDirectory() as tmpdir:
+                path = os.path.join(tmpdir, "out.geojson")
+                with FeatureCollectionWriter(path, header, json_backend=get_json_backend(name)) as writer:
+                    writer.write(DOCUMENT)
+                    writer.write(DOCUMENT)
+
+                with open(path) as f:
+                    self.assertEqual(f.read(), json.dumps({**header, "features": [DOCUMENT] * 2}, indent=2))
+
+
+if __name__ == "__main__":
+    unittest.main()
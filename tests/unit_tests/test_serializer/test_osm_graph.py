@@ -4,6 +4,7 @@ import unittest
 from tempfile import TemporaryDirectory
 from unittest.mock import MagicMock, patch
 import networkx as nx
+import pyproj
 from shapely.geometry import LineString, Point, Polygon, mapping, shape
 from src.osm_osw_reformatter.serializer.osm.osm_graph import (
     OSMGraph,
@@ -14,7 +15,10 @@ from src.osm_osw_reformatter.serializer.osm.osm_graph import (
     OSMZoneParser,
     OSMPolygonParser,
     OSMTaggedNodeParser,
+    OSMReader,
 )
+from src.osm_osw_reformatter.config import FormatterConfig
+from src.osm_osw_reformatter.helpers.osw import OSWHelper
 from src.osm_osw_reformatter.serializer.osw.osw_normalizer import (
     OSWLineNormalizer,
     OSWNodeNormalizer,
@@ -23,6 +27,17 @@ from src.osm_osw_reformatter.serializer.osw.osw_normalizer import (
 )
 
 
+TEST_FILES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test_files')
+OSW_FILTERS = (
+    OSWHelper.osw_way_filter,
+    OSWHelper.osw_node_filter,
+    OSWHelper.osw_point_filter,
+    OSWHelper.osw_line_filter,
+    OSWHelper.osw_zone_filter,
+    OSWHelper.osw_polygon_filter,
+)
+
+
 class TestOSMGraph(unittest.TestCase):
     def setUp(self):
         self.mock_graph = nx.MultiDiGraph()
@@ -326,6 +341,19 @@ class TestOSMGraph(unittest.TestCase):
         edges = list(self.mock_graph.edges(data=True))
         self.assertIn("geometry", edges[0][2])
 
+    def test_construct_geometries_builds_each_edge_and_drops_internal_nodes(self):
+        for n in range(1, 7):
+            self.mock_graph.add_node(n, lon=n, lat=0)
+        self.mock_graph.add_edge(1, 3, ndref=[1, 2, 3])
+        self.mock_graph.add_edge(3, 3, ndref=[3, 3])
+        self.mock_graph.add_edge(3, 6, ndref=[3, 4, 5, 6])
+
+        self.osm_graph.construct_geometries(config=FormatterConfig(allow_zero_length_lines=False))
+
+        geometries = [list(d["geometry"].coords) for _, _, d in self.mock_graph.edges(data=True)]
+        self.assertEqual(geometries, [[(1, 0), (2, 0), (3, 0)], [(3, 0), (4, 0), (5, 0), (6, 0)]])
+        self.assertEqual(sorted(self.mock_graph.nodes), [1, 3, 6])
+
     def test_from_geojson(self):
         nodes_path = "test_nodes.geojson"
         edges_path = "test_edges.geojson"
@@ -553,6 +581,74 @@ class TestOSMGraph(unittest.TestCase):
         edges = list(self.osm_graph.get_graph().edges(data=True))
         self.assertEqual(len(edges), 1)
 
+    def test_simplify_merges_each_run_of_a_way_into_one_edge(self):
+        # Way 1 runs 1-2-3-4-5; node 3 is shared with way 2, so it splits the
+        # way into two runs that merge separately.
+        for n in range(1, 7):
+            self.mock_graph.add_node(n)
+        for segment, (u, v) in enumerate([(1, 2), (2, 3), (3, 4), (4, 5)]):
+            self.mock_graph.add_edge(u, v, osm_id="1", segment=segment, ndref=[u, v])
+        self.mock_graph.add_edge(3, 6, osm_id="2", segment=0, ndref=[3, 6])
+
+        self.osm_graph.simplify()
+
+        ndrefs = sorted(d["ndref"] for _, _, d in self.mock_graph.edges(data=True) if d["osm_id"] == "1")
+        self.assertEqual(ndrefs, [[1, 2, 3], [3, 4, 5]])
+
+    def test_simplify_keeps_kerb_and_zone_nodes(self):
+        for n in range(1, 5):
+            self.mock_graph.add_node(n)
+        self.mock_graph.add_node(2, kerb="lowered")
+        self.mock_graph.add_node("z1", highway="pedestrian", ndref=["3"])
+        for segment, (u, v) in enumerate([(1, 2), (2, 3), (3, 4)]):
+            self.mock_graph.add_edge(u, v, osm_id="1", segment=segment, ndref=[u, v])
+
+        self.osm_graph.simplify()
+
+        self.assertEqual(self.mock_graph.number_of_edges(), 3)
+
+    def test_simplify_does_not_depend_on_node_order(self):
+        # Nodes inserted against the way's direction still merge by segment.
+        for n in (4, 3, 2, 1):
+            self.mock_graph.add_node(n)
+        for segment, (u, v) in enumerate([(1, 2), (2, 3), (3, 4)]):
+            self.mock_graph.add_edge(u, v, osm_id="1", segment=segment, ndref=[u, v])
+
+        self.osm_graph.simplify()
+
+        edges = list(self.mock_graph.edges(data=True))
+        self.assertEqual(len(edges), 1)
+        self.assertEqual(edges[0][2]["ndref"], [1, 2, 3, 4])
+
+    def test_simplify_joins_the_runs_either_side_of_a_circular_way_start(self):
+        # Way 1 loops 1-2-3-4-1 and node 3 is shared with way 2, so the run
+        # ending the loop continues into the run starting it.
+        for n in range(1, 6):
+            self.mock_graph.add_node(n)
+        for segment, (u, v) in enumerate([(1, 2), (2, 3), (3, 4), (4, 1)]):
+            self.mock_graph.add_edge(u, v, osm_id="1", segment=segment, ndref=[u, v])
+        self.mock_graph.add_edge(3, 5, osm_id="2", segment=0, ndref=[3, 5])
+
+        self.osm_graph.simplify()
+
+        ndrefs = sorted(d["ndref"] for _, _, d in self.mock_graph.edges(data=True) if d["osm_id"] == "1")
+        self.assertEqual(ndrefs, [[3, 4, 1, 2, 3]])
+
+    def test_simplify_changes_the_graph_in_one_batch(self):
+        for n in range(1, 7):
+            self.mock_graph.add_node(n)
+        for segment, (u, v) in enumerate([(1, 2), (2, 3), (3, 4), (4, 5)]):
+            self.mock_graph.add_edge(u, v, osm_id="1", segment=segment, ndref=[u, v])
+        self.mock_graph.add_edge(3, 6, osm_id="2", segment=0, ndref=[3, 6])
+
+        with patch.object(self.mock_graph, "remove_edges_from", wraps=self.mock_graph.remove_edges_from) as remove, \
+                patch.object(self.mock_graph, "add_edges_from", wraps=self.mock_graph.add_edges_from) as add:
+            self.osm_graph.simplify()
+
+        remove.assert_called_once()
+        add.assert_called_once()
+        self.assertEqual(self.mock_graph.number_of_edges(), 3)
+
     def test_construct_geometries_custom_polygon_node(self):
         self.mock_graph.add_node(
             "g301846",
@@ -690,6 +786,23 @@ class TestOSMGraph(unittest.TestCase):
         self.assertIsInstance(node_data["geometry"], LineString)
         self.assertEqual(len(node_data["geometry"].coords), 3)
 
+    def test_construct_geometries_lengths_match_geometry_length(self):
+        coords = [[-122.30, 47.66], [-122.31, 47.66], [-122.31, 47.67], [-122.30, 47.67]]
+        for n, (lon, lat) in enumerate(coords):
+            self.mock_graph.add_node(n, lon=lon, lat=lat)
+        self.mock_graph.add_edge(0, 1, ndref=[0, 1])
+        self.mock_graph.add_edge(1, 3, ndref=[1, 2, 3])
+        self.mock_graph.add_node("line", ndref=coords)
+
+        self.osm_graph.construct_geometries()
+
+        geod = pyproj.Geod(ellps="WGS84")
+        features = [d for _, _, d in self.mock_graph.edges(data=True)]
+        features.append(self.mock_graph.nodes["line"])
+        for d in features:
+            self.assertEqual(d["length"], round(geod.geometry_length(d["geometry"]), 1))
+        self.assertEqual(self.mock_graph.nodes["line"]["length"], 2614.0)
+
 
 
 class TestFromGeoJSON(unittest.TestCase):
@@ -1110,6 +1223,75 @@ class TestFromGeoJSON(unittest.TestCase):
             self.assertFalse(os.path.exists(points_path))
             self.assertTrue(all(wid in node_ids for wid in zone_w_ids))
 
+    def _write_geojson(self, osm_graph, tmpdir, config=None):
+        paths = [
+            os.path.join(tmpdir, f'{name}.geojson')
+            for name in ('nodes', 'edges', 'points', 'lines', 'zones', 'polygons')
+        ]
+        osm_graph.to_geojson(*paths, config=config)
+        return paths
+
+    def test_to_geojson_zone_listed_before_its_nodes_references_remapped_ids(self):
+        graph = nx.MultiDiGraph()
+        graph.add_node(
+            "z100",
+            geometry=Polygon([(0, 0), (1, 0), (0, 1), (0, 0)]),
+            highway="pedestrian",
+            _w_id=["30", "20"],
+        )
+        graph.add_node(30, geometry=Point(0, 0), lon=0.0, lat=0.0)
+        graph.add_node(20, geometry=Point(1, 0), lon=1.0, lat=0.0)
+
+        with TemporaryDirectory() as tmpdir:
+            _, _, _, _, zones_path, _ = self._write_geojson(OSMGraph(G=graph), tmpdir)
+            with open(zones_path) as f:
+                zone_data = json.load(f)
+
+        self.assertEqual(zone_data["features"][0]["properties"]["_w_id"], ["1", "2"])
+
+    def test_to_geojson_compact_writes_the_same_collections(self):
+        graph = nx.MultiDiGraph()
+        graph.add_node(10, geometry=Point(0, 0), lon=0.0, lat=0.0)
+        graph.add_node(20, geometry=Point(1, 1), lon=1.0, lat=1.0)
+        graph.add_node("p5", geometry=Point(2, 2), lon=2.0, lat=2.0, amenity="bench")
+        graph.add_edge(10, 20, geometry=LineString([(0, 0), (1, 1)]), osm_id="99", highway="footway")
+
+        with TemporaryDirectory() as tmpdir:
+            indented_paths = self._write_geojson(OSMGraph(G=graph), tmpdir)
+            indented = {}
+            for path in indented_paths:
+                if os.path.exists(path):
+                    with open(path) as f:
+                        indented[os.path.basename(path)] = f.read()
+            compact_dir = os.path.join(tmpdir, "compact")
+            os.mkdir(compact_dir)
+            compact_paths = self._write_geojson(
+                OSMGraph(G=graph), compact_dir, config=FormatterConfig(compact_geojson=True)
+            )
+            compact = {}
+            for path in compact_paths:
+                if os.path.exists(path):
+                    with open(path) as f:
+                        compact[os.path.basename(path)] = f.read()
+
+        self.assertEqual(set(compact), {"nodes.geojson", "edges.geojson", "points.geojson"})
+        self.assertEqual(set(compact), set(indented))
+        for name, text in compact.items():
+            self.assertNotIn("\n", text)
+            self.assertEqual(json.loads(text), json.loads(indented[name]))
+
+    def test_to_geojson_failure_leaves_no_partial_files(self):
+        graph = nx.MultiDiGraph()
+        graph.add_node(10, geometry=Point(0, 0), lon=0.0, lat=0.0)
+        graph.add_node(20, geometry=Point(1, 1), lon=1.0, lat=1.0)
+        graph.add_edge(10, 20, geometry=LineString([(0, 0), (1, 1)]))
+
+        with TemporaryDirectory() as tmpdir:
+            with self.assertRaises(KeyError):
+                self._write_geojson(OSMGraph(G=graph), tmpdir)
+
+            self.assertEqual(os.listdir(tmpdir), [])
+
     def test_to_undirected_on_simple_graph(self):
         g = nx.Graph()
         g.add_edge(1, 2)
@@ -1166,6 +1348,83 @@ class TestFromGeoJSON(unittest.TestCase):
             self.assertEqual(len(list(graph.edges(data=True))), 1)
 
 
+class TestOSMReader(unittest.TestCase):
+    @staticmethod
+    def _graph_from_separate_passes(osm_file):
+        way_filter, node_filter, point_filter, line_filter, zone_filter, polygon_filter = OSW_FILTERS
+        way_parser = OSMWayParser(way_filter)
+        way_parser.apply_file(osm_file, locations=True)
+        G = way_parser.G
+        OSMNodeParser(G, node_filter).apply_file(osm_file)
+        OSMPointParser(G, point_filter).apply_file(osm_file)
+        OSMLineParser(G, line_filter).apply_file(osm_file, locations=True)
+        OSMTaggedNodeParser(G, node_filter, point_filter).apply_file(osm_file)
+        OSMZoneParser(G, zone_filter).apply_file(osm_file)
+        OSMPolygonParser(G, polygon_filter).apply_file(osm_file)
+        return G
+
+    @staticmethod
+    def _contents(G):
+        nodes = [(n, list(d.items())) for n, d in G.nodes(data=True)]
+        edges = [(u, v, k, list(d.items())) for u, v, k, d in G.edges(keys=True, data=True)]
+        return nodes, edges
+
+    def test_single_read_matches_separate_parser_passes(self):
+        for name in ("bug_3286.xml", "zone_boundary.xml", "test_roundtrip.xml", "tree-test.xml"):
+            with self.subTest(name=name):
+                osm_file = os.path.join(TEST_FILES_DIR, name)
+                expected = self._graph_from_separate_passes(osm_file)
+
+                reader = OSMReader(*OSW_FILTERS)
+                reader.apply_file(osm_file, locations=True)
+
+                # Order matters as well as content: it decides the sequential
+                # ids written by to_geojson.
+                self.assertEqual(self._contents(reader.graph()), self._contents(expected))
+
+    def test_from_osm_file_reads_the_file_once(self):
+        osm_file = os.path.join(TEST_FILES_DIR, "zone_boundary.xml")
+        with patch.object(OSMReader, "apply_file", autospec=True, side_effect=OSMReader.apply_file) as apply_file:
+            OSMGraph.from_osm_file(osm_file, *OSW_FILTERS)
+
+        apply_file.assert_called_once()
+
+    def test_from_osm_file_uses_configured_location_index(self):
+        osm_file = os.path.join(TEST_FILES_DIR, "zone_boundary.xml")
+        default = OSMGraph.from_osm_file(osm_file, *OSW_FILTERS).get_graph()
+
+        with TemporaryDirectory() as tmpdir:
+            config = FormatterConfig(location_index=f"dense_file_array,{os.path.join(tmpdir, 'locations.idx')}")
+            with patch.object(OSMReader, "apply_file", autospec=True, side_effect=OSMReader.apply_file) as apply_file:
+                graph = OSMGraph.from_osm_file(osm_file, *OSW_FILTERS, config=config).get_graph()
+
+        self.assertEqual(apply_file.call_args.kwargs["idx"], config.location_index)
+        self.assertEqual(self._contents(graph), self._contents(default))
+
+    def test_node_attributes_wait_for_the_ways(self):
+        reader = OSMReader(node_filter=lambda tags: "kerb" in tags)
+        kerb = MagicMock(id=5, tags={"kerb": "lowered"}, location=MagicMock(lon=1.0, lat=2.0))
+
+        reader.node(kerb)
+        reader.way_parser.G.add_node(5, lon=1.0, lat=2.0)
+        G = reader.graph()
+
+        self.assertEqual(G.nodes[5]["kerb"], "lowered")
+
+    def test_progressbar_counts_every_parser(self):
+        progressbar = MagicMock()
+        reader = OSMReader(
+            node_filter=lambda tags: False,
+            point_filter=lambda tags: False,
+            progressbar=progressbar,
+        )
+
+        reader.node(MagicMock(id=1, tags={}))
+
+        # One update for the node parser and one for the point parser, as
+        # when each read the file separately.
+        self.assertEqual(progressbar.update.call_count, 2)
+
 
 if __name__ == "__main__":
     unittest.main()
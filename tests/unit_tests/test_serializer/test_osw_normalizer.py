@@ -1,8 +1,11 @@
 import unittest
 import importlib.util
 import math
+import types
 from pathlib import Path
 
+import osmium
+
 module_path = Path(__file__).resolve().parents[3] / 'src/osm_osw_reformatter/serializer/osw/osw_normalizer.py'
 spec = importlib.util.spec_from_file_location('osw_normalizer', module_path)
 osw_normalizer = importlib.util.module_from_spec(spec)
@@ -26,6 +29,8 @@ natural_line = osw_normalizer.natural_line
 natural_polygon = osw_normalizer.natural_polygon
 _normalize = osw_normalizer._normalize
 
+TEST_FILES_DIR = Path(__file__).resolve().parents[1] / 'test_files'
+
 
 class TestOSWWayNormalizer(unittest.TestCase):
     def test_is_sidewalk(self):
@@ -121,8 +126,7 @@ class TestOSWWayNormalizer(unittest.TestCase):
 
     def test_normalize_stairs_defaults_highway_and_no_foot(self):
         tags = {'climb': 'up'}
-        normalizer = OSWWayNormalizer(tags)
-        result = normalizer._normalize_stairs()
+        result = osw_normalizer._apply_plan(tags, osw_normalizer._PLANS['stairs'])
         expected = {'climb': 'up', 'foot': 'yes'}
         self.assertEqual(result, expected)
 
@@ -424,6 +428,274 @@ class TestNormalizeWidthField(unittest.TestCase):
         self.assertEqual(result.get("ext:foo_copy"), "bar")
 
 
+class TestNormalizationCache(unittest.TestCase):
+    SIDEWALK = {'highway': 'footway', 'footway': 'sidewalk', 'surface': 'concrete', 'colour': 'grey'}
+
+    def setUp(self):
+        osw_normalizer.clear_normalization_caches()
+
+    def tearDown(self):
+        osw_normalizer.set_normalization_cache_size(osw_normalizer.NORMALIZATION_CACHE_SIZE)
+
+    def info(self, name):
+        return osw_normalizer.normalization_cache_info()[name]
+
+    def test_repeated_tag_sets_are_served_from_the_cache(self):
+        first = OSWWayNormalizer({**self.SIDEWALK, 'osm_id': '1'}).normalize()
+        second = OSWWayNormalizer({**self.SIDEWALK, 'osm_id': '2'}).normalize()
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.info('OSWWayNormalizer.normalize').hits, 1)
+        self.assertEqual(self.info('OSWWayNormalizer.normalize').misses, 1)
+
+    def test_cached_results_match_uncached_ones(self):
+        osw_normalizer.set_normalization_cache_size(0)
+        expected = OSWWayNormalizer(dict(self.SIDEWALK)).normalize()
+        osw_normalizer.set_normalization_cache_size(osw_normalizer.NORMALIZATION_CACHE_SIZE)
+
+        OSWWayNormalizer(dict(self.SIDEWALK)).normalize()
+        cached = OSWWayNormalizer(dict(self.SIDEWALK)).normalize()
+
+        self.assertEqual(list(cached.items()), list(expected.items()))
+
+    def test_callers_get_their_own_copy(self):
+        OSWWayNormalizer(dict(self.SIDEWALK)).normalize()['surface'] = 'gravel'
+
+        self.assertEqual(OSWWayNormalizer(dict(self.SIDEWALK)).normalize()['surface'], 'concrete')
+
+    def test_tag_order_is_part_of_the_key(self):
+        # Unknown tags are carried over as ext:* tags in their source order.
+        OSWWayNormalizer({**self.SIDEWALK, 'lit': 'yes'}).normalize()
+        result = OSWWayNormalizer({'lit': 'yes', **self.SIDEWALK}).normalize()
+
+        self.assertEqual(self.info('OSWWayNormalizer.normalize').hits, 0)
+        self.assertEqual([key for key in result if key.startswith('ext:')], ['ext:lit', 'ext:colour'])
+
+    def test_filter_is_cached_and_unhashable_tags_bypass_the_cache(self):
+        self.assertTrue(OSWZoneNormalizer({'highway': 'pedestrian', 'lon': 1.0}).filter())
+        self.assertTrue(OSWZoneNormalizer({'highway': 'pedestrian', 'lon': 2.0}).filter())
+        self.assertTrue(OSWZoneNormalizer({'highway': 'pedestrian', 'area': ['unhashable']}).filter())
+
+        info = self.info('OSWZoneNormalizer.filter')
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_invalid_ways_still_raise(self):
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                OSWWayNormalizer({'highway': 'motorway'}).normalize()
+
+    def test_cache_size_bounds_entries(self):
+        osw_normalizer.set_normalization_cache_size(2)
+        for value in ('a', 'b', 'c'):
+            OSWPointNormalizer({'amenity': 'bench', 'name': value}).normalize()
+
+        self.assertEqual(self.info('OSWPointNormalizer.normalize').currsize, 2)
+
+
+def _check_nan_and_raise(tag_type, temp):
+    if (tag_type == float or tag_type == int) and math.isnan(temp):
+        raise ValueError("Value cannot be NaN")
+    return temp
+
+
+def _legacy_normalize(tags, keep_keys, defaults):
+    """`_normalize` as it interpreted keep_keys before plans were compiled."""
+    new_tags = {}
+    consumed_tags = set()
+    invalid_tags = set()
+    for tag, tag_type in keep_keys.items():
+        try:
+            if isinstance(tag_type, list):
+                if isinstance(tag_type[1], (str, bool, int, float)):
+                    new_tags[tag_type[0]] = tag_type[1]
+                    consumed_tags.add(tag)
+                else:
+                    if isinstance(tag_type[1], types.FunctionType):
+                        temp = tag_type[1](tags[tag], tags)
+                    else:
+                        temp = tag_type[1](tags[tag])
+                    if temp is None:
+                        raise ValueError
+                    new_tags[tag_type[0]] = temp
+                    consumed_tags.add(tag)
+            elif isinstance(tag_type, (str, bool, int, float)):
+                new_tags[tag] = tag_type
+                consumed_tags.add(tag)
+            else:
+                if isinstance(tag_type, types.FunctionType):
+                    temp = tag_type(tags[tag], tags)
+                else:
+                    temp = tag_type(tags[tag])
+                if temp is None:
+                    raise ValueError
+                _check_nan_and_raise(tag_type, temp)
+                new_tags[tag] = temp
+                consumed_tags.add(tag)
+        except ValueError:
+            if tag in tags:
+                invalid_tags.add(tag)
+        except KeyError:
+            pass
+
+    new_tags.update(defaults)
+    ext_tags = {}
+    for key, value in osw_normalizer._feature_tags(tags).items():
+        if str(key).startswith("ext:"):
+            ext_tags[key] = value
+        elif key in invalid_tags or key not in consumed_tags:
+            ext_tags[f"ext:{key}"] = value
+    return {**{**new_tags, **defaults}, **{**new_tags, **ext_tags}}
+
+
+class _TagCollector(osmium.SimpleHandler):
+    def __init__(self):
+        super().__init__()
+        self.tag_sets = {}
+
+    def _add(self, tags):
+        tags = {tag.k: tag.v for tag in tags}
+        self.tag_sets.setdefault(tuple(tags.items()), tags)
+
+    def node(self, n):
+        self._add(n.tags)
+
+    def way(self, w):
+        self._add(w.tags)
+
+    def area(self, a):
+        self._add(a.tags)
+
+
+def _items(tags):
+    # NaN never equals itself, so compare it by name.
+    return [(k, 'nan' if isinstance(v, float) and math.isnan(v) else v) for k, v in tags.items()]
+
+
+def _fixture_tag_sets():
+    collector = _TagCollector()
+    for path in sorted(TEST_FILES_DIR.glob('*.xml')) + sorted(TEST_FILES_DIR.glob('*.pbf')):
+        try:
+            collector.apply_file(str(path))
+        except RuntimeError:
+            # width-test.xml lists its ways out of order.
+            pass
+    return list(collector.tag_sets.values())
+
+
+class TestNormalizationPlans(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tag_sets = _fixture_tag_sets()
+        cls.tag_sets += [
+            {'highway': 'footway', 'footway': 'crossing', 'crossing': 'marked', 'width': 'nan', 'foot': 'NO'},
+            {'highway': 'steps', 'step_count': '3.5', 'climb': 'Up', 'length': 'abc', 'ext:foo': 'x', 'foo': 'y'},
+            {'highway': 'service_link', 'service': 'alley', 'maxspeed': '25 mph', 'ext:maxspeed': '10'},
+            {'barrier': 'kerb', 'kerb': 'yes', 'tactile_paving': 'Yes', '_id': '1', 'osm_id': '2'},
+        ]
+
+    def test_fixture_tag_sets_are_collected(self):
+        self.assertGreater(len(self.tag_sets), 500)
+
+    def test_plans_match_legacy_keep_keys_interpretation(self):
+        for kind, (keep_keys, defaults) in osw_normalizer.PLAN_SOURCES.items():
+            plan = osw_normalizer._PLANS[kind]
+            for tags in self.tag_sets:
+                self.assertEqual(
+                    _items(osw_normalizer._apply_plan(tags, plan)),
+                    _items(_legacy_normalize(tags, keep_keys, defaults)),
+                    msg=f'{kind}: {tags}',
+                )
+
+    def test_plan_sources_layer_like_the_normalizer_chain(self):
+        keep_keys, defaults = osw_normalizer.PLAN_SOURCES['sidewalk']
+        self.assertEqual(
+            list(keep_keys),
+            ['highway', 'width', 'surface', 'name', 'description', 'foot', 'incline', 'length', 'footway'],
+        )
+        self.assertEqual(keep_keys['highway'], 'footway')
+        self.assertEqual(defaults, {'foot': 'yes'})
+
+        keep_keys, defaults = osw_normalizer.PLAN_SOURCES['service_road']
+        self.assertEqual(list(keep_keys)[-2:], ['maxspeed', 'service'])
+        self.assertEqual(keep_keys['maxspeed'], ['ext:maxspeed', str])
+        self.assertEqual(defaults, {})
+
+    def test_only_values_kept_under_their_own_key_are_checked_for_nan(self):
+        steps, _ = osw_normalizer.compile_plan({'width': float, 'height': ['ext:height', float]}, {})
+        kinds = {tag: kind for tag, _, kind, _ in steps}
+
+        self.assertEqual(kinds['width'], osw_normalizer._CONVERT_NUMBER)
+        self.assertEqual(kinds['height'], osw_normalizer._CONVERT)
+
+
+def _legacy_way_kind(normalizer):
+    for predicate, kind in (
+        (normalizer.is_sidewalk, 'sidewalk'),
+        (normalizer.is_crossing, 'crossing'),
+        (normalizer.is_traffic_island, 'traffic_island'),
+        (normalizer.is_footway, 'footway'),
+        (normalizer.is_stairs, 'stairs'),
+        (normalizer.is_pedestrian, 'pedestrian'),
+        (normalizer.is_living_street, 'living_street'),
+        (normalizer.is_driveway, 'service_road'),
+        (normalizer.is_alley, 'service_road'),
+        (normalizer.is_parking_aisle, 'service_road'),
+        (normalizer.is_road, 'road'),
+    ):
+        if predicate():
+            return kind
+    return None
+
+
+class TestFeatureKinds(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tag_sets = _fixture_tag_sets()
+        cls.tag_sets += [
+            {'highway': 'service', 'service': 'alley'},
+            {'highway': 'service', 'service': 'emergency_access'},
+            {'highway': 'footway', 'footway': 'traffic_island'},
+            {'highway': 'footway', 'footway': 'link'},
+            {'barrier': 'fence', 'natural': 'tree_row'},
+            {'ext:survey': 'yes'},
+        ]
+
+    def test_way_kind_matches_predicate_order(self):
+        for tags in self.tag_sets:
+            normalizer = OSWWayNormalizer(tags)
+            self.assertEqual(normalizer.kind(), _legacy_way_kind(normalizer), msg=tags)
+
+    def test_kinds(self):
+        self.assertEqual(OSWWayNormalizer({'highway': 'service', 'service': 'driveway'}).kind(), 'service_road')
+        self.assertEqual(OSWWayNormalizer({'highway': 'service'}).kind(), 'road')
+        self.assertEqual(OSWWayNormalizer({'highway': 'footway', 'footway': 'sidewalk'}).kind(), 'sidewalk')
+        self.assertIsNone(OSWWayNormalizer({'highway': 'cycleway'}).kind())
+        self.assertEqual(OSWNodeNormalizer({'barrier': 'kerb', 'kerb': 'raised'}).kind(), 'kerb')
+        self.assertEqual(OSWPointNormalizer({'amenity': 'waste_basket'}).kind(), 'amenity')
+        self.assertEqual(OSWPointNormalizer({'power': 'pole', 'natural': 'tree'}).kind(), 'power')
+        self.assertEqual(OSWPointNormalizer({'ext:survey': 'yes'}).kind(), 'custom')
+        self.assertEqual(OSWLineNormalizer({'barrier': 'fence', 'natural': 'tree_row'}).kind(), 'fence')
+        self.assertEqual(OSWPolygonNormalizer({'building': 'garage'}).kind(), 'building')
+        self.assertIsNone(OSWPolygonNormalizer({'building': 'skyscraper'}).kind())
+        self.assertEqual(OSWZoneNormalizer({'highway': 'pedestrian'}).kind(), 'pedestrian_zone')
+
+    def test_filter_and_normalize_agree_with_kind(self):
+        osw_normalizer.clear_normalization_caches()
+        for normalizer_class in (
+            OSWWayNormalizer, OSWNodeNormalizer, OSWPointNormalizer,
+            OSWLineNormalizer, OSWPolygonNormalizer, OSWZoneNormalizer,
+        ):
+            for tags in self.tag_sets:
+                normalizer = normalizer_class(tags)
+                kind = normalizer.kind()
+                self.assertEqual(normalizer.filter(), kind is not None, msg=tags)
+                if kind is not None:
+                    self.assertEqual(
+                        normalizer.normalize(),
+                        osw_normalizer._apply_plan(tags, osw_normalizer._PLANS[kind]),
+                        msg=tags,
+                    )
+
 
 if __name__ == '__main__':
     unittest.main()
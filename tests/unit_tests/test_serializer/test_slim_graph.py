@@ -0,0 +1,160 @@
+import os
+import json
+import pickle
+import unittest
+from tempfile import TemporaryDirectory
+
+import networkx as nx
+
+from src.osm_osw_reformatter.config import FormatterConfig
+from src.osm_osw_reformatter.helpers.osw import OSWHelper
+from src.osm_osw_reformatter.serializer.osm.slim_graph import (
+    SMALL_MAP_LIMIT,
+    ShapeTable,
+    SlimAttrs,
+    SlimMultiDiGraph,
+    SmallMap,
+)
+from src.osm_osw_reformatter.serializer.osm.osm_graph import OSMGraph, OSMWayParser
+
+TEST_FILES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test_files')
+OSW_FILTERS = (
+    OSWHelper.osw_way_filter,
+    OSWHelper.osw_node_filter,
+    OSWHelper.osw_point_filter,
+    OSWHelper.osw_line_filter,
+    OSWHelper.osw_zone_filter,
+    OSWHelper.osw_polygon_filter,
+)
+OUTPUT_NAMES = ("nodes", "edges", "points", "lines", "zones", "polygons")
+
+
+class TestSlimAttrs(unittest.TestCase):
+    def test_behaves_like_an_ordered_dict(self):
+        attrs = SlimAttrs(ShapeTable())
+        attrs.update({"lon": 1.0, "lat": 2.0, "highway": "footway"})
+        del attrs["lon"]
+        attrs["lon"] = 3.0
+
+        self.assertEqual(list(attrs.items()), [("lat", 2.0), ("highway", "footway"), ("lon", 3.0)])
+        self.assertEqual(attrs.pop("highway"), "footway")
+        self.assertNotIn("highway", attrs)
+        self.assertEqual(attrs.get("missing", "default"), "default")
+        self.assertEqual({**attrs}, {"lat": 2.0, "lon": 3.0})
+        with self.assertRaises(KeyError):
+            attrs["missing"]
+
+    def test_mappings_built_alike_share_a_shape(self):
+        table = ShapeTable()
+        first = SlimAttrs(table)
+        second = SlimAttrs(table)
+        first.update({"lon": 1.0, "lat": 2.0})
+        second.update({"lon": 3.0, "lat": 4.0})
+
+        self.assertIs(first._shape, second._shape)
+
+    def test_string_values_are_interned(self):
+        attrs = SlimAttrs(ShapeTable())
+        attrs["surface"] = "".join(["con", "crete"])
+
+        self.assertIs(attrs["surface"], "concrete")
+
+
+class TestSmallMap(unittest.TestCase):
+    def test_behaves_like_an_ordered_dict(self):
+        small = SmallMap()
+        small[2] = "b"
+        small[1] = "a"
+        small[2] = "c"
+
+        self.assertEqual(list(small.items()), [(2, "c"), (1, "a")])
+        del small[2]
+        self.assertEqual(small.copy(), {1: "a"})
+        with self.assertRaises(KeyError):
+            del small[2]
+
+    def test_popitem_removes_the_newest_entry(self):
+        small = SmallMap()
+        small[0] = "first"
+        small[1] = "second"
+
+        self.assertEqual(small.popitem(), (1, "second"))
+        self.assertEqual(list(small), [0])
+
+    def test_outgrowing_the_limit_keeps_order_and_entries(self):
+        small = SmallMap()
+        for key in range(SMALL_MAP_LIMIT + 2):
+            small[key] = str(key)
+        small[0] = "zero"
+        del small[1]
+
+        self.assertIsNotNone(small._dict)
+        self.assertEqual(
+            list(small.items()),
+            [(0, "zero")] + [(key, str(key)) for key in range(2, SMALL_MAP_LIMIT + 2)],
+        )
+        self.assertEqual(small.popitem(), (SMALL_MAP_LIMIT + 1, str(SMALL_MAP_LIMIT + 1)))
+        self.assertIn(SMALL_MAP_LIMIT, small)
+
+
+class TestSlimMultiDiGraph(unittest.TestCase):
+    def test_supports_the_graph_operations_osm_graph_uses(self):
+        G = SlimMultiDiGraph()
+        G.add_node(1, lon=0.0, lat=0.0)
+        G.add_edges_from([(1, 2, {"osm_id": 7, "segment": 0})])
+        G.add_edges_from([(1, 2, {"osm_id": 7, "segment": 1})])
+
+        self.assertIsInstance(G, nx.MultiDiGraph)
+        self.assertEqual(G.degree(1), 2)
+        self.assertEqual(list(G.successors(1)), [2])
+        self.assertEqual(list(G.predecessors(2)), [1])
+        self.assertEqual(G[1][2][0]["segment"], 0)
+
+        # Without a key networkx removes the newest parallel edge.
+        G.remove_edge(1, 2)
+        self.assertEqual([d["segment"] for _, _, d in G.edges(data=True)], [0])
+
+        G.remove_nodes_from([2])
+        self.assertEqual(G.number_of_edges(), 0)
+        self.assertEqual(dict(G.nodes[1]), {"lon": 0.0, "lat": 0.0})
+
+    def test_graph_is_picklable(self):
+        G = SlimMultiDiGraph()
+        G.add_edges_from([(1, 2, {"osm_id": 7, "ndref": [1, 2]})])
+
+        restored = pickle.loads(pickle.dumps(G))
+
+        self.assertEqual(list(restored.edges(data=True)), [(1, 2, {"osm_id": 7, "ndref": [1, 2]})])
+
+    def test_way_parser_uses_configured_backend(self):
+        self.assertIsInstance(
+            OSMWayParser(None, config=FormatterConfig(graph_backend="slim")).G,
+            SlimMultiDiGraph,
+        )
+        self.assertIs(type(OSMWayParser(None).G), nx.MultiDiGraph)
+
+    def test_conversion_output_matches_networkx_backend(self):
+        for name in ("bug_3286.xml", "zone_boundary.xml", "tree-test.xml"):
+            with self.subTest(name=name):
+                outputs = []
+                for graph_backend in ("networkx", "slim"):
+                    config = FormatterConfig(graph_backend=graph_backend)
+                    og = OSMGraph.from_osm_file(os.path.join(TEST_FILES_DIR, name), *OSW_FILTERS, config=config)
+                    og.simplify()
+                    og.construct_geometries(config=config)
+                    with TemporaryDirectory() as tmpdir:
+                        paths = [os.path.join(tmpdir, f"{output}.geojson") for output in OUTPUT_NAMES]
+                        og.to_geojson(*paths)
+                        contents = {}
+                        for path in paths:
+                            if os.path.exists(path):
+                                with open(path) as f:
+                                    contents[os.path.basename(path)] = json.load(f)
+                    outputs.append(contents)
+
+                self.assertTrue(outputs[0])
+                self.assertEqual(outputs[1], outputs[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -568,7 +568,7 @@ class TestZeroLengthGeometryCleanup(unittest.TestCase):
         ]
         self.assertEqual(self_looping, [], "The collapsed edge should not remain a way")
 
-    def test_restore_zero_length_way_refs_leaves_normal_ways_alone(self):
+    def test_postprocess_restores_only_single_node_ways(self):
         with tempfile.TemporaryDirectory() as tmpdir:
             xml_path = Path(tmpdir, "ways.osm.xml")
             xml_path.write_text(
@@ -580,7 +580,7 @@ class TestZeroLengthGeometryCleanup(unittest.TestCase):
 </osm>"""
             )
 
-            OSW2OSM._restore_zero_length_way_refs(xml_path)
+            OSW2OSM._postprocess_osm_xml(xml_path)
 
             root = ET.parse(xml_path).getroot()
 
@@ -588,8 +588,9 @@ class TestZeroLengthGeometryCleanup(unittest.TestCase):
             way.get("id"): [nd.get("ref") for nd in way.findall("nd")]
             for way in root.findall(".//way")
         }
-        self.assertEqual(refs["10"], ["1", "1"])
-        self.assertEqual(refs["11"], ["1", "2"])
+        # Ids are renumbered too: way 10 is now 1 and way 11 is 2.
+        self.assertEqual(refs["1"], ["1", "1"])
+        self.assertEqual(refs["2"], ["1", "2"])
 
     def test_osm2osw_lone_zero_length_way_becomes_exactly_one_node_and_one_edge(self):
         """OSM w1 = [n0, n0], and nothing else, converts to OSW e1 = (n0, n0)."""